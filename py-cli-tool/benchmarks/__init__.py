@@ -0,0 +1 @@
+"""Benchmarks over synthetic inventories; run with ``python -m benchmarks``."""
@@ -0,0 +1,171 @@
+"""Run the benchmark suite and check it against regression thresholds.
+
+    python -m benchmarks --sizes 10,1000,100000 --output results.json
+
+Exits with status 1 when a benchmark exceeds its per-host budget in
+``thresholds.json``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks import synthetic
+from cli_tool import cli, net_diag
+from cli_tool.commands.vms import _filter_vms, handle_vms
+from cli_tool.config import load_config
+from cli_tool.subnet_index import SubnetIndex
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000, 100_000)
+THRESHOLDS_PATH = Path(__file__).resolve().parent / "thresholds.json"
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _synthetic_results(config) -> Dict[str, Any]:
+    """A ``vms`` report shaped like handle_vms output, without probing."""
+    return {
+        "vms": [
+            {
+                "name": vm.name,
+                "hostname": vm.hostname,
+                "status": "healthy" if idx % 4 < 2 else "degraded",
+                "reasons": ["all checks passed"] if idx % 4 < 2 else ["ssh port 22 unreachable: timed out"],
+                "probes": {"ssh": {"sent": 1, "received": 1, "loss_pct": 0.0, "avg_ms": 0.2}},
+            }
+            for idx, vm in enumerate(config.vms)
+        ]
+    }
+
+
+def run_size(
+    hosts: int,
+    workdir: Path,
+    ports: synthetic.StandInPorts,
+    repeat: int,
+    probe_limit: int,
+    timeout: float,
+) -> List[dict]:
+    """Time every benchmark against one synthetic inventory of ``hosts`` VMs."""
+    path = synthetic.write_inventory(workdir / f"config-{hosts}.yaml", hosts, ports)
+    cache_dir = workdir / f"cache-{hosts}"
+    config = load_config(path)
+    interfaces = synthetic.local_interfaces(len(config.networks))
+    report = _synthetic_results(config)
+
+    def _subnets() -> None:
+        index = SubnetIndex(config.networks)
+        net_diag.validate_subnets(interfaces, config.networks, index)
+        net_diag.map_addresses(interfaces, config, index)
+
+    def _render_text() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli._print_text(report)
+
+    load_config(path, cache_dir=cache_dir)  # warm the config cache
+    benches: Dict[str, Callable[[], Any]] = {
+        "load_config": lambda: load_config(path),
+        "load_config_cached": lambda: load_config(path, cache_dir=cache_dir),
+        "filter_vms": lambda: _filter_vms(config, ["host00*"], roles=["db", "web"], machine_types=["vm"]),
+        "validate_subnets": _subnets,
+        "render_json": lambda: json.dumps(report, indent=2),
+        "render_text": _render_text,
+    }
+    if hosts <= probe_limit:
+        args = cli.build_parser().parse_args(
+            ["vms", "--no-history", "--timeout", str(timeout), "--concurrency", "512", "--per-host", "4"]
+        )
+        args.state_dir = workdir
+        benches["handle_vms"] = lambda: handle_vms(args, config)
+
+    results = []
+    for name, func in benches.items():
+        # Single runs for the slow cases on huge inventories keep the suite under a few minutes
+        slow = name in ("handle_vms", "load_config") and hosts > 10_000
+        timings = _measure(func, 1 if slow else repeat)
+        best = min(timings)
+        results.append(
+            {
+                "benchmark": name,
+                "hosts": hosts,
+                "seconds": round(best, 6),
+                "median_seconds": round(statistics.median(timings), 6),
+                "per_host_us": round(best / hosts * 1e6, 3),
+            }
+        )
+    return results
+
+
+def check_thresholds(results: List[dict], thresholds: Dict[str, Any]) -> List[str]:
+    """Budgets are microseconds per host, applied from ``min_hosts`` up where fixed costs no longer dominate."""
+    min_hosts = thresholds.get("min_hosts", 0)
+    budgets = thresholds.get("per_host_us", {})
+    regressions = []
+    for result in results:
+        budget = budgets.get(result["benchmark"])
+        if budget is not None and result["hosts"] >= min_hosts and result["per_host_us"] > budget:
+            regressions.append(
+                f"{result['benchmark']} at {result['hosts']} hosts: "
+                f"{result['per_host_us']} us/host exceeds {budget} us/host"
+            )
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated inventory sizes (default: 10 to 100000)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the best is reported")
+    parser.add_argument(
+        "--probe-limit",
+        type=int,
+        default=1000,
+        help="Largest inventory that handle_vms actually probes (default: 1000)",
+    )
+    parser.add_argument("--timeout", type=float, default=0.2, help="Probe timeout for handle_vms")
+    parser.add_argument("--thresholds", type=Path, default=THRESHOLDS_PATH, help="Regression budget file")
+    parser.add_argument("--output", type=Path, help="Write results JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    thresholds = json.loads(args.thresholds.read_text(encoding="utf-8")) if args.thresholds.exists() else {}
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory() as tmp, synthetic.loopback_listeners() as ports:
+        for hosts in sizes:
+            results += run_size(hosts, Path(tmp), ports, args.repeat, args.probe_limit, args.timeout)
+            print(f"benchmarked {hosts} hosts", file=sys.stderr)
+
+    regressions = check_thresholds(results, thresholds)
+    document = json.dumps(
+        {"python": sys.version.split()[0], "results": results, "regressions": regressions}, indent=2
+    )
+    if args.output:
+        args.output.write_text(document + "\n", encoding="utf-8")
+    else:
+        print(document)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Synthetic inventories and loopback stand-ins for benchmark runs."""
+
+from __future__ import annotations
+
+import socket
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Tuple
+
+from cli_tool.net_diag import InterfaceInfo
+
+HOSTS_PER_NETWORK = 250
+ROLES = ("web", "db", "cache", "worker", "control")
+
+
+def network_count(hosts: int) -> int:
+    return max(1, -(-hosts // HOSTS_PER_NETWORK))
+
+
+def _subnet(index: int) -> Tuple[str, str]:
+    """The ``index``-th /24 inside 127.0.0.0/8 as (prefix, cidr)."""
+    second, third = divmod(index + 1, 256)
+    prefix = f"127.{second}.{third}"
+    return prefix, f"{prefix}.0/24"
+
+
+def write_inventory(path: Path, hosts: int, ports: "StandInPorts") -> Path:
+    """Write a block-style config.yaml with ``hosts`` VMs spread over loopback /24s.
+
+    Half of the VMs point their ssh_port at a listener that accepts, a
+    quarter at a closed port and a quarter at a black hole.
+    """
+    lines: List[str] = [
+        "environment:",
+        "  name: bench",
+        "  domain: bench.local",
+        "  description: Synthetic benchmark inventory",
+        "defaults:",
+        "  vm:",
+        "    os_family: debian",
+        '    os_version: "12"',
+        "    ping: false",
+        "    samples: 1",
+        "networks:",
+    ]
+    for net in range(network_count(hosts)):
+        prefix, cidr = _subnet(net)
+        lines += [
+            f"  net{net}:",
+            f"    cidr: {cidr}",
+            f"    gateway: {prefix}.1",
+            "    expected_hosts:",
+            f"      router{net}: {prefix}.1",
+        ]
+    lines.append("vms:")
+    for idx in range(hosts):
+        net, offset = divmod(idx, HOSTS_PER_NETWORK)
+        prefix, _ = _subnet(net)
+        port = (ports.up, ports.up, ports.closed, ports.blackhole)[idx % 4]
+        lines += [
+            f"  - name: host{idx:06d}",
+            f"    hostname: host{idx:06d}.bench.local",
+            f"    role: {ROLES[idx % len(ROLES)]}",
+            f"    machine_type: {'bare-metal' if idx % 10 == 0 else 'vm'}",
+            "    networks:",
+            f"      - name: net{net}",
+            f"        ip: {prefix}.{offset + 2}",
+            "    checks:",
+            f"      ssh_port: {port}",
+        ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def local_interfaces(networks: int) -> List[InterfaceInfo]:
+    """Interfaces as the host would report them: one address in every other network."""
+    interfaces = [InterfaceInfo(name="lo", addresses=["127.0.0.1", "::1"])]
+    for net in range(0, networks, 2):
+        prefix, _ = _subnet(net)
+        interfaces.append(InterfaceInfo(name=f"veth{net}", addresses=[f"{prefix}.254"]))
+    return interfaces
+
+
+def _accept_forever(server: socket.socket) -> None:
+    while True:
+        try:
+            conn, _ = server.accept()
+        except OSError:
+            return  # listener closed
+        conn.close()
+
+
+class StandInPorts(NamedTuple):
+    up: int
+    closed: int
+    blackhole: int
+
+
+@contextmanager
+def loopback_listeners() -> Iterator[StandInPorts]:
+    """Yield ports that answer, refuse and black-hole TCP connects on all of 127.0.0.0/8.
+
+    The listeners bind the wildcard address because the inventory spreads
+    hosts over many loopback addresses. The up listener accepts and drops
+    connections on a background thread. The black hole has
+    a zero backlog that is filled at once, so further SYNs are dropped and
+    connects time out as they would against a firewalled host.
+    """
+    up = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    hole = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        up.bind(("0.0.0.0", 0))
+        up.listen(4096)
+        threading.Thread(target=_accept_forever, args=(up,), daemon=True).start()
+        hole.bind(("0.0.0.0", 0))
+        hole.listen(0)
+        filler.connect(("127.0.0.1", hole.getsockname()[1]))
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+        yield StandInPorts(up.getsockname()[1], closed_port, hole.getsockname()[1])
+    finally:
+        for sock in (filler, hole):
+            sock.close()
+        # close() alone does not wake a thread blocked in accept()
+        up.shutdown(socket.SHUT_RDWR)
+        up.close()
@@ -0,0 +1,176 @@
+"""Concurrent health check engine built on asyncio."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from cli_tool import vm_health
+from cli_tool.config import VMDefinition
+from cli_tool.defaults import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST
+from cli_tool.icmp import Pinger
+from cli_tool.profiling import span
+from cli_tool.ssh_pool import SshError, SshPool
+from cli_tool.state_provider import GUEST_STOPPED, GuestState, guest_state_for, stopped_status
+
+ProbeResult = Tuple[bool, Optional[str]]
+
+SAMPLE_SPACING = 0.05  # seconds between repeated probes of one kind
+ResultCallback = Callable[[int, vm_health.HealthStatus], None]
+
+
+class CheckEngine:
+    """Run VM probes concurrently under a global and a per-host limit."""
+
+    def __init__(
+        self,
+        timeout: float = 2,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        guest_states: Optional[Mapping[str, GuestState]] = None,
+        ssh_pool: Optional[SshPool] = None,
+    ) -> None:
+        if concurrency < 1 or per_host < 1:
+            raise ValueError("concurrency and per_host must be at least 1")
+        self.timeout = timeout
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self.pinger = Pinger()
+        self.guest_states: Mapping[str, GuestState] = guest_states or {}
+        self._ssh_pool = ssh_pool
+
+    @property
+    def ssh_pool(self) -> SshPool:
+        """Shared SSH connections, created on the first uptime check."""
+        if self._ssh_pool is None:
+            self._ssh_pool = SshPool()
+        return self._ssh_pool
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Hold one global and one per-host probe slot."""
+        host_sem = self._hosts.get(host)
+        if host_sem is None:
+            host_sem = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        async with self._global, host_sem:
+            yield
+
+    async def _guarded(
+        self, host: str, probe: Awaitable[ProbeResult], label: str = "probe"
+    ) -> Tuple[ProbeResult, float]:
+        """Run ``probe`` inside a slot; return its result and duration in ms.
+
+        The clock starts once the slot is held, so queueing behind the
+        concurrency limits does not count as latency.
+        """
+        async with self.slot(host):
+            loop = asyncio.get_running_loop()
+            with span(label, host=host):
+                start = loop.time()
+                result = await probe
+                return result, (loop.time() - start) * 1000
+
+    async def _sampled(
+        self, host: str, probe: Callable[[], Awaitable[ProbeResult]], samples: int, name: str = "probe"
+    ) -> vm_health.ProbeStats:
+        """Repeat ``probe`` up to ``samples`` times, SAMPLE_SPACING apart.
+
+        A probe that fails on its first attempt is not repeated, so an
+        unreachable host still costs a single timeout.
+        """
+        stats = vm_health.ProbeStats()
+        for index in range(samples):
+            if index:
+                await asyncio.sleep(SAMPLE_SPACING)
+            result, elapsed = await self._guarded(host, probe(), f"{name} #{index + 1}")
+            stats.add(result, elapsed)
+            if not stats.rtts_ms:
+                break
+        return stats
+
+    async def _facts(self, vm: VMDefinition, host: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Collect the VM's uptime, load, memory and disk over one SSH round trip."""
+        async with self.slot(host):
+            with span("uptime", host=host):
+                try:
+                    facts = await self.ssh_pool.facts(
+                        host, vm.checks.ssh_port or 22, vm.checks.ssh_user, self.timeout
+                    )
+                except SshError as exc:
+                    return None, str(exc)
+                return facts.as_dict(), None
+
+    async def check_vm(self, vm: VMDefinition) -> vm_health.HealthStatus:
+        """Run every enabled check for one VM concurrently, each ``checks.samples`` times."""
+        state = guest_state_for(vm, self.guest_states)
+        if state is not None and state.status == GUEST_STOPPED:
+            return stopped_status(vm, state)
+        # Use first IP for reachability checks
+        primary_ip = vm.networks[0].ip if vm.networks else None
+        probes: Dict[str, Callable[[], Awaitable[ProbeResult]]] = {}
+        if primary_ip and vm.checks.ping:
+            probes["ping"] = lambda: vm_health._ping(primary_ip, self.timeout, self.pinger)
+        if primary_ip and vm.checks.ssh_port:
+            probes["ssh"] = lambda: vm_health._probe_tcp(primary_ip, vm.checks.ssh_port, self.timeout)
+        with span(f"check_vm {vm.name}"):
+            sampled = asyncio.gather(
+                *(self._sampled(primary_ip, probe, vm.checks.samples, name) for name, probe in probes.items())
+            )
+            if primary_ip and vm.checks.uptime_check:
+                stats, (facts, facts_error) = await asyncio.gather(sampled, self._facts(vm, primary_ip))
+            else:
+                stats, facts, facts_error = await sampled, None, None
+            return vm_health.build_status(
+                vm, stats=dict(zip(probes, stats)), facts=facts, facts_error=facts_error
+            )
+
+    async def check_all(
+        self, vms: Sequence[VMDefinition], on_result: Optional[ResultCallback] = None
+    ) -> List[vm_health.HealthStatus]:
+        """Check all VMs concurrently; results keep the order of ``vms``.
+
+        ``on_result(index, status)`` is called as each VM finishes, in
+        completion order, for callers that stream results.
+        """
+
+        async def _one(idx: int, vm: VMDefinition) -> vm_health.HealthStatus:
+            status = await self.check_vm(vm)
+            if on_result is not None:
+                on_result(idx, status)
+            return status
+
+        return list(await asyncio.gather(*(_one(idx, vm) for idx, vm in enumerate(vms))))
+
+    def close(self) -> None:
+        """Release the shared ICMP sockets."""
+        self.pinger.close()
+
+
+def run_checks(
+    vms: Sequence[VMDefinition],
+    timeout: float = 2,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_host: int = DEFAULT_PER_HOST,
+    guest_states: Optional[Mapping[str, GuestState]] = None,
+    on_result: Optional[ResultCallback] = None,
+) -> List[vm_health.HealthStatus]:
+    """Synchronous entry point: check ``vms`` and return results in input order.
+
+    Guests that ``guest_states`` reports as stopped are not probed.
+    """
+
+    async def _main() -> List[vm_health.HealthStatus]:
+        engine = CheckEngine(
+            timeout=timeout,
+            concurrency=concurrency,
+            per_host=per_host,
+            guest_states=guest_states,
+        )
+        try:
+            return await engine.check_all(vms, on_result)
+        finally:
+            engine.close()
+
+    return asyncio.run(_main())
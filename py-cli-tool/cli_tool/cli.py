@@ -3,58 +3,101 @@
 from __future__ import annotations
 
 import argparse
+import importlib
 import json
+import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
 
-from dataclasses import replace
-
-from cli_tool import env_detect, net_diag, vm_health
-from cli_tool.config import ConfigError, RootConfig, VMChecks, load_config
+from cli_tool import defaults
 from cli_tool.logging_config import DEFAULT_LOG_FILE, get_logger
 
+if TYPE_CHECKING:
+    from cli_tool.config import RootConfig
+
 
 DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config.yaml"
+CONFIG_CACHE_DIR_NAME = "config-cache"
 
 
-def build_parser() -> argparse.ArgumentParser:
-    common = argparse.ArgumentParser(add_help=False)
-    common.add_argument(
-        "-c",
-        "--config",
-        type=Path,
-        default=DEFAULT_CONFIG_PATH,
-        help=f"Path to YAML config (default: {DEFAULT_CONFIG_PATH})",
-    )
-    common.add_argument(
-        "-v",
-        "--verbose",
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {value}")
+    return number
+
+
+def _fraction(value: str) -> float:
+    number = float(value)
+    if not 0 <= number < 1:
+        raise argparse.ArgumentTypeError(f"must be in [0, 1), got {value}")
+    return number
+
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def _duration(value: str) -> float:
+    """Parse ``90``, ``90s``, ``30m``, ``24h``, ``7d`` or ``2w`` into seconds."""
+    text = value.strip().lower()
+    unit = _DURATION_UNITS.get(text[-1:], None)
+    try:
+        number = float(text[:-1] if unit else text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a duration: {value}") from None
+    seconds = number * (unit or 1)
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {value}")
+    return seconds
+
+
+def _add_no_history_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--no-history",
         action="store_true",
-        help="Enable debug logging",
-    )
-    common.add_argument(
-        "-o",
-        "--output",
-        choices=["text", "json"],
-        default="text",
-        help="Output format",
+        help="Do not append this run's results to the history store",
     )
 
-    parser = argparse.ArgumentParser(
-        prog="homelab-cli",
-        description="Homelab diagnostics and inventory tool",
-        parents=[common],
-    )
 
-    subparsers = parser.add_subparsers(dest="command", required=True)
+def _add_max_age_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Reuse cached probe results younger than this many seconds (default: 0, disabled)",
+    )
 
-    subparsers.add_parser("env", help="Show environment and virtualization info", parents=[common])
 
-    vms_parser = subparsers.add_parser("vms", help="Check VM health", parents=[common])
+def _configure_vms(vms_parser: argparse.ArgumentParser) -> None:
     vms_parser.add_argument(
         "--name",
         action="append",
-        help="Limit checks to VMs by name (repeatable)",
+        help="Limit checks to VMs by name or glob such as 'k3s*' (repeatable)",
+    )
+    vms_parser.add_argument(
+        "--role",
+        action="append",
+        help="Limit checks to VMs with this role (repeatable)",
+    )
+    vms_parser.add_argument(
+        "--network",
+        action="append",
+        help="Limit checks to VMs attached to this network (repeatable)",
+    )
+    vms_parser.add_argument(
+        "--machine-type",
+        action="append",
+        choices=["vm", "bare-metal"],
+        help="Limit checks to VMs or bare-metal hosts (repeatable)",
     )
     vms_parser.add_argument(
         "--skip-ping",
@@ -66,93 +109,399 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Skip SSH port probe",
     )
+    vms_parser.add_argument(
+        "--timeout",
+        type=_positive_float,
+        default=defaults.DEFAULT_PROBE_TIMEOUT,
+        help=f"Per-probe timeout in seconds (default: {defaults.DEFAULT_PROBE_TIMEOUT:g})",
+    )
+    vms_parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=defaults.DEFAULT_CONCURRENCY,
+        help=f"Maximum probes in flight overall (default: {defaults.DEFAULT_CONCURRENCY})",
+    )
+    vms_parser.add_argument(
+        "--per-host",
+        type=_positive_int,
+        default=defaults.DEFAULT_PER_HOST,
+        help=f"Maximum probes in flight per host (default: {defaults.DEFAULT_PER_HOST})",
+    )
+    vms_parser.add_argument(
+        "--no-state-provider",
+        action="store_true",
+        help="Probe every VM even if the hypervisor reports it stopped",
+    )
+    _add_max_age_argument(vms_parser)
+    _add_no_history_argument(vms_parser)
+    vms_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep re-checking VMs and print only status transitions",
+    )
+    vms_parser.add_argument(
+        "--interval",
+        type=_positive_float,
+        default=defaults.DEFAULT_WATCH_INTERVAL,
+        help=f"Default seconds between checks in watch mode (default: {defaults.DEFAULT_WATCH_INTERVAL:g})",
+    )
+    vms_parser.add_argument(
+        "--jitter",
+        type=_fraction,
+        default=defaults.DEFAULT_WATCH_JITTER,
+        help=f"Random spread applied to watch intervals, as a fraction (default: {defaults.DEFAULT_WATCH_JITTER})",
+    )
+
 
-    net_parser = subparsers.add_parser("net", help="Run network diagnostics", parents=[common])
-    net_parser.add_argument(
+def _add_net_probe_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "--skip-dns",
         action="store_true",
         help="Skip DNS resolution tests",
     )
-    net_parser.add_argument(
+    parser.add_argument(
         "--external-host",
         default="1.1.1.1",
         help="External host to test connectivity",
     )
-    net_parser.add_argument(
+    parser.add_argument(
         "--external-port",
         type=int,
         default=443,
         help="External port to test connectivity",
     )
 
-    return parser
 
+def _configure_net(net_parser: argparse.ArgumentParser) -> None:
+    _add_net_probe_arguments(net_parser)
+    _add_max_age_argument(net_parser)
+    _add_no_history_argument(net_parser)
 
-def _load_configuration(path: Path) -> RootConfig:
-    return load_config(path)
-
-
-def handle_env(args: argparse.Namespace, config: RootConfig) -> dict[str, Any]:
-    os_info = env_detect.detect_os()
-    virt_info = env_detect.detect_virtualization()
-    data = {
-        "environment": {
-            "name": config.environment.name,
-            "domain": config.environment.domain,
-            "description": config.environment.description,
-        },
-        "host": {
-            "os_family": os_info.family,
-            "os_version": os_info.version,
-            "virtualized": virt_info.is_virtualized,
-            "virtualization_type": virt_info.type,
-            "hint": virt_info.hint,
-        },
-    }
-    return data
-
-
-def _filter_vms(config: RootConfig, names: List[str] | None) -> List:
-    if not names:
-        return config.vms
-    wanted = {n.lower() for n in names}
-    return [vm for vm in config.vms if vm.name.lower() in wanted]
-
-
-def handle_vms(args: argparse.Namespace, config: RootConfig) -> dict[str, Any]:
-    results = []
-    for vm in _filter_vms(config, args.name):
-        checks: VMChecks = vm.checks
-        if args.skip_ping:
-            checks = VMChecks(ping=False, ssh_port=checks.ssh_port, uptime_check=checks.uptime_check)
-        if args.skip_ssh:
-            checks = VMChecks(ping=checks.ping, ssh_port=0, uptime_check=checks.uptime_check)
-        vm_copy = replace(vm, checks=checks)
-        status = vm_health.check_vm(vm_copy)
-        results.append(status.as_dict())
-    return {"vms": results}
-
-
-def handle_net(args: argparse.Namespace, config: RootConfig) -> dict[str, Any]:
-    interfaces = net_diag.collect_interfaces()
-    routes = net_diag.summarize_routes()
-    dns_servers = net_diag.collect_dns_servers()
-    subnet_warnings = net_diag.validate_subnets(interfaces, config.networks)
-    dns_failures: List[str] = []
-    if not args.skip_dns:
-        hostnames = [config.environment.domain] + list(
-            {host for net in config.networks.values() for host in net.expected_hosts.keys()}
-        )
-        dns_failures = net_diag.test_dns_resolution(hostnames)
-    ext_error = net_diag.test_external_connectivity(args.external_host, args.external_port)
-    return net_diag.summarize_network(
-        interfaces=interfaces,
-        routes=routes,
-        dns_servers=dns_servers,
-        subnet_warnings=subnet_warnings,
-        dns_failures=dns_failures,
-        ext_error=ext_error,
+
+def _configure_scan(scan_parser: argparse.ArgumentParser) -> None:
+    scan_parser.add_argument(
+        "--network",
+        action="append",
+        help="Sweep only this configured network (repeatable; default: every IPv4 network)",
+    )
+    scan_parser.add_argument(
+        "--rate",
+        type=_positive_int,
+        default=defaults.DEFAULT_SCAN_RATE,
+        help=f"Maximum probes sent per second (default: {defaults.DEFAULT_SCAN_RATE})",
+    )
+    scan_parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=defaults.DEFAULT_SCAN_CONCURRENCY,
+        help=f"Maximum TCP connects in flight (default: {defaults.DEFAULT_SCAN_CONCURRENCY})",
+    )
+    scan_parser.add_argument(
+        "--timeout",
+        type=_positive_float,
+        default=defaults.DEFAULT_SCAN_TIMEOUT,
+        help=f"Per-probe timeout in seconds (default: {defaults.DEFAULT_SCAN_TIMEOUT:g})",
+    )
+    scan_parser.add_argument(
+        "--tcp-port",
+        action="append",
+        type=_positive_int,
+        help="TCP port to try on expected hosts that ignore ping (repeatable; default: 22 and 443)",
+    )
+    scan_parser.add_argument(
+        "--tcp-all",
+        action="store_true",
+        help="TCP-probe every silent address, not just expected hosts; a sparse /16 takes minutes",
+    )
+    scan_parser.add_argument(
+        "--skip-ping",
+        action="store_true",
+        help="Use TCP connects only, on every address; a sparse /16 takes minutes",
+    )
+
+
+def _configure_serve(serve_parser: argparse.ArgumentParser) -> None:
+    serve_parser.add_argument(
+        "--listen",
+        default="127.0.0.1",
+        help="Address to bind the metrics endpoint to (default: 127.0.0.1)",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=defaults.DEFAULT_SERVE_PORT,
+        help=f"Port for the metrics endpoint (default: {defaults.DEFAULT_SERVE_PORT})",
+    )
+    serve_parser.add_argument(
+        "--vm-interval",
+        type=_positive_float,
+        default=defaults.DEFAULT_SERVE_VM_INTERVAL,
+        help=f"Seconds between VM check refreshes (default: {defaults.DEFAULT_SERVE_VM_INTERVAL:g})",
+    )
+    serve_parser.add_argument(
+        "--net-interval",
+        type=_positive_float,
+        default=defaults.DEFAULT_SERVE_NET_INTERVAL,
+        help=f"Seconds between network diagnostic refreshes (default: {defaults.DEFAULT_SERVE_NET_INTERVAL:g})",
+    )
+    serve_parser.add_argument(
+        "--timeout",
+        type=_positive_float,
+        default=defaults.DEFAULT_PROBE_TIMEOUT,
+        help=f"Per-probe timeout in seconds (default: {defaults.DEFAULT_PROBE_TIMEOUT:g})",
+    )
+    serve_parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=defaults.DEFAULT_CONCURRENCY,
+        help=f"Maximum probes in flight overall (default: {defaults.DEFAULT_CONCURRENCY})",
+    )
+    serve_parser.add_argument(
+        "--per-host",
+        type=_positive_int,
+        default=defaults.DEFAULT_PER_HOST,
+        help=f"Maximum probes in flight per host (default: {defaults.DEFAULT_PER_HOST})",
+    )
+    serve_parser.add_argument(
+        "--no-state-provider",
+        action="store_true",
+        help="Probe every VM even if the hypervisor reports it stopped",
+    )
+    _add_net_probe_arguments(serve_parser)
+    _add_no_history_argument(serve_parser)
+
+
+def _configure_history(history_parser: argparse.ArgumentParser) -> None:
+    history_parser.add_argument(
+        "--since",
+        type=_duration,
+        default=7 * 86400,
+        metavar="DURATION",
+        help="Summarize samples newer than this, e.g. 90m, 24h, 7d (default: 7d)",
+    )
+    history_parser.add_argument(
+        "--host",
+        action="append",
+        help="Only targets matching this name or glob (repeatable)",
     )
+    history_parser.add_argument(
+        "--kind",
+        action="append",
+        choices=["vm", "dns", "dns-server", "tcp"],
+        help="Only targets of this kind (repeatable)",
+    )
+
+
+def _configure_import(import_parser: argparse.ArgumentParser) -> None:
+    import_parser.add_argument(
+        "--dnsmasq",
+        action="append",
+        type=Path,
+        help="dnsmasq config with dhcp-host, host-record or address lines (repeatable)",
+    )
+    import_parser.add_argument(
+        "--leases",
+        action="append",
+        type=Path,
+        help="dnsmasq lease file (repeatable)",
+    )
+    import_parser.add_argument(
+        "--ansible",
+        action="append",
+        type=Path,
+        help="Ansible inventory, INI or YAML (repeatable)",
+    )
+    import_parser.add_argument(
+        "--role",
+        default=defaults.DEFAULT_IMPORT_ROLE,
+        help=f"Role for hosts without an Ansible group (default: {defaults.DEFAULT_IMPORT_ROLE})",
+    )
+    import_parser.add_argument(
+        "--write",
+        type=Path,
+        help="Write the new VMs as a config fragment here, e.g. into conf.d/",
+    )
+    import_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Replace the --write file if it exists",
+    )
+    import_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Run VM health checks against the newly imported hosts",
+    )
+    import_parser.add_argument(
+        "--timeout",
+        type=_positive_float,
+        default=defaults.DEFAULT_PROBE_TIMEOUT,
+        help=f"Per-probe timeout in seconds for --check (default: {defaults.DEFAULT_PROBE_TIMEOUT:g})",
+    )
+    import_parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=defaults.DEFAULT_CONCURRENCY,
+        help=f"Maximum probes in flight overall (default: {defaults.DEFAULT_CONCURRENCY})",
+    )
+    import_parser.add_argument(
+        "--per-host",
+        type=_positive_int,
+        default=defaults.DEFAULT_PER_HOST,
+        help=f"Maximum probes in flight per host (default: {defaults.DEFAULT_PER_HOST})",
+    )
+
+
+@dataclass(frozen=True)
+class Subcommand:
+    """A CLI subcommand whose handler module is imported only when it runs."""
+
+    name: str
+    help: str
+    handler: str  # "package.module:function"
+    configure: Optional[Callable[[argparse.ArgumentParser], None]] = None
+    subcommands: Tuple["Subcommand", ...] = ()
+    needs_config: bool = True  # False: the handler gets None and reads args.config itself
+
+    def load_handler(self) -> Callable[..., Optional[dict]]:
+        module_name, _, func_name = self.handler.partition(":")
+        return getattr(importlib.import_module(module_name), func_name)
+
+
+SUBCOMMANDS: List[Subcommand] = [
+    Subcommand("env", "Show environment and virtualization info", "cli_tool.commands.env:handle_env"),
+    Subcommand("vms", "Check VM health", "cli_tool.commands.vms:handle_vms", _configure_vms),
+    Subcommand(
+        "net",
+        "Run network diagnostics",
+        "cli_tool.commands.net:handle_net",
+        _configure_net,
+        subcommands=(
+            Subcommand(
+                "scan",
+                "Sweep configured subnets for live hosts",
+                "cli_tool.commands.scan:handle_scan",
+                _configure_scan,
+            ),
+        ),
+    ),
+    Subcommand(
+        "history",
+        "Summarize recorded availability, latency and flaps",
+        "cli_tool.commands.history:handle_history",
+        _configure_history,
+        needs_config=False,
+    ),
+    Subcommand(
+        "serve",
+        "Serve VM and network health as OpenMetrics over HTTP",
+        "cli_tool.commands.serve:handle_serve",
+        _configure_serve,
+    ),
+    Subcommand(
+        "validate",
+        "Check the config and its included files, reporting every problem",
+        "cli_tool.commands.validate:handle_validate",
+        needs_config=False,
+    ),
+    Subcommand(
+        "import",
+        "Import hosts from dnsmasq and Ansible inventories",
+        "cli_tool.commands.import_hosts:handle_import",
+        _configure_import,
+    ),
+]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        default=DEFAULT_CONFIG_PATH,
+        help=f"Path to YAML config (default: {DEFAULT_CONFIG_PATH})",
+    )
+    common.add_argument(
+        "--no-config-cache",
+        action="store_true",
+        help="Always re-parse and re-validate the config file",
+    )
+    common.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Enable debug logging",
+    )
+    common.add_argument(
+        "--import-profile",
+        action="store_true",
+        help="Report the import cost of each module on stderr",
+    )
+    common.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time config loading, stages and probes; print a timing tree (or a 'timings' block in JSON)",
+    )
+    common.add_argument(
+        "--profile-dump",
+        type=Path,
+        metavar="PATH",
+        help="Run the command under cProfile and write pstats data to PATH",
+    )
+    common.add_argument(
+        "--trace-file",
+        type=Path,
+        metavar="PATH",
+        help="Write recorded spans to PATH in Chrome trace format (chrome://tracing, Perfetto)",
+    )
+    common.add_argument(
+        "-o",
+        "--output",
+        choices=["text", "json", "ndjson"],
+        default="text",
+        help="Output format; ndjson streams one compact record per VM or net stage",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="homelab-cli",
+        description="Homelab diagnostics and inventory tool",
+        parents=[common],
+    )
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in SUBCOMMANDS:
+        sub = subparsers.add_parser(command.name, help=command.help, parents=[common])
+        if command.configure is not None:
+            command.configure(sub)
+        if command.subcommands:
+            # Optional: "net" alone still runs the parent handler
+            nested = sub.add_subparsers(dest=f"{command.name}_command", metavar="{...}")
+            for child in command.subcommands:
+                child_parser = nested.add_parser(child.name, help=child.help, parents=[common])
+                if child.configure is not None:
+                    child.configure(child_parser)
+
+    return parser
+
+
+def _resolve_command(args: argparse.Namespace) -> Optional[Subcommand]:
+    command = next((cmd for cmd in SUBCOMMANDS if cmd.name == args.command), None)
+    child_name = getattr(args, f"{args.command}_command", None)
+    if command is not None and child_name:
+        return next((child for child in command.subcommands if child.name == child_name), None)
+    return command
+
+
+def _state_dir() -> Path:
+    # Caches and stores live next to the log file (~/.py-cli-tool by default)
+    return DEFAULT_LOG_FILE.parent
+
+
+def _load_configuration(path: Path, use_cache: bool = True) -> "RootConfig":
+    from cli_tool.config import load_config
+
+    cache_dir = _state_dir() / CONFIG_CACHE_DIR_NAME if use_cache else None
+    return load_config(path, cache_dir=cache_dir)
 
 
 def _print_text(data: dict[str, Any]) -> None:
@@ -168,23 +517,102 @@ def _print_text(data: dict[str, Any]) -> None:
         if host.get("hint"):
             print(f"Virtualization hint: {host['hint']}")
     if "vms" in data:
+        if data.get("state_provider_error"):
+            print(f"State provider error: {data['state_provider_error']}")
         for vm in data["vms"]:
             reasons = "; ".join(vm["reasons"])
-            print(f"{vm['name']}: {vm['status']} - {reasons}")
+            details = [
+                f"{probe} {stats['avg_ms']:.1f} ms avg, {stats['loss_pct']:g}% loss"
+                for probe, stats in vm.get("probes", {}).items()
+                if "avg_ms" in stats
+            ]
+            facts = vm.get("facts")
+            if facts:
+                details.append(
+                    f"up {facts['uptime_s'] / 86400:.1f}d, load {facts['load'][0]:g}, "
+                    f"mem {facts['mem_used_pct']:g}%, disk {facts['disk_used_pct']:g}%"
+                )
+            suffix = f" [{'; '.join(details)}]" if details else ""
+            print(f"{vm['name']}: {vm['status']} - {reasons}{suffix}")
+    if "history" in data:
+        report = data["history"]
+        print(f"History since {report['since']}:")
+        if not report["targets"]:
+            print("  no samples recorded")
+        for target in report["targets"]:
+            avail = "n/a" if target["availability_pct"] is None else f"{target['availability_pct']}%"
+            latency = target["latency_ms"]
+            pct = "/".join(str(latency[key]) for key in ("p50", "p95", "p99")) + " ms" if latency else "no latency"
+            print(
+                f"  {target['kind']} {target['target']}: {avail} up over {target['samples']} samples, "
+                f"p50/p95/p99 {pct}, {target['flaps']} flaps, last {target['last_status']}"
+            )
+    if "scan" in data:
+        for net in data["scan"]:
+            if net.get("error"):
+                print(f"{net['network']}: skipped - {net['error']}")
+                continue
+            method = "ICMP+TCP" if net["icmp"] else "TCP"
+            print(
+                f"{net['network']} ({net['cidr']}): {net['live']}/{net['probed']} live "
+                f"via {method} in {net['elapsed_ms'] / 1000:.1f}s"
+            )
+            for addr in net["unexpected"]:
+                print(f"  + unexpected {addr}")
+            for host in net["missing"]:
+                print(f"  - missing {host}")
+            for err in net["errors"]:
+                print(f"  ! {err}")
+    if "validate" in data:
+        report = data["validate"]
+        for issue in report["issues"]:
+            print(f"{issue['file']}:{issue['line']}: {issue['severity']}: {issue['path']}: {issue['message']}")
+        verdict = "valid" if report["valid"] else "invalid"
+        print(
+            f"{report['files'][0]}: {verdict} - {report['networks']} networks, {report['vms']} VMs in "
+            f"{len(report['files'])} files; {report['errors']} errors, {report['warnings']} warnings"
+        )
+    if "import" in data:
+        report = data["import"]
+        for source in report["sources"]:
+            print(f"Source: {source['type']} {source['path']}")
+        print(
+            f"{report['hosts']} hosts: {len(report['new'])} new, {len(report['existing'])} already configured, "
+            f"{len(report['skipped'])} skipped"
+        )
+        for vm in report["new"]:
+            print(f"  + {vm['name']} {vm['networks'][0]['ip']} ({vm['role']})")
+        for reason in report["skipped"]:
+            print(f"  - {reason}")
+        for conflict in report["conflicts"]:
+            print(f"  ! {conflict}")
+        if report["written"]:
+            print(f"Wrote {report['written']}")
     if "interfaces" in data:
         print("Interfaces:")
         for iface in data["interfaces"]:
             print(f"  {iface['name']}: {', '.join(iface['addresses']) or 'no addresses'}")
         if data.get("routes"):
+            from cli_tool.netlink import Route
+
             print("Routes:")
             for route in data["routes"]:
-                print(f"  {route}")
+                print(f"  {Route(**route).describe()}")
         if data.get("dns_servers"):
             print(f"DNS servers: {', '.join(data['dns_servers'])}")
         if data.get("subnet_warnings"):
             print("Subnet warnings:")
             for warn in data["subnet_warnings"]:
                 print(f"  - {warn}")
+        if data.get("unmatched_addresses"):
+            print("Addresses outside every configured network:")
+            for addr in data["unmatched_addresses"]:
+                print(f"  - {addr}")
+        if data.get("dns_server_latency"):
+            print("DNS server latency:")
+            for server, stats in data["dns_server_latency"].items():
+                avg = f"{stats['avg_ms']} ms avg" if "avg_ms" in stats else "no replies"
+                print(f"  {server}: {avg}, {stats['failures']}/{stats['queries']} failed")
         if data.get("dns_failures"):
             print("DNS failures:")
             for fail in data["dns_failures"]:
@@ -193,31 +621,85 @@ def _print_text(data: dict[str, Any]) -> None:
             print(f"External connectivity error: {data['external_connectivity_error']}")
         else:
             print("External connectivity: ok")
+        for name, stage in data.get("stages", {}).items():
+            if stage["status"] != "ok":
+                print(f"Stage {name} {stage['status']}: {stage.get('error', '')}")
+
+
+def _print_timings(recorder: Any, stream: Any) -> None:
+    print("Timings:", file=stream)
+    for line in recorder.format_tree():
+        print(f"  {line}", file=stream)
 
 
 def run(argv: List[str] | None = None) -> None:
     parser = build_parser()
     args = parser.parse_args(argv)
 
+    if args.import_profile:
+        from cli_tool.import_profile import profile_imports
+
+        raw_argv = sys.argv[1:] if argv is None else argv
+        parser.exit(profile_imports([arg for arg in raw_argv if arg != "--import-profile"]))
+
     log_level = "DEBUG" if args.verbose else "INFO"
     logger = get_logger(log_level, log_file=DEFAULT_LOG_FILE)
+    args.state_dir = _state_dir()
 
-    try:
-        config = _load_configuration(args.config)
-    except ConfigError as exc:
-        logger.error("Configuration error: %s", exc)
-        parser.exit(2, f"Configuration error: {exc}\n")
-
-    if args.command == "env":
-        data = handle_env(args, config)
-    elif args.command == "vms":
-        data = handle_vms(args, config)
-    elif args.command == "net":
-        data = handle_net(args, config)
-    else:
+    command = _resolve_command(args)
+    if command is None:
         parser.error("Unknown command")
 
+    from cli_tool import profiling
+    from cli_tool.config import ConfigError
+
+    recorder = profiling.start() if args.profile or args.trace_file else None
+    cprofile = None
+    if args.profile_dump:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    config = None
+    try:
+        with profiling.span(f"run {command.name}"):
+            try:
+                if command.needs_config:
+                    with profiling.span("config.load"):
+                        config = _load_configuration(args.config, use_cache=not args.no_config_cache)
+            except ConfigError as exc:
+                logger.error("Configuration error: %s", exc)
+                parser.exit(2, f"Configuration error: {exc}\n")
+            with profiling.span(f"command {command.name}"):
+                data = command.load_handler()(args, config)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(str(args.profile_dump))
+        if recorder is not None:
+            profiling.stop()
+            if args.trace_file:
+                recorder.write_chrome_trace(args.trace_file)
+
+    timings = recorder is not None and args.profile
+    if data is None:
+        # Streaming modes (vms --watch, ndjson) print as they go
+        if timings and args.output == "ndjson":
+            print(json.dumps({"type": "timings", "timings": recorder.tree()}, separators=(",", ":")), flush=True)
+        elif timings:
+            _print_timings(recorder, sys.stderr)
+        return
+    if timings and args.output != "text":
+        data["timings"] = recorder.tree()
+
     if args.output == "json":
         print(json.dumps(data, indent=2))
+    elif args.output == "ndjson":
+        print(json.dumps(data, separators=(",", ":")), flush=True)
     else:
         _print_text(data)
+        if timings:
+            _print_timings(recorder, sys.stdout)
+    if getattr(args, "exit_status", 0):
+        parser.exit(args.exit_status)
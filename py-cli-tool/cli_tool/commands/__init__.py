@@ -0,0 +1,56 @@
+"""Subcommand handlers.
+
+``cli.run`` imports a handler module only when its subcommand is invoked,
+so probing and diagnostics code never loads for ``--help`` or other commands.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Iterable
+
+if TYPE_CHECKING:
+    from cli_tool.history import Sample
+    from cli_tool.result_cache import ResultCache
+
+
+def open_result_cache(args: argparse.Namespace) -> "ResultCache | None":
+    """Open the shared result cache when ``--max-age`` asks for it."""
+    if args.max_age <= 0:
+        return None
+    from cli_tool.result_cache import CACHE_FILE_NAME, ResultCache
+
+    return ResultCache(args.state_dir / CACHE_FILE_NAME)
+
+
+def streaming(args: argparse.Namespace) -> bool:
+    """True when results should be written record by record as they complete."""
+    return args.output == "ndjson"
+
+
+def emit_record(record: Dict[str, Any]) -> None:
+    """Write one compact JSON record on its own line and flush it immediately."""
+    sys.stdout.write(json.dumps(record, separators=(",", ":")) + "\n")
+    sys.stdout.flush()
+
+
+def record_history(args: argparse.Namespace, samples: Iterable["Sample"]) -> None:
+    """Append this run's fresh results to the history store unless ``--no-history``."""
+    if args.no_history:
+        return
+    import sqlite3
+
+    from cli_tool.history import HISTORY_FILE_NAME, HistoryStore
+
+    samples = list(samples)
+    if not samples:
+        return
+    try:
+        with HistoryStore(args.state_dir / HISTORY_FILE_NAME) as store:
+            store.append(samples)
+    except (OSError, sqlite3.Error) as exc:
+        # Losing one history row must never fail the check itself
+        logging.getLogger("py-cli-tool").warning("Could not record history: %s", exc)
@@ -0,0 +1,28 @@
+"""``env`` subcommand: host environment and virtualization facts."""
+
+from __future__ import annotations
+
+import argparse
+from typing import Any
+
+from cli_tool import env_detect
+from cli_tool.config import RootConfig
+
+
+def handle_env(args: argparse.Namespace, config: RootConfig) -> dict[str, Any]:
+    os_info, virt_info = env_detect.host_facts(args.state_dir / env_detect.HOST_FACTS_FILE_NAME)
+    data = {
+        "environment": {
+            "name": config.environment.name,
+            "domain": config.environment.domain,
+            "description": config.environment.description,
+        },
+        "host": {
+            "os_family": os_info.family,
+            "os_version": os_info.version,
+            "virtualized": virt_info.is_virtualized,
+            "virtualization_type": virt_info.type,
+            "hint": virt_info.hint,
+        },
+    }
+    return data
@@ -0,0 +1,27 @@
+"""``history`` subcommand: availability, latency percentiles and flaps over a window."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any
+
+from cli_tool.history import HISTORY_FILE_NAME, HistoryStore
+
+
+def handle_history(args: argparse.Namespace, config: None) -> dict[str, Any]:
+    until = time.time()
+    since = until - args.since
+    path = args.state_dir / HISTORY_FILE_NAME
+    targets = []
+    if path.exists():
+        with HistoryStore(path) as store:
+            summaries = store.summarize(since, until, kinds=args.kind or (), names=args.host or ())
+            targets = [summary.as_dict() for summary in summaries]
+    return {
+        "history": {
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(since)),
+            "until": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(until)),
+            "targets": targets,
+        }
+    }
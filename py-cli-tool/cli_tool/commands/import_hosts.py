@@ -0,0 +1,125 @@
+"""``import`` subcommand: turn dnsmasq and Ansible host lists into VM definitions."""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from cli_tool import importers
+from cli_tool.commands import emit_record, streaming
+from cli_tool.config import RootConfig, VMDefinition, gc_paused
+from cli_tool.profiling import span
+from cli_tool.subnet_index import SubnetIndex
+
+
+def _sources(args: argparse.Namespace) -> List[tuple]:
+    # Static config first, then live leases, then Ansible: earlier sources win
+    return (
+        [(importers.SOURCE_DNSMASQ, path) for path in args.dnsmasq or []]
+        + [(importers.SOURCE_LEASES, path) for path in args.leases or []]
+        + [(importers.SOURCE_ANSIBLE, path) for path in args.ansible or []]
+    )
+
+
+def _existing(config: RootConfig, host: importers.ImportedHost) -> Optional[VMDefinition]:
+    inventory = config.inventory
+    return (
+        inventory.by_name(host.name)
+        or (inventory.by_hostname(host.fqdn) if host.fqdn else None)
+        or (inventory.by_ip(host.ip) if host.ip else None)
+    )
+
+
+def write_fragment(path: Path, entries: List[dict], environment: str) -> None:
+    """Write ``vms`` list entries as a config fragment, replacing ``path`` atomically.
+
+    Each entry is one JSON flow mapping, which YAML reads as is; emitting
+    it with json instead of a YAML dumper keeps 100k entries well under a
+    second.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as fh:
+            fh.write(f"# Imported by py-cli-tool into the {environment} environment\n")
+            fh.write("vms:\n" if entries else "vms: []\n")
+            encode = json.JSONEncoder(check_circular=False).encode
+            fh.writelines(f"  - {encode(entry)}\n" for entry in entries)
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def handle_import(args: argparse.Namespace, config: RootConfig) -> dict[str, Any] | None:
+    sources = _sources(args)
+    if not sources:
+        raise SystemExit("import: give at least one of --dnsmasq, --leases or --ansible")
+    if args.write and args.write.exists() and not args.force:
+        raise SystemExit(f"import: {args.write} exists; use --force to replace it")
+
+    index = SubnetIndex(config.networks)
+    new: List[VMDefinition] = []
+    existing: List[str] = []
+    skipped: List[str] = []
+    # address -> imported VM name; gateways are routers, not VMs
+    claimed: Dict[str, str] = {net.gateway: f"the {name} gateway" for name, net in config.networks.items()}
+    with gc_paused():
+        with span("import.parse"):
+            try:
+                records = itertools.chain.from_iterable(importers.iter_source(kind, path) for kind, path in sources)
+                hosts, conflicts = importers.merge_hosts(records)
+            except OSError as exc:
+                raise SystemExit(f"import: {exc}") from exc
+        with span("import.map", hosts=len(hosts)):
+            for host in hosts.values():
+                known = _existing(config, host)
+                if known is not None:
+                    existing.append(known.name)
+                    continue
+                vm, reason = importers.to_vm(host, config, index, role=args.role)
+                if vm is None:
+                    skipped.append(reason)
+                    continue
+                ip = vm.networks[0].ip
+                if ip in claimed:
+                    skipped.append(f"{vm.name}: {ip} is already taken by {claimed[ip]}")
+                    continue
+                claimed[ip] = vm.name
+                new.append(vm)
+            entries = [importers.vm_entry(vm, config) for vm in new]
+
+    if args.write:
+        with span("import.write"):
+            write_fragment(args.write, entries, config.environment.name)
+
+    summary = {
+        "sources": [{"type": kind, "path": str(path)} for kind, path in sources],
+        "hosts": len(hosts),
+        "new": entries,
+        "existing": existing,
+        "skipped": skipped,
+        "conflicts": conflicts,
+        "written": str(args.write) if args.write else None,
+    }
+    if not args.check:
+        return {"import": summary}
+
+    from cli_tool import check_engine
+
+    stream = streaming(args)
+    if stream:
+        emit_record({"type": "import", **summary})
+    statuses = check_engine.run_checks(
+        new,
+        timeout=args.timeout,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        on_result=(lambda _, status: emit_record({"type": "vm", **status.as_dict()})) if stream else None,
+    )
+    if stream:
+        return None
+    return {"import": summary, "vms": [status.as_dict() for status in statuses]}
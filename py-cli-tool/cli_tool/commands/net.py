@@ -0,0 +1,213 @@
+"""``net`` subcommand: local network diagnostics against the config."""
+
+from __future__ import annotations
+
+import argparse
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from cli_tool import history, net_diag, netlink, result_cache
+from cli_tool.commands import emit_record, open_result_cache, record_history, streaming
+from cli_tool.config import RootConfig
+from cli_tool.pipeline import Stage, StageResult, run_stages
+from cli_tool.subnet_index import SubnetIndex
+
+if TYPE_CHECKING:
+    from cli_tool.result_cache import ResultCache
+
+EXTERNAL_TIMEOUT = 2.0
+DNS_TIMEOUT = 1.0
+DNS_RETRIES = 2
+
+
+def build_stages(args: argparse.Namespace, config: RootConfig, cached: Dict[str, Any]) -> List[Stage]:
+    """The ``net`` stage graph; only ``subnets`` waits on another stage.
+
+    ``cached`` holds result-cache hits read up front, so the stages never
+    touch the SQLite connection from their worker threads.
+    """
+    index = SubnetIndex(config.networks)
+
+    def _subnets(state: netlink.NetworkState) -> dict:
+        interfaces = net_diag.collect_interfaces(state)
+        warnings = net_diag.validate_subnets(interfaces, config.networks, index)
+        unmatched, misplaced = net_diag.map_addresses(interfaces, config, index)
+        return {"warnings": warnings + misplaced, "unmatched": unmatched}
+
+    stages = [
+        Stage("interfaces", net_diag.collect_network_state, timeout=3.0, default=netlink.NetworkState(source="none")),
+        Stage("subnets", _subnets, after=("interfaces",), timeout=2.0, default={"warnings": [], "unmatched": []}),
+        Stage("dns_servers", net_diag.collect_dns_servers, timeout=1.0, default=[]),
+    ]
+    if not args.skip_dns:
+        uncached = [host for host in net_diag.system_resolver_hosts(config) if host not in cached["dns"]]
+        stages += [
+            Stage(
+                "configured_dns",
+                lambda: net_diag.check_configured_dns(config, timeout=DNS_TIMEOUT, retries=DNS_RETRIES),
+                timeout=DNS_TIMEOUT * (DNS_RETRIES + 1) + 1.0,
+                default=([], {}, []),
+            ),
+            Stage("resolver", lambda: net_diag.resolve_hostnames(uncached), timeout=5.0, default={}),
+        ]
+    if "external" in cached:
+        stages.append(Stage("external", lambda: cached["external"], timeout=1.0))
+    else:
+        stages.append(
+            Stage(
+                "external",
+                lambda: net_diag.test_external_connectivity(
+                    args.external_host, args.external_port, timeout=EXTERNAL_TIMEOUT
+                ),
+                timeout=EXTERNAL_TIMEOUT + 1.0,
+            )
+        )
+    return stages
+
+
+def _external_key(args: argparse.Namespace) -> str:
+    return result_cache.make_key(
+        "tcp-connect", f"{args.external_host}:{args.external_port}", {"timeout": EXTERNAL_TIMEOUT}
+    )
+
+
+def _read_cache(args: argparse.Namespace, config: RootConfig, cache: "ResultCache | None") -> Dict[str, Any]:
+    """Cached resolver errors by host, plus the external check under ``"external"``."""
+    cached: Dict[str, Any] = {"dns": {}}
+    if cache is None:
+        return cached
+    hosts = [] if args.skip_dns else net_diag.system_resolver_hosts(config)
+    dns_keys = {host: result_cache.make_key("dns", host) for host in hosts}
+    hits = cache.get_many([*dns_keys.values(), _external_key(args)], args.max_age)
+    cached["dns"] = {host: hits[key]["error"] for host, key in dns_keys.items() if key in hits}
+    if _external_key(args) in hits:
+        cached["external"] = hits[_external_key(args)]["error"]
+    return cached
+
+
+def _write_cache(args: argparse.Namespace, cache: "ResultCache", results: Dict[str, StageResult]) -> None:
+    items = []
+    if "resolver" in results and results["resolver"].ok:
+        items += [(result_cache.make_key("dns", host), {"error": err}) for host, err in results["resolver"].value.items()]
+    if results["external"].ok:
+        items.append((_external_key(args), {"error": results["external"].value}))
+    cache.put_many(items)
+
+
+def history_samples(args: argparse.Namespace, cached: Dict[str, Any], results: Dict[str, StageResult]) -> List:
+    """History samples for the checks that actually ran (cache hits are skipped)."""
+    samples = []
+    if "resolver" in results and results["resolver"].ok:
+        samples += [
+            history.Sample("dns", host, history.STATUS_DOWN if err else history.STATUS_UP)
+            for host, err in results["resolver"].value.items()
+        ]
+    if "configured_dns" in results and results["configured_dns"].ok:
+        for server, stats in results["configured_dns"].value[1].items():
+            answered = "avg_ms" in stats
+            samples.append(
+                history.Sample(
+                    "dns-server",
+                    server,
+                    history.STATUS_UP if answered else history.STATUS_DOWN,
+                    stats.get("avg_ms"),
+                )
+            )
+    external = results["external"]
+    if "external" not in cached and external.ok:
+        up = external.value is None
+        samples.append(
+            history.Sample(
+                "tcp",
+                f"{args.external_host}:{args.external_port}",
+                history.STATUS_UP if up else history.STATUS_DOWN,
+                external.elapsed * 1000 if up else None,
+            )
+        )
+    return samples
+
+
+def _resolver_failures(config: RootConfig, cached: Dict[str, Any], results: Dict[str, StageResult]) -> List[str]:
+    errors = {**cached["dns"], **results["resolver"].value}
+    return [f"{host}: {errors[host]}" for host in net_diag.system_resolver_hosts(config) if errors.get(host)]
+
+
+def _external_error(result: StageResult) -> str | None:
+    return result.value if result.ok else result.error
+
+
+def _stage_record(config: RootConfig, cached: Dict[str, Any], results: Dict[str, StageResult], name: str) -> dict:
+    """One ndjson record: the stage's timing plus the report keys it produced."""
+    result = results[name]
+    record: Dict[str, Any] = {"type": "stage", "stage": name, **result.timing()}
+    if name == "interfaces":
+        record["interfaces"] = [
+            {"name": iface.name, "addresses": iface.addresses}
+            for iface in net_diag.collect_interfaces(result.value)
+        ]
+        record["routes"] = net_diag.summarize_routes(result.value)
+        record["neighbours"] = net_diag.summarize_neighbours(result.value)
+    elif name == "subnets":
+        record["subnet_warnings"] = result.value["warnings"]
+        record["unmatched_addresses"] = result.value["unmatched"]
+    elif name == "dns_servers":
+        record["dns_servers"] = result.value
+    elif name == "configured_dns":
+        record["dns_failures"], record["dns_server_latency"], _ = result.value
+    elif name == "resolver":
+        record["dns_failures"] = _resolver_failures(config, cached, results)
+    elif name == "external":
+        record["external_connectivity_error"] = _external_error(result)
+    return record
+
+
+def build_report(
+    args: argparse.Namespace, config: RootConfig, cached: Dict[str, Any], results: Dict[str, StageResult]
+) -> dict[str, Any]:
+    """The ``net`` report from settled stage results."""
+    state = results["interfaces"].value
+    dns_failures: List[str] = []
+    dns_latency: dict[str, dict] = {}
+    if not args.skip_dns:
+        # Hosts of networks with dns_servers are checked against those servers;
+        # the rest (and the domain itself) go through the system resolver
+        dns_failures, dns_latency, _ = results["configured_dns"].value
+        dns_failures = dns_failures + _resolver_failures(config, cached, results)
+
+    return net_diag.summarize_network(
+        interfaces=net_diag.collect_interfaces(state),
+        routes=net_diag.summarize_routes(state),
+        dns_servers=results["dns_servers"].value,
+        subnet_warnings=results["subnets"].value["warnings"],
+        dns_failures=dns_failures,
+        ext_error=_external_error(results["external"]),
+        unmatched_addresses=results["subnets"].value["unmatched"],
+        dns_latency=dns_latency,
+        neighbours=net_diag.summarize_neighbours(state),
+    )
+
+
+def handle_net(args: argparse.Namespace, config: RootConfig) -> dict[str, Any] | None:
+    cache = open_result_cache(args)
+    try:
+        cached = _read_cache(args, config, cache)
+        results: Dict[str, StageResult] = {}
+        on_result = None
+        if streaming(args):
+
+            def on_result(result: StageResult) -> None:
+                results[result.name] = result
+                emit_record(_stage_record(config, cached, results, result.name))
+
+        results.update(run_stages(build_stages(args, config, cached), on_result))
+        if cache:
+            _write_cache(args, cache, results)
+    finally:
+        if cache:
+            cache.close()
+    record_history(args, history_samples(args, cached, results))
+    if streaming(args):
+        return None
+
+    report = build_report(args, config, cached, results)
+    report["stages"] = {name: result.timing() for name, result in results.items()}
+    return report
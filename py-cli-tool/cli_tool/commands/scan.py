@@ -0,0 +1,70 @@
+"""``net scan`` subcommand: sweep configured subnets for live hosts."""
+
+from __future__ import annotations
+
+import argparse
+from ipaddress import IPv4Network
+from typing import Any, Dict, List
+
+from cli_tool import scan
+from cli_tool.commands import emit_record, streaming
+from cli_tool.config import Network, RootConfig
+from cli_tool.defaults import DEFAULT_SCAN_PORTS
+
+
+def _expected_hosts(config: RootConfig, network: Network) -> Dict[str, str]:
+    """Every address the config places in ``network``, labelled for the report."""
+    expected = {"gateway": network.gateway}
+    for vm in config.inventory.in_network(network.name):
+        for vm_net in vm.networks:
+            if vm_net.name == network.name:
+                expected[vm.name] = vm_net.ip
+    expected.update(network.expected_hosts)
+    return expected
+
+
+def handle_scan(args: argparse.Namespace, config: RootConfig) -> dict[str, Any] | None:
+    wanted = args.network or list(config.networks)
+    unknown = [name for name in wanted if name not in config.networks]
+    records: List[dict] = [{"network": name, "error": "not a configured network"} for name in unknown]
+    targets: Dict[str, IPv4Network] = {}
+    for name in wanted:
+        if name in unknown:
+            continue
+        subnet = config.networks[name].subnet()
+        if subnet.version != 4:
+            records.append({"network": name, "cidr": str(subnet), "error": "IPv6 subnets cannot be swept"})
+        elif subnet.prefixlen < scan.MIN_PREFIXLEN:
+            records.append({"network": name, "cidr": str(subnet), "error": f"larger than a /{scan.MIN_PREFIXLEN}"})
+        else:
+            targets[name] = subnet
+
+    stream = streaming(args)
+    if stream:
+        for record in records:
+            emit_record({"type": "scan", **record})
+    expected = {name: _expected_hosts(config, config.networks[name]) for name in targets}
+
+    def _report(result: scan.SweepResult) -> dict:
+        return {
+            "network": result.name,
+            "cidr": str(result.network),
+            **scan.compare(result, expected[result.name]),
+        }
+
+    sweeper = scan.Sweeper(
+        rate=args.rate,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        ports=args.tcp_port or DEFAULT_SCAN_PORTS,
+        ping=not args.skip_ping,
+        tcp_all=args.tcp_all,
+    )
+    results = sweeper.sweep_all(
+        targets,
+        on_result=(lambda result: emit_record({"type": "scan", **_report(result)})) if stream else None,
+        expected={name: set(hosts.values()) for name, hosts in expected.items()},
+    )
+    if stream:
+        return None
+    return {"scan": records + [_report(result) for result in results]}
@@ -0,0 +1,77 @@
+"""``serve`` subcommand: OpenMetrics endpoint over background-refreshed checks."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+from typing import Any, Dict, List
+
+from cli_tool import check_engine, exporter, history, state_provider
+from cli_tool.commands import net, record_history
+from cli_tool.config import RootConfig
+from cli_tool.pipeline import run_stages
+
+logger = logging.getLogger("py-cli-tool")
+
+
+def _collect_vms(args: argparse.Namespace, config: RootConfig, provider: Any) -> List[dict]:
+    guest_states = None
+    if provider is not None:
+        try:
+            guest_states = provider.fetch()
+        except state_provider.StateProviderError as exc:
+            logger.warning("State provider error, probing every VM: %s", exc)
+    statuses = check_engine.run_checks(
+        config.vms,
+        timeout=args.timeout,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        guest_states=guest_states,
+    )
+    results = [status.as_dict() for status in statuses]
+    record_history(args, (history.vm_sample(result) for result in results))
+    return results
+
+
+def _collect_net(args: argparse.Namespace, config: RootConfig) -> Dict[str, Any]:
+    cached: Dict[str, Any] = {"dns": {}}
+    results = run_stages(net.build_stages(args, config, cached))
+    record_history(args, net.history_samples(args, cached, results))
+    return net.build_report(args, config, cached, results)
+
+
+def _interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def handle_serve(args: argparse.Namespace, config: RootConfig) -> None:
+    provider = None
+    if config.state_provider and not args.no_state_provider:
+        provider = state_provider.build_provider(config.state_provider)
+
+    snapshot = exporter.Snapshot(["vms", "net"])
+    refreshers = [
+        exporter.Refresher("vms", lambda: _collect_vms(args, config, provider), args.vm_interval, snapshot),
+        exporter.Refresher("net", lambda: _collect_net(args, config), args.net_interval, snapshot),
+    ]
+    try:
+        server = exporter.MetricsServer((args.listen, args.port), snapshot)
+    except OSError as exc:
+        raise SystemExit(f"Cannot listen on {args.listen}:{args.port}: {exc}") from None
+
+    # Service managers stop daemons with SIGTERM; shut down as on Ctrl-C
+    signal.signal(signal.SIGTERM, _interrupt)
+    for refresher in refreshers:
+        refresher.start()
+    host, port = server.server_address[:2]
+    logger.info("Serving OpenMetrics on http://%s:%d/metrics", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for refresher in refreshers:
+            refresher.stop()
+        server.server_close()
+    return None
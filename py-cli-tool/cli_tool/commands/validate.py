@@ -0,0 +1,15 @@
+"""``validate`` subcommand: report every problem in the config at once."""
+
+from __future__ import annotations
+
+import argparse
+from typing import Any
+
+from cli_tool import validator
+
+
+def handle_validate(args: argparse.Namespace, config: None) -> dict[str, Any]:
+    report = validator.validate_file(args.config)
+    if report.errors:
+        args.exit_status = 1
+    return {"validate": report.as_dict()}
@@ -0,0 +1,138 @@
+"""``vms`` subcommand: VM health checks, one-shot or in watch mode."""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import replace
+from typing import Any, List, Optional
+
+from cli_tool import check_engine, history, result_cache, state_provider, watch
+from cli_tool.commands import emit_record, open_result_cache, record_history, streaming
+from cli_tool.config import RootConfig, StateProviderConfig, VMChecks, VMDefinition
+from cli_tool.profiling import span
+
+
+def _filter_vms(
+    config: RootConfig,
+    names: List[str] | None,
+    roles: List[str] | None = None,
+    networks: List[str] | None = None,
+    machine_types: List[str] | None = None,
+) -> List[VMDefinition]:
+    return config.inventory.select(
+        names=names,
+        roles=roles,
+        networks=networks,
+        machine_types=machine_types,
+    )
+
+
+def _vm_cache_key(vm: VMDefinition, timeout: float, provider: Optional[StateProviderConfig] = None) -> str:
+    # vm.checks already carries the --skip-ping/--skip-ssh overrides
+    params = {
+        "hostname": vm.hostname,
+        "ip": vm.networks[0].ip if vm.networks else None,
+        "ping": vm.checks.ping,
+        "ssh_port": vm.checks.ssh_port,
+        "uptime_check": vm.checks.uptime_check,
+        "ssh_user": vm.checks.ssh_user,
+        "samples": vm.checks.samples,
+        "thresholds": [vm.checks.max_rtt_ms, vm.checks.max_loss_pct, vm.checks.max_jitter_ms],
+        "timeout": timeout,
+        # A stopped guest is reported without probing only when a provider is used
+        "state_provider": [provider.type, provider.url, provider.token_id] if provider else None,
+    }
+    return result_cache.make_key("vm", vm.name, params)
+
+
+def _print_transition(transition: watch.Transition, output: str) -> None:
+    if output == "ndjson":
+        emit_record({"type": "transition", **transition.as_dict()})
+        return
+    if output == "json":
+        print(json.dumps(transition.as_dict()), flush=True)
+        return
+    record = transition.as_dict()
+    previous = record["previous"] or "unknown"
+    reasons = "; ".join(record["reasons"])
+    print(f"{record['at']} {record['name']}: {previous} -> {record['status']} - {reasons}", flush=True)
+
+
+def _watch_vms(args: argparse.Namespace, vms: List, provider: Any) -> None:
+    watch.run_watch(
+        vms,
+        lambda transition: _print_transition(transition, args.output),
+        interval=args.interval,
+        jitter=args.jitter,
+        refresh_states=provider.fetch if provider else None,
+        timeout=args.timeout,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+    )
+
+
+def handle_vms(args: argparse.Namespace, config: RootConfig) -> dict[str, Any] | None:
+    selected = []
+    for vm in _filter_vms(config, args.name, args.role, args.network, args.machine_type):
+        checks: VMChecks = vm.checks
+        if args.skip_ping:
+            checks = replace(checks, ping=False)
+        if args.skip_ssh:
+            checks = replace(checks, ssh_port=0)
+        selected.append(replace(vm, checks=checks))
+
+    provider = None
+    provider_config = None if args.no_state_provider else config.state_provider
+    if provider_config:
+        provider = state_provider.build_provider(provider_config)
+
+    if args.watch:
+        _watch_vms(args, selected, provider)
+        return None
+
+    cache = open_result_cache(args)
+    try:
+        keys = [_vm_cache_key(vm, args.timeout, provider_config) for vm in selected]
+        cached = cache.get_many(keys, args.max_age) if cache else {}
+        pending = [idx for idx, key in enumerate(keys) if key not in cached]
+
+        stream = streaming(args)
+        if stream:
+            for key in keys:
+                if key in cached:
+                    emit_record({"type": "vm", **cached[key]})
+
+        data: dict[str, Any] = {}
+        guest_states = None
+        if provider is not None and pending:
+            try:
+                with span("state_provider.fetch"):
+                    guest_states = provider.fetch()
+            except state_provider.StateProviderError as exc:
+                # Fall back to probing everything
+                data["state_provider_error"] = str(exc)
+                if stream:
+                    emit_record({"type": "state_provider_error", "error": str(exc)})
+
+        statuses = check_engine.run_checks(
+            [selected[idx] for idx in pending],
+            timeout=args.timeout,
+            concurrency=args.concurrency,
+            per_host=args.per_host,
+            guest_states=guest_states,
+            on_result=(lambda _, status: emit_record({"type": "vm", **status.as_dict()})) if stream else None,
+        )
+        fresh = {idx: status.as_dict() for idx, status in zip(pending, statuses)}
+        if cache:
+            cache.put_many((keys[idx], result) for idx, result in fresh.items())
+    finally:
+        if cache:
+            cache.close()
+
+    # Cached results were recorded by the run that produced them
+    record_history(args, (history.vm_sample(result) for result in fresh.values()))
+    if stream:
+        return None
+    data["vms"] = [fresh[idx] if idx in fresh else cached[key] for idx, key in enumerate(keys)]
+    return data
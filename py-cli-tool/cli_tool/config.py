@@ -2,11 +2,25 @@
 
 from __future__ import annotations
 
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Mapping, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+import gc
+import glob
+import hashlib
 import ipaddress
-import yaml
+import os
+import pickle
+import tempfile
+
+from cli_tool.inventory import Inventory
+
+# Bump whenever the dataclasses below change shape, to invalidate old caches
+CONFIG_CACHE_FORMAT = 5
+CONFIG_CACHE_KEEP = 8
+FRAGMENT_DIR_NAME = "conf.d"  # next to the main file; every *.yaml / *.yml in it is merged
+FRAGMENT_KEYS = {"networks", "vms"}
 
 
 class ConfigError(Exception):
@@ -52,6 +66,12 @@ class VMChecks:
     ping: bool = True
     ssh_port: int = 22
     uptime_check: bool = False
+    ssh_user: Optional[str] = None  # login for uptime_check; default: the ssh config's
+    interval: Optional[float] = None  # seconds between checks in watch mode
+    samples: int = 3  # probes per check, for RTT, loss and jitter
+    max_rtt_ms: Optional[float] = None  # degrade when the average RTT is above this
+    max_loss_pct: Optional[float] = None  # degrade when more probes than this are lost
+    max_jitter_ms: Optional[float] = None  # degrade when RTT varies more than this
 
 
 @dataclass
@@ -77,6 +97,18 @@ class Defaults:
     vm_os_version: Optional[str] = None
 
 
+@dataclass
+class StateProviderConfig:
+    """Hypervisor API used to fetch the run state of every guest in one call."""
+
+    type: str  # proxmox
+    url: str
+    token_id: Optional[str] = None
+    token_secret_env: str = "PROXMOX_TOKEN_SECRET"
+    verify_tls: bool = True
+    timeout: float = 5.0
+
+
 @dataclass
 class RootConfig:
     """Top-level configuration container."""
@@ -85,6 +117,11 @@ class RootConfig:
     networks: Dict[str, Network]
     vms: List[VMDefinition]
     defaults: Defaults
+    state_provider: Optional[StateProviderConfig] = None
+    inventory: Inventory = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.inventory = Inventory(self.vms)
 
 
 def _ensure_dict(data: Any, context: str) -> Mapping[str, Any]:
@@ -113,16 +150,24 @@ def _validate_cidr(value: str, context: str) -> None:
         raise ConfigError(f"{context} must be a valid CIDR: {exc}") from exc
 
 
-def _load_yaml(path: Path) -> Dict[str, Any]:
+def _read_config(path: Path) -> bytes:
     if not path.exists():
         raise ConfigError(f"Config file not found: {path}")
     if path.is_dir():
         raise ConfigError("Config path points to a directory, expected a file")
-    content = path.read_text(encoding="utf-8")
+    return path.read_bytes()
+
+
+def _parse_yaml(content: str) -> Dict[str, Any]:
+    # Imported here: on a config cache hit, PyYAML is never loaded at all
+    import yaml
+
     if not content.strip():
         raise ConfigError("Config file is empty")
+    # libyaml's C loader is several times faster than the pure-Python one
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     try:
-        data = yaml.safe_load(content)
+        data = yaml.load(content, Loader=loader)
     except yaml.YAMLError as exc:
         raise ConfigError(f"Failed to parse YAML: {exc}") from exc
     if not isinstance(data, dict):
@@ -180,12 +225,10 @@ def _parse_networks(raw: Mapping[str, Any]) -> Dict[str, Network]:
             dns_servers=dns_servers,
             expected_hosts=expected_hosts,
         )
-    if not networks:
-        raise ConfigError("networks cannot be empty")
     return networks
 
 
-def _parse_vm_networks(raw: Any, known_networks: Mapping[str, Network]) -> List[VMNetwork]:
+def _parse_vm_networks(raw: Any, known_networks: Optional[Mapping[str, Network]]) -> List[VMNetwork]:
     attachments: List[VMNetwork] = []
     for idx, net in enumerate(_ensure_list(raw, "vm.networks")):
         item = _ensure_dict(net, f"vm.networks[{idx}]")
@@ -193,7 +236,7 @@ def _parse_vm_networks(raw: Any, known_networks: Mapping[str, Network]) -> List[
             raise ConfigError(f"vm.networks[{idx}] requires name and ip")
         name = item["name"]
         ip = item["ip"]
-        if name not in known_networks:
+        if known_networks is not None and name not in known_networks:
             raise ConfigError(f"vm.networks[{idx}].name references unknown network '{name}'")
         if not isinstance(ip, str):
             raise ConfigError(f"vm.networks[{idx}].ip must be a string")
@@ -204,16 +247,24 @@ def _parse_vm_networks(raw: Any, known_networks: Mapping[str, Network]) -> List[
     return attachments
 
 
+def _optional_threshold(value: Any, name: str, upper: Optional[float] = None) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ConfigError(f"vm.checks.{name} must be a non-negative number")
+    if upper is not None and value > upper:
+        raise ConfigError(f"vm.checks.{name} must be at most {upper:g}")
+    return float(value)
+
+
 def _parse_vm_checks(raw: Any, defaults: VMChecks) -> VMChecks:
-    if raw is None:
-        ping = defaults.ping
-        ssh_port = defaults.ssh_port
-        uptime_check = defaults.uptime_check
-    else:
-        node = _ensure_dict(raw, "vm.checks")
-        ping = node.get("ping", defaults.ping)
-        ssh_port = node.get("ssh_port", defaults.ssh_port)
-        uptime_check = node.get("uptime_check", defaults.uptime_check)
+    node = {} if raw is None else _ensure_dict(raw, "vm.checks")
+    ping = node.get("ping", defaults.ping)
+    ssh_port = node.get("ssh_port", defaults.ssh_port)
+    uptime_check = node.get("uptime_check", defaults.uptime_check)
+    ssh_user = node.get("ssh_user", defaults.ssh_user)
+    interval = node.get("interval", defaults.interval)
+    samples = node.get("samples", defaults.samples)
     if not isinstance(ping, bool):
         raise ConfigError("vm.checks.ping must be a boolean")
     if not isinstance(ssh_port, int):
@@ -222,14 +273,34 @@ def _parse_vm_checks(raw: Any, defaults: VMChecks) -> VMChecks:
         raise ConfigError("vm.checks.ssh_port must be between 1 and 65535")
     if not isinstance(uptime_check, bool):
         raise ConfigError("vm.checks.uptime_check must be a boolean")
-    return VMChecks(ping=ping, ssh_port=ssh_port, uptime_check=uptime_check)
+    if ssh_user is not None and (not isinstance(ssh_user, str) or not ssh_user.strip()):
+        raise ConfigError("vm.checks.ssh_user must be a non-empty string")
+    if interval is not None and (
+        isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0
+    ):
+        raise ConfigError("vm.checks.interval must be a positive number of seconds")
+    if isinstance(samples, bool) or not isinstance(samples, int) or not 1 <= samples <= 100:
+        raise ConfigError("vm.checks.samples must be an integer between 1 and 100")
+    return VMChecks(
+        ping=ping,
+        ssh_port=ssh_port,
+        uptime_check=uptime_check,
+        ssh_user=ssh_user,
+        interval=interval,
+        samples=samples,
+        max_rtt_ms=_optional_threshold(node.get("max_rtt_ms", defaults.max_rtt_ms), "max_rtt_ms"),
+        max_loss_pct=_optional_threshold(node.get("max_loss_pct", defaults.max_loss_pct), "max_loss_pct", 100),
+        max_jitter_ms=_optional_threshold(node.get("max_jitter_ms", defaults.max_jitter_ms), "max_jitter_ms"),
+    )
 
 
 def _parse_vms(
     raw: Any,
-    known_networks: Mapping[str, Network],
+    known_networks: Optional[Mapping[str, Network]],
     defaults: Defaults,
 ) -> List[VMDefinition]:
+    """Parse a ``vms`` list; with ``known_networks`` None, network names are
+    checked later against the merged configuration."""
     vms: List[VMDefinition] = []
     for idx, item in enumerate(_ensure_list(raw, "vms")):
         node = _ensure_dict(item, f"vms[{idx}]")
@@ -264,22 +335,254 @@ def _parse_vms(
                 checks=checks,
             )
         )
-    if not vms:
-        raise ConfigError("vms cannot be empty")
     return vms
 
 
-def load_config(path: Path) -> RootConfig:
-    """Load, validate, and normalize the YAML configuration."""
+STATE_PROVIDER_TYPES = {"proxmox"}
+PROXMOX_API_PORT = 8006
+
 
-    data = _load_yaml(path)
+def _parse_state_provider(raw: Any, vms: List[VMDefinition]) -> Optional[StateProviderConfig]:
+    if raw is None:
+        return None
+    node = _ensure_dict(raw, "state_provider")
+    provider_type = node.get("type", "proxmox")
+    if provider_type not in STATE_PROVIDER_TYPES:
+        raise ConfigError(f"state_provider.type must be one of {sorted(STATE_PROVIDER_TYPES)}")
+    url = node.get("url")
+    host = node.get("host")
+    if url is None:
+        if not isinstance(host, str):
+            raise ConfigError("state_provider requires url or host")
+        # host names a VM entry (usually the bare-metal hypervisor)
+        match = next((vm for vm in vms if vm.name == host), None)
+        if match is None:
+            raise ConfigError(f"state_provider.host references unknown VM '{host}'")
+        ip = match.networks[0].ip
+        # IPv6 literals need brackets in a URL authority
+        url = f"https://[{ip}]:{PROXMOX_API_PORT}" if ":" in ip else f"https://{ip}:{PROXMOX_API_PORT}"
+    if not isinstance(url, str):
+        raise ConfigError("state_provider.url must be a string")
+    token_id = node.get("token_id")
+    if token_id is not None and not isinstance(token_id, str):
+        raise ConfigError("state_provider.token_id must be a string")
+    token_secret_env = node.get("token_secret_env", "PROXMOX_TOKEN_SECRET")
+    if not isinstance(token_secret_env, str):
+        raise ConfigError("state_provider.token_secret_env must be a string")
+    verify_tls = node.get("verify_tls", True)
+    if not isinstance(verify_tls, bool):
+        raise ConfigError("state_provider.verify_tls must be a boolean")
+    timeout = node.get("timeout", 5.0)
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+        raise ConfigError("state_provider.timeout must be a positive number")
+    return StateProviderConfig(
+        type=provider_type,
+        url=url.rstrip("/"),
+        token_id=token_id,
+        token_secret_env=token_secret_env,
+        verify_tls=verify_tls,
+        timeout=float(timeout),
+    )
+
+
+def _cache_file(cache_dir: Path, content: bytes) -> Path:
+    digest = hashlib.sha256(content)
+    digest.update(f"format={CONFIG_CACHE_FORMAT}".encode())
+    return cache_dir / f"{digest.hexdigest()}.pickle"
+
+
+@dataclass
+class _Fragment:
+    """The validated networks and VMs of one included file."""
 
+    networks: Dict[str, Network]
+    vms: List[VMDefinition]
+
+
+@dataclass
+class _CachedConfig:
+    """A validated config plus what is needed to tell whether it is still current."""
+
+    config: RootConfig
+    includes: List[str]  # include patterns of the main file
+    fragments: Dict[str, str]  # fragment path -> content digest
+
+
+def include_patterns(data: Mapping[str, Any]) -> List[str]:
+    raw = data.get("include", [])
+    patterns = [raw] if isinstance(raw, str) else raw
+    if not isinstance(patterns, list) or not all(isinstance(item, str) for item in patterns):
+        raise ConfigError("include must be a path or a list of paths (globs allowed)")
+    return patterns
+
+
+def fragment_paths(path: Path, includes: List[str]) -> List[Path]:
+    """Included files in merge order: each include pattern, then ``conf.d``."""
+    base = path.parent
+    found: List[Path] = []
+    for pattern in includes:
+        target = base / os.path.expanduser(pattern)
+        if any(char in pattern for char in "*?["):
+            found.extend(Path(match) for match in sorted(glob.glob(str(target), recursive=True)))
+        elif not target.is_file():
+            raise ConfigError(f"Included file not found: {target}")
+        else:
+            found.append(target)
+    conf_d = base / FRAGMENT_DIR_NAME
+    if conf_d.is_dir():
+        found.extend(sorted(p for p in conf_d.iterdir() if p.suffix in (".yaml", ".yml") and p.is_file()))
+    resolved = path.resolve()
+    return list(dict.fromkeys(p for p in found if p.resolve() != resolved))
+
+
+def _read_fragments(paths: List[Path]) -> Dict[str, bytes]:
+    try:
+        return {str(p): p.read_bytes() for p in paths}
+    except OSError as exc:
+        raise ConfigError(f"Cannot read included file: {exc}") from exc
+
+
+def _digests(fragments: Mapping[str, bytes]) -> Dict[str, str]:
+    return {name: hashlib.sha256(content).hexdigest() for name, content in fragments.items()}
+
+
+def _parse_fragment(name: str, content: bytes, defaults: Defaults) -> _Fragment:
+    try:
+        data = _parse_yaml(content.decode("utf-8"))
+        unknown = set(data) - FRAGMENT_KEYS
+        if unknown:
+            raise ConfigError(f"only {sorted(FRAGMENT_KEYS)} may be set in an included file, not {sorted(unknown)}")
+        return _Fragment(
+            networks=_parse_networks(_ensure_dict(data.get("networks", {}), "networks")),
+            vms=_parse_vms(data.get("vms", []), None, defaults),
+        )
+    except ConfigError as exc:
+        raise ConfigError(f"{name}: {exc}") from None
+
+
+def _load_fragment(name: str, content: bytes, defaults: Defaults, cache_dir: Optional[Path]) -> _Fragment:
+    """Parse one fragment, reusing the result cached under its content and the defaults."""
+    if cache_dir is None:
+        return _parse_fragment(name, content, defaults)
+    digest = hashlib.sha256(content)
+    # VMs inherit the main file's defaults, so those are part of the key
+    digest.update(f"format={CONFIG_CACHE_FORMAT}\0{defaults!r}".encode())
+    cache_file = cache_dir / f"{digest.hexdigest()}.pickle"
+    cached = _read_pickle(cache_file, _Fragment)
+    if cached is not None:
+        try:
+            os.utime(cache_file)  # keep recently used fragments out of pruning
+        except OSError:
+            pass
+        return cached
+    fragment = _parse_fragment(name, content, defaults)
+    # Pruned once by load_config, which knows how many fragments there are
+    _write_pickle(cache_file, fragment, keep=None)
+    return fragment
+
+
+def _read_pickle(cache_file: Path, expected: type) -> Any:
+    try:
+        with cache_file.open("rb") as fh:
+            cached = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError):
+        return None
+    return cached if isinstance(cached, expected) else None
+
+
+def _write_pickle(cache_file: Path, value: Any, keep: Optional[int] = CONFIG_CACHE_KEEP) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic rename: concurrent invocations never see a partial file
+        os.replace(tmp_name, cache_file)
+        if keep is not None:
+            _prune_config_cache(cache_file.parent, keep)
+    except OSError:
+        # The cache is an optimisation only
+        pass
+
+
+def _prune_config_cache(cache_dir: Path, keep: int = CONFIG_CACHE_KEEP) -> None:
+    entries = sorted(cache_dir.glob("*.pickle"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in entries[keep:]:
+        stale.unlink(missing_ok=True)
+
+
+def load_config(path: Path, cache_dir: Optional[Path] = None) -> RootConfig:
+    """Load, validate, and normalize the YAML configuration.
+
+    Files named by the main file's ``include`` list (paths or globs,
+    relative to it) and every YAML file in a ``conf.d`` directory next to
+    it contribute further ``networks`` and ``vms``.
+
+    With ``cache_dir`` set, the validated config is pickled under the hash
+    of the main file and reused while it and every included file are
+    unchanged. Each included file is also cached on its own, so editing
+    one re-parses only that file.
+    """
+
+    content = _read_config(path)
+    cache_file = _cache_file(cache_dir, content) if cache_dir is not None else None
+    fragment_cache = cache_dir / "fragments" if cache_dir is not None else None
+    with gc_paused():
+        if cache_file is not None:
+            cached = _read_pickle(cache_file, _CachedConfig)
+            if cached is not None:
+                fragments = _read_fragments(fragment_paths(path, cached.includes))
+                if _digests(fragments) == cached.fragments:
+                    return cached.config
+        data = _parse_yaml(content.decode("utf-8"))
+        includes = include_patterns(data)
+        fragments = _read_fragments(fragment_paths(path, includes))
+        config = _build_config(data, fragments, fragment_cache)
+    if cache_file is not None:
+        _write_pickle(cache_file, _CachedConfig(config, includes, _digests(fragments)))
+        if fragment_cache is not None and fragments:
+            try:
+                # Room for a few generations of every current fragment
+                _prune_config_cache(fragment_cache, CONFIG_CACHE_KEEP * len(fragments))
+            except OSError:
+                pass
+    return config
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Suspend the cyclic GC while building a large object graph.
+
+    Parsing and unpickling allocate a container per node and create no
+    cycles; left on, the collector rescans the growing heap again and again
+    and makes large inventories load in superlinear time.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _build_config(
+    data: Mapping[str, Any],
+    fragments: Optional[Mapping[str, bytes]] = None,
+    fragment_cache: Optional[Path] = None,
+) -> RootConfig:
     defaults_node = _ensure_dict(data.get("defaults", {}), "defaults")
     vm_defaults_node = _ensure_dict(defaults_node.get("vm", {}), "defaults.vm")
     vm_checks = VMChecks(
         ping=vm_defaults_node.get("ping", True),
         ssh_port=vm_defaults_node.get("ssh_port", 22),
         uptime_check=vm_defaults_node.get("uptime_check", False),
+        ssh_user=vm_defaults_node.get("ssh_user"),
+        interval=vm_defaults_node.get("interval"),
+        samples=vm_defaults_node.get("samples", 3),
+        max_rtt_ms=vm_defaults_node.get("max_rtt_ms"),
+        max_loss_pct=vm_defaults_node.get("max_loss_pct"),
+        max_jitter_ms=vm_defaults_node.get("max_jitter_ms"),
     )
     vm_os_family = vm_defaults_node.get("os_family")
     vm_os_version = vm_defaults_node.get("os_version")
@@ -287,6 +590,28 @@ def load_config(path: Path) -> RootConfig:
 
     env = _parse_environment(_ensure_dict(data.get("environment", {}), "environment"))
     networks = _parse_networks(_ensure_dict(data.get("networks", {}), "networks"))
-    vms = _parse_vms(data.get("vms", []), networks, defaults)
-
-    return RootConfig(environment=env, networks=networks, vms=vms, defaults=defaults)
+    vms = _parse_vms(data.get("vms", []), None, defaults)
+    for name, content in (fragments or {}).items():
+        fragment = _load_fragment(name, content, defaults, fragment_cache)
+        for net_name, network in fragment.networks.items():
+            if net_name in networks:
+                raise ConfigError(f"{name}: networks.{net_name} is already defined")
+            networks[net_name] = network
+        vms.extend(fragment.vms)
+    if not networks:
+        raise ConfigError("networks cannot be empty")
+    if not vms:
+        raise ConfigError("vms cannot be empty")
+    for vm in vms:
+        for attachment in vm.networks:
+            if attachment.name not in networks:
+                raise ConfigError(f"vm {vm.name} references unknown network '{attachment.name}'")
+    state_provider = _parse_state_provider(data.get("state_provider"), vms)
+
+    return RootConfig(
+        environment=env,
+        networks=networks,
+        vms=vms,
+        defaults=defaults,
+        state_provider=state_provider,
+    )
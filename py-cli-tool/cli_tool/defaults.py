@@ -0,0 +1,18 @@
+"""Default tunables shared by the CLI parser and the check engines.
+
+Kept free of heavy imports so building the parser stays cheap.
+"""
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_PER_HOST = 2
+DEFAULT_PROBE_TIMEOUT = 2.0
+DEFAULT_WATCH_INTERVAL = 30.0
+DEFAULT_WATCH_JITTER = 0.1
+DEFAULT_SCAN_RATE = 20000
+DEFAULT_SCAN_CONCURRENCY = 1024
+DEFAULT_SCAN_TIMEOUT = 1.0
+DEFAULT_SCAN_PORTS = (22, 443)
+DEFAULT_SERVE_PORT = 9877
+DEFAULT_SERVE_VM_INTERVAL = 30.0
+DEFAULT_SERVE_NET_INTERVAL = 60.0
+DEFAULT_IMPORT_ROLE = "imported"
@@ -0,0 +1,304 @@
+"""Minimal pipelined UDP DNS client for querying the configured resolvers."""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import random
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+QTYPE_A = 1
+QTYPE_PTR = 12
+QTYPE_AAAA = 28
+QTYPE_SOA = 6
+QTYPE_NAMES = {QTYPE_A: "A", QTYPE_PTR: "PTR", QTYPE_AAAA: "AAAA", QTYPE_SOA: "SOA"}
+QCLASS_IN = 1
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+RCODE_NAMES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+DNS_PORT = 53
+NEGATIVE_TTL_CAP = 300
+
+_HEADER = struct.Struct("!HHHHHH")
+_RR_FIXED = struct.Struct("!HHIH")
+
+Server = Tuple[str, int]
+
+
+class DnsError(Exception):
+    """Raised when a query gets no usable answer (timeout, malformed reply)."""
+
+
+@dataclass
+class DnsAnswer:
+    name: str
+    qtype: int
+    ttl: int
+    data: str
+
+
+@dataclass
+class DnsResponse:
+    rcode: int
+    answers: List[DnsAnswer]
+    latency: float
+    negative_ttl: Optional[int] = None
+    cached: bool = False
+
+    @property
+    def rcode_name(self) -> str:
+        return RCODE_NAMES.get(self.rcode, str(self.rcode))
+
+    def values(self, qtype: int) -> List[str]:
+        return [answer.data for answer in self.answers if answer.qtype == qtype]
+
+
+def reverse_name(ip: str) -> str:
+    """Return the in-addr.arpa / ip6.arpa name used for PTR lookups."""
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+def _encode_name(name: str) -> bytes:
+    out = bytearray()
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("idna") if label else b""
+        if not raw or len(raw) > 63:
+            raise ValueError(f"invalid DNS name: {name!r}")
+        out.append(len(raw))
+        out += raw
+    out.append(0)
+    return bytes(out)
+
+
+def build_query(qid: int, name: str, qtype: int) -> bytes:
+    """Build a recursive query for one question."""
+    header = _HEADER.pack(qid, 0x0100, 1, 0, 0, 0)  # RD set
+    return header + _encode_name(name) + struct.pack("!HH", qtype, QCLASS_IN)
+
+
+def _read_name(packet: bytes, offset: int) -> Tuple[str, int]:
+    labels: List[str] = []
+    end_offset: Optional[int] = None
+    for _ in range(128):  # guards against compression loops
+        length = packet[offset]
+        if length & 0xC0 == 0xC0:
+            pointer = struct.unpack_from("!H", packet, offset)[0] & 0x3FFF
+            if end_offset is None:
+                end_offset = offset + 2
+            offset = pointer
+            continue
+        if length == 0:
+            offset += 1
+            break
+        labels.append(packet[offset + 1 : offset + 1 + length].decode("ascii", errors="replace"))
+        offset += 1 + length
+    else:
+        raise DnsError("name compression loop")
+    return ".".join(labels), end_offset if end_offset is not None else offset
+
+
+def parse_response(packet: bytes) -> Tuple[int, str, int, DnsResponse]:
+    """Parse a reply into ``(qid, question name, question type, response)``."""
+    try:
+        qid, flags, qdcount, ancount, nscount, _ = _HEADER.unpack_from(packet)
+        offset = _HEADER.size
+        qname, qtype = "", 0
+        for _ in range(qdcount):
+            qname, offset = _read_name(packet, offset)
+            qtype = struct.unpack_from("!H", packet, offset)[0]
+            offset += 4
+        answers: List[DnsAnswer] = []
+        negative_ttl: Optional[int] = None
+        for section_index in range(ancount + nscount):
+            name, offset = _read_name(packet, offset)
+            rtype, _, ttl, rdlength = _RR_FIXED.unpack_from(packet, offset)
+            offset += _RR_FIXED.size
+            rdata_offset = offset
+            offset += rdlength
+            if section_index >= ancount:
+                if rtype == QTYPE_SOA:
+                    # RFC 2308: negative answers live for min(SOA TTL, SOA MINIMUM)
+                    minimum = struct.unpack_from("!I", packet, offset - 4)[0]
+                    negative_ttl = min(ttl, minimum)
+                continue
+            if rtype == QTYPE_A and rdlength == 4:
+                data = socket.inet_ntop(socket.AF_INET, packet[rdata_offset:offset])
+            elif rtype == QTYPE_AAAA and rdlength == 16:
+                data = socket.inet_ntop(socket.AF_INET6, packet[rdata_offset:offset])
+            elif rtype == QTYPE_PTR:
+                data = _read_name(packet, rdata_offset)[0]
+            else:
+                continue
+            answers.append(DnsAnswer(name=name, qtype=rtype, ttl=ttl, data=data))
+    except (struct.error, IndexError) as exc:
+        raise DnsError(f"malformed DNS response: {exc}") from exc
+    response = DnsResponse(rcode=flags & 0x000F, answers=answers, latency=0.0, negative_ttl=negative_ttl)
+    return qid, qname.lower(), qtype, response
+
+
+class _ServerProtocol(asyncio.DatagramProtocol):
+    """Dispatches replies from one server to the pending query with the same ID."""
+
+    def __init__(self) -> None:
+        self.pending: Dict[int, Tuple[str, int, asyncio.Future]] = {}
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        try:
+            qid, qname, qtype, response = parse_response(data)
+        except DnsError:
+            return
+        entry = self.pending.get(qid)
+        # Also check the question, so a stray reply cannot satisfy another query
+        if entry is None or entry[0] != qname or entry[1] != qtype:
+            return
+        del self.pending[qid]
+        if not entry[2].done():
+            entry[2].set_result(response)
+
+    def error_received(self, exc: Exception) -> None:
+        for _, _, future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.pending.clear()
+
+
+@dataclass
+class ServerStats:
+    queries: int = 0
+    failures: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        report = {"queries": self.queries, "failures": self.failures}
+        if self.latencies:
+            report["avg_ms"] = round(sum(self.latencies) / len(self.latencies) * 1000, 2)
+            report["max_ms"] = round(max(self.latencies) * 1000, 2)
+        return report
+
+
+class DnsClient:
+    """Send many queries to several servers at once over one UDP socket per server.
+
+    Answers are cached in memory for their TTL (negative answers for the
+    SOA minimum), so long-running modes do not re-query unchanged records.
+    """
+
+    def __init__(self, timeout: float = 1.0, retries: int = 2) -> None:
+        self.timeout = timeout
+        self.retries = retries
+        self.stats: Dict[str, ServerStats] = {}
+        self._protocols: Dict[Server, _ServerProtocol] = {}
+        self._connecting: Dict[Server, asyncio.Task] = {}
+        self._cache: Dict[Tuple[Server, str, int], Tuple[float, DnsResponse]] = {}
+        self._rng = random.Random()
+
+    async def _protocol_for(self, server: Server) -> _ServerProtocol:
+        protocol = self._protocols.get(server)
+        if protocol is not None and protocol.transport is not None and not protocol.transport.is_closing():
+            return protocol
+        # Concurrent queries to a new server all wait on the same endpoint
+        connecting = self._connecting.get(server)
+        if connecting is None:
+            loop = asyncio.get_running_loop()
+            connecting = loop.create_task(loop.create_datagram_endpoint(_ServerProtocol, remote_addr=server))
+            connecting.add_done_callback(lambda _: self._connecting.pop(server, None))
+            self._connecting[server] = connecting
+        _, protocol = await asyncio.shield(connecting)
+        self._protocols[server] = protocol
+        return protocol
+
+    def _cached(self, key: Tuple[Server, str, int]) -> Optional[DnsResponse]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if time.monotonic() >= expires:
+            del self._cache[key]
+            return None
+        return DnsResponse(response.rcode, response.answers, 0.0, response.negative_ttl, cached=True)
+
+    def _store(self, key: Tuple[Server, str, int], response: DnsResponse) -> None:
+        if response.answers:
+            ttl = min(answer.ttl for answer in response.answers)
+        elif response.negative_ttl is not None:
+            ttl = min(response.negative_ttl, NEGATIVE_TTL_CAP)
+        else:
+            return
+        if ttl > 0:
+            self._cache[key] = (time.monotonic() + ttl, response)
+
+    async def query(self, server: Union[str, Server], name: str, qtype: int = QTYPE_A) -> DnsResponse:
+        """Resolve one question against one server, retrying on timeout."""
+        if isinstance(server, str):
+            server = (server, DNS_PORT)
+        qname = name.rstrip(".").lower()
+        key = (server, qname, qtype)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        label = f"{server[0]}:{server[1]}" if server[1] != DNS_PORT else server[0]
+        stats = self.stats.setdefault(label, ServerStats())
+        stats.queries += 1
+        protocol = await self._protocol_for(server)
+        loop = asyncio.get_running_loop()
+        last_error = "timed out"
+        for _ in range(self.retries + 1):
+            qid = self._rng.randrange(0x10000)
+            while qid in protocol.pending:
+                qid = self._rng.randrange(0x10000)
+            future = loop.create_future()
+            protocol.pending[qid] = (qname, qtype, future)
+            start = loop.time()
+            protocol.transport.sendto(build_query(qid, qname, qtype))
+            try:
+                response = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                protocol.pending.pop(qid, None)
+                continue
+            except OSError as exc:
+                last_error = str(exc)
+                break
+            response.latency = loop.time() - start
+            stats.latencies.append(response.latency)
+            self._store(key, response)
+            return response
+        stats.failures += 1
+        raise DnsError(f"{QTYPE_NAMES.get(qtype, qtype)} {qname} via {label}: {last_error}")
+
+    async def query_many(
+        self, questions: Iterable[Tuple[Union[str, Server], str, int]]
+    ) -> List[Union[DnsResponse, DnsError]]:
+        """Run all questions concurrently; results (or DnsError) keep input order."""
+        results = await asyncio.gather(
+            *(self.query(server, name, qtype) for server, name, qtype in questions),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, DnsError):
+                raise result
+        return list(results)
+
+    def latency_report(self) -> Dict[str, dict]:
+        return {server: stats.as_dict() for server, stats in self.stats.items()}
+
+    def close(self) -> None:
+        for protocol in self._protocols.values():
+            if protocol.transport is not None:
+                protocol.transport.close()
+        self._protocols.clear()
+
+
+def qualify(host: str, domain: str) -> str:
+    """Append the environment domain to bare host labels."""
+    return host if "." in host else f"{host}.{domain}"
@@ -2,10 +2,19 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import os
+from dataclasses import asdict, dataclass
 from pathlib import Path
 import subprocess
 import platform
+from typing import Optional, Tuple
+
+BOOT_ID_PATH = Path("/proc/sys/kernel/random/boot_id")
+HOST_FACTS_FILE_NAME = "host-facts.json"
+KNOWN_HYPERVISORS = ["KVM", "QEMU", "VMware", "VirtualBox", "Bochs", "RHEV", "OpenStack", "Proxmox"]
+# Marker files container runtimes leave behind, checked before any subprocess
+CONTAINER_MARKERS = [(Path("/.dockerenv"), "docker"), (Path("/run/.containerenv"), "podman")]
 
 
 @dataclass
@@ -46,26 +55,59 @@ def _read_dmi_field(name: str) -> str | None:
         return None
 
 
+def _cpu_has_hypervisor_flag(cpuinfo: Path = Path("/proc/cpuinfo")) -> bool:
+    """Check the first CPU's flags for ``hypervisor``, reading no further than that line."""
+    try:
+        with cpuinfo.open(encoding="utf-8", errors="replace") as lines:
+            for line in lines:
+                key, sep, value = line.partition(":")
+                if sep and key.strip() in ("flags", "Features"):  # x86, arm
+                    return "hypervisor" in value.split()
+    except OSError:
+        return False
+    return False
+
+
+def _container_type() -> str | None:
+    try:
+        # Written by systemd-nspawn, lxc and other systemd-aware runtimes
+        name = Path("/run/systemd/container").read_text(encoding="utf-8").strip()
+        if name:
+            return name
+    except OSError:
+        pass
+    for marker, name in CONTAINER_MARKERS:
+        if marker.exists():
+            return name
+    return None
+
+
 def detect_virtualization() -> VirtualizationInfo:
-    """Detect virtualization hints from systemd-detect-virt, DMI, and cpuinfo."""
-    systemd_type = _run_systemd_detect_virt()
-    if systemd_type and systemd_type != "none":
-        return VirtualizationInfo(is_virtualized=True, type=systemd_type)
+    """Detect containers and hypervisors from marker files, DMI and cpuinfo.
+
+    ``systemd-detect-virt`` is only run when the CPU reports a hypervisor
+    that DMI does not name.
+    """
+    container = _container_type()
+    if container:
+        return VirtualizationInfo(is_virtualized=True, type=container)
 
     product_name = _read_dmi_field("product_name") or ""
     sys_vendor = _read_dmi_field("sys_vendor") or ""
     dmi_hint = f"{product_name} {sys_vendor}".strip() or None
-    cpuinfo = Path("/proc/cpuinfo").read_text(encoding="utf-8")
-    has_hypervisor = "hypervisor" in cpuinfo
 
-    known = ["KVM", "QEMU", "VMware", "VirtualBox", "Bochs", "RHEV", "OpenStack", "Proxmox"]
     vm_type = None
-    for name in known:
+    for name in KNOWN_HYPERVISORS:
         if name.lower() in (product_name + sys_vendor).lower():
             vm_type = name.lower()
             break
+    has_hypervisor = vm_type is not None or _cpu_has_hypervisor_flag()
+    if has_hypervisor and vm_type is None:
+        systemd_type = _run_systemd_detect_virt()
+        if systemd_type and systemd_type != "none":
+            vm_type = systemd_type
     return VirtualizationInfo(
-        is_virtualized=has_hypervisor or bool(vm_type),
+        is_virtualized=has_hypervisor,
         type=vm_type,
         hint=dmi_hint,
     )
@@ -74,18 +116,53 @@ def detect_virtualization() -> VirtualizationInfo:
 def _run_systemd_detect_virt() -> str | None:
     try:
         result = subprocess.run(
-            ["systemd-detect-virt", "--quiet", "--json=short"],
+            ["systemd-detect-virt"],
             check=False,
             capture_output=True,
             text=True,
             timeout=2,
         )
         if result.returncode == 0 and result.stdout:
-            # Expecting a simple JSON string like "kvm"
-            return result.stdout.strip().strip('"')
+            # Prints a single identifier such as "kvm"
+            return result.stdout.strip()
         if result.returncode == 1:
             return "none"
     except (FileNotFoundError, subprocess.SubprocessError, OSError):
         return None
     return None
 
+
+def _boot_id() -> str | None:
+    try:
+        return BOOT_ID_PATH.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def host_facts(cache_path: Optional[Path] = None) -> Tuple[OSInfo, VirtualizationInfo]:
+    """OS and virtualization facts, cached in ``cache_path`` for the current boot.
+
+    Neither can change without a reboot, so the cache is keyed by the
+    kernel's boot_id; hosts without one are detected on every call.
+    """
+    boot_id = _boot_id() if cache_path is not None else None
+    if boot_id is not None:
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if cached.get("boot_id") == boot_id:
+                return OSInfo(**cached["os"]), VirtualizationInfo(**cached["virtualization"])
+        except (OSError, ValueError, TypeError, KeyError):
+            pass  # missing or stale format: detect again
+
+    os_info = detect_os()
+    virt_info = detect_virtualization()
+    if boot_id is not None:
+        payload = {"boot_id": boot_id, "os": asdict(os_info), "virtualization": asdict(virt_info)}
+        tmp = cache_path.with_name(f".{cache_path.name}.{os.getpid()}")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp, cache_path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    return os_info, virt_info
@@ -0,0 +1,222 @@
+"""OpenMetrics exporter for ``serve``: background refresh, O(1) scrapes.
+
+Collectors run on their own threads and schedules; after each refresh the
+whole exposition is rendered once into bytes. A scrape only reads that
+reference, so it never probes anything and never waits on a refresh.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+VM_STATES = ("healthy", "degraded", "stopped")
+
+logger = logging.getLogger("py-cli-tool")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _seconds(ms: float) -> float:
+    return round(ms / 1000, 6)
+
+
+class _Family:
+    """One metric family: metadata lines followed by its samples."""
+
+    def __init__(self, name: str, kind: str, help: str, unit: str = "") -> None:
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.unit = unit
+        self.samples: List[Tuple[str, Dict[str, str], float]] = []
+
+    def add(self, value: float, suffix: str = "", **labels: str) -> None:
+        self.samples.append((suffix, labels, value))
+
+    def lines(self) -> List[str]:
+        lines = [f"# TYPE {self.name} {self.kind}"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.extend(
+            f"{self.name}{suffix}{_labels(labels)} {_number(value)}" for suffix, labels, value in self.samples
+        )
+        return lines
+
+
+@dataclass
+class Refresh:
+    """Bookkeeping for one collector's most recent run."""
+
+    value: Any = None
+    finished_at: Optional[float] = None
+    duration: float = 0.0
+    failures: int = 0
+    error: Optional[str] = None
+
+
+def _vm_families(vms: List[dict]) -> List[_Family]:
+    status = _Family("homelab_vm_status", "stateset", "Latest health status of each VM.")
+    rtt = _Family("homelab_probe_rtt_seconds", "gauge", "Round-trip time of the latest probe samples.", "seconds")
+    loss = _Family("homelab_probe_loss_ratio", "gauge", "Fraction of the latest probe samples that failed.")
+    jitter = _Family("homelab_probe_jitter_seconds", "gauge", "Mean change between consecutive RTTs.", "seconds")
+    for vm in vms:
+        states = VM_STATES if vm["status"] in VM_STATES else (*VM_STATES, vm["status"])
+        for state in states:
+            status.add(int(vm["status"] == state), vm=vm["name"], homelab_vm_status=state)
+        for probe, stats in vm.get("probes", {}).items():
+            labels = {"vm": vm["name"], "probe": probe}
+            loss.add(round(stats["loss_pct"] / 100, 4), **labels)
+            for stat in ("min", "avg", "p95", "max"):
+                if f"{stat}_ms" in stats:
+                    rtt.add(_seconds(stats[f"{stat}_ms"]), **labels, stat=stat)
+            if "jitter_ms" in stats:
+                jitter.add(_seconds(stats["jitter_ms"]), **labels)
+    return [status, rtt, loss, jitter]
+
+
+def _net_families(report: dict) -> List[_Family]:
+    dns_failures = _Family("homelab_dns_failures", "gauge", "DNS lookups that failed or returned unexpected records.")
+    dns_failures.add(len(report["dns_failures"]))
+    server_rtt = _Family("homelab_dns_server_rtt_seconds", "gauge", "Average DNS server response time.", "seconds")
+    server_failed = _Family("homelab_dns_server_failed_queries", "gauge", "DNS queries a server did not answer.")
+    for server, stats in report["dns_server_latency"].items():
+        if "avg_ms" in stats:
+            server_rtt.add(_seconds(stats["avg_ms"]), server=server)
+        server_failed.add(stats["failures"], server=server)
+    warnings = _Family("homelab_subnet_warnings", "gauge", "Configured subnets without a local interface or misplaced hosts.")
+    warnings.add(len(report["subnet_warnings"]))
+    unmatched = _Family("homelab_unmatched_addresses", "gauge", "Addresses outside every configured network.")
+    unmatched.add(len(report["unmatched_addresses"]))
+    external = _Family("homelab_external_up", "gauge", "Whether the external connectivity check succeeded.")
+    external.add(int(report["external_connectivity_error"] is None))
+    return [dns_failures, server_rtt, server_failed, warnings, unmatched, external]
+
+
+def render(refreshes: Dict[str, Refresh]) -> bytes:
+    """The full exposition for the latest ``vms`` and ``net`` values."""
+    families: List[_Family] = []
+    vms = refreshes.get("vms")
+    if vms is not None and vms.value is not None:
+        families += _vm_families(vms.value)
+    net = refreshes.get("net")
+    if net is not None and net.value is not None:
+        families += _net_families(net.value)
+
+    finished = _Family("homelab_refresh_timestamp_seconds", "gauge", "When each collector last finished.", "seconds")
+    duration = _Family("homelab_refresh_duration_seconds", "gauge", "How long each collector's last run took.", "seconds")
+    failures = _Family("homelab_refresh_failures", "counter", "Collector runs that raised an error.")
+    for name, refresh in refreshes.items():
+        if refresh.finished_at is not None:
+            finished.add(round(refresh.finished_at, 3), collector=name)
+            duration.add(round(refresh.duration, 6), collector=name)
+        failures.add(refresh.failures, "_total", collector=name)
+    families += [finished, duration, failures]
+
+    lines = [line for family in families for line in family.lines()]
+    lines.append("# EOF")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class Snapshot:
+    """The latest rendered exposition; ``body`` is replaced whole, never mutated."""
+
+    def __init__(self, collectors: List[str]) -> None:
+        self._lock = threading.Lock()
+        self.refreshes: Dict[str, Refresh] = {name: Refresh() for name in collectors}
+        self.body = render(self.refreshes)
+
+    def update(self, name: str, value: Any, duration: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            refresh = self.refreshes[name]
+            refresh.finished_at = time.time()
+            refresh.duration = duration
+            refresh.error = error
+            if error is None:
+                refresh.value = value
+            else:
+                refresh.failures += 1  # keep serving the last good value
+            self.body = render(self.refreshes)
+
+
+class Refresher(threading.Thread):
+    """Run ``collect`` every ``interval`` seconds and publish into ``snapshot``."""
+
+    def __init__(self, name: str, collect: Callable[[], Any], interval: float, snapshot: Snapshot) -> None:
+        super().__init__(name=f"refresh-{name}", daemon=True)
+        self.collector = name
+        self.collect = collect
+        self.interval = interval
+        self.snapshot = snapshot
+        self.stopped = threading.Event()
+
+    def refresh(self) -> None:
+        start = time.perf_counter()
+        try:
+            value = self.collect()
+        except Exception as exc:  # one failed refresh must not end the exporter
+            logger.warning("Refresh of %s failed: %s", self.collector, exc)
+            self.snapshot.update(self.collector, None, time.perf_counter() - start, str(exc) or type(exc).__name__)
+        else:
+            self.snapshot.update(self.collector, value, time.perf_counter() - start)
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            self.refresh()
+            self.stopped.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._reply(200, CONTENT_TYPE, self.server.snapshot.body)
+        elif path == "/":
+            self._reply(200, "text/plain; charset=utf-8", b"homelab-cli exporter: see /metrics\n")
+        else:
+            self._reply(404, "text/plain; charset=utf-8", b"not found\n")
+
+    def _reply(self, code: int, content_type: str, body: bytes) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], snapshot: Snapshot) -> None:
+        super().__init__(address, _MetricsHandler)
+        self.snapshot = snapshot
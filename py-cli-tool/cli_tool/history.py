@@ -0,0 +1,271 @@
+"""Append-only run history with availability, percentile and flap queries."""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from cli_tool.state_provider import GUEST_STOPPED
+
+HISTORY_FILE_NAME = "history.sqlite"
+
+STATUS_DOWN = 0
+STATUS_UP = 1
+STATUS_STOPPED = 2  # known to be powered off; excluded from availability
+
+PERCENTILES = (50, 95, 99)
+
+# Latencies are also kept as log-scale buckets (2% wide), so percentiles
+# come from per-bucket counts instead of sorting every sample.
+BUCKET_GROWTH = 1.02
+
+# Targets are stored once and samples refer to them by id. Samples are
+# clustered on (target_id, ts) (WITHOUT ROWID), so a time window for one
+# target is a single contiguous range read. ``changed`` marks a status
+# flip relative to the target's previous up/down sample, worked out when
+# the sample is written.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    last_status INTEGER,
+    UNIQUE (kind, name)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    target_id INTEGER NOT NULL REFERENCES targets (id),
+    ts INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    latency_ms REAL,
+    bucket INTEGER,
+    PRIMARY KEY (target_id, ts)
+) WITHOUT ROWID;
+"""
+
+
+def latency_bucket(latency_ms: float) -> int:
+    """Log-scale bucket of a latency; bucket ``b`` covers about ``BUCKET_GROWTH ** b`` microseconds."""
+    return max(0, round(math.log(max(latency_ms, 0.001) * 1000, BUCKET_GROWTH)))
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative latency in ms for a bucket (within 1% of any sample in it)."""
+    return BUCKET_GROWTH**bucket / 1000
+
+
+@dataclass
+class Sample:
+    kind: str  # "vm", "dns", "dns-server", "tcp"
+    target: str
+    status: int
+    latency_ms: Optional[float] = None
+
+
+@dataclass
+class TargetSummary:
+    kind: str
+    target: str
+    samples: int
+    up: int
+    down: int
+    flaps: int
+    percentiles: Dict[str, float]
+    last_status: int
+    last_seen: float
+
+    @property
+    def availability(self) -> Optional[float]:
+        probed = self.up + self.down
+        return round(100.0 * self.up / probed, 2) if probed else None
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "target": self.target,
+            "samples": self.samples,
+            "availability_pct": self.availability,
+            "latency_ms": self.percentiles,
+            "flaps": self.flaps,
+            "last_status": {STATUS_DOWN: "down", STATUS_UP: "up", STATUS_STOPPED: "stopped"}[self.last_status],
+            "last_seen": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.last_seen)),
+        }
+
+
+class HistoryStore:
+    """SQLite store of probe samples; one row per target per run."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(str(path), timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._targets: Dict[tuple, List] = {}
+
+    def _target(self, kind: str, name: str) -> List:
+        """``[id, last up/down status]`` for a target, creating it on first use."""
+        key = (kind, name)
+        if key not in self._targets:
+            self._conn.execute("INSERT OR IGNORE INTO targets (kind, name) VALUES (?, ?)", key)
+            row = self._conn.execute(
+                "SELECT id, last_status FROM targets WHERE kind = ? AND name = ?", key
+            ).fetchone()
+            self._targets[key] = list(row)
+        return self._targets[key]
+
+    def append(self, samples: Iterable[Sample], at: Optional[float] = None) -> int:
+        """Record one run's samples under a single millisecond timestamp.
+
+        A second sample for the same target in the same millisecond replaces
+        the first. Returns the number of rows written.
+        """
+        ts = int((time.time() if at is None else at) * 1000)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = []
+            touched = {}
+            for sample in samples:
+                target = self._target(sample.kind, sample.target)
+                changed = 0
+                if sample.status != STATUS_STOPPED:
+                    changed = int(target[1] is not None and target[1] != sample.status)
+                    target[1] = sample.status
+                    touched[target[0]] = sample.status
+                bucket = None if sample.latency_ms is None else latency_bucket(sample.latency_ms)
+                rows.append((target[0], ts, sample.status, changed, sample.latency_ms, bucket))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO samples (target_id, ts, status, changed, latency_ms, bucket) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                "UPDATE targets SET last_status = ? WHERE id = ?",
+                [(status, target_id) for target_id, status in touched.items()],
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            # Cached statuses may now be ahead of the database
+            self._targets.clear()
+            raise
+        self._conn.execute("COMMIT")
+        return len(rows)
+
+    def _matching_targets(self, kinds: Sequence[str], names: Sequence[str]) -> List[tuple]:
+        query = "SELECT id, kind, name FROM targets"
+        clauses, params = [], []
+        if kinds:
+            clauses.append(f"kind IN ({','.join('?' * len(kinds))})")
+            params.extend(kinds)
+        if names:
+            clauses.append("(" + " OR ".join("name GLOB ?" for _ in names) + ")")
+            params.extend(names)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return self._conn.execute(query + " ORDER BY kind, name", params).fetchall()
+
+    def summarize(
+        self,
+        since: float,
+        until: Optional[float] = None,
+        kinds: Sequence[str] = (),
+        names: Sequence[str] = (),
+    ) -> List[TargetSummary]:
+        """Per-target availability, latency percentiles and flaps in ``[since, until)``.
+
+        Two GROUP BY range scans over the (target_id, ts) key do all the
+        work inside SQLite: one for counts and flaps, one for latency
+        bucket counts. Percentiles are nearest-rank over the buckets.
+        """
+        until = time.time() if until is None else until
+        targets = {row[0]: row[1:] for row in self._matching_targets(kinds, names)}
+        if not targets:
+            return []
+        self._conn.execute("DROP TABLE IF EXISTS temp.wanted")
+        self._conn.execute("CREATE TEMP TABLE wanted (id INTEGER PRIMARY KEY)")
+        self._conn.executemany("INSERT INTO temp.wanted VALUES (?)", [(tid,) for tid in targets])
+        # CROSS JOIN pins the loop order: walk the wanted ids, range-scan each
+        window = (
+            "FROM temp.wanted w CROSS JOIN samples s "
+            "ON s.target_id = w.id AND s.ts >= :since AND s.ts < :until"
+        )
+        bounds = {"since": int(since * 1000), "until": int(until * 1000)}
+
+        counts = self._conn.execute(
+            f"""
+            SELECT s.target_id, COUNT(*), SUM(s.status = {STATUS_UP}), SUM(s.status = {STATUS_DOWN}),
+                   SUM(s.changed), MAX(s.ts)
+            {window} GROUP BY s.target_id
+            """,
+            bounds,
+        ).fetchall()
+        histograms: Dict[int, List[tuple]] = {}
+        for target_id, bucket, count in self._conn.execute(
+            f"""
+            SELECT s.target_id, s.bucket, COUNT(*) {window}
+            WHERE s.bucket IS NOT NULL GROUP BY s.target_id, s.bucket ORDER BY s.target_id, s.bucket
+            """,
+            bounds,
+        ):
+            histograms.setdefault(target_id, []).append((bucket, count))
+
+        summaries = []
+        for target_id, total, up, down, flaps, last_ts in counts:
+            (last_status,) = self._conn.execute(
+                "SELECT status FROM samples WHERE target_id = ? AND ts = ?", (target_id, last_ts)
+            ).fetchone()
+            summaries.append(
+                TargetSummary(
+                    kind=targets[target_id][0],
+                    target=targets[target_id][1],
+                    samples=total,
+                    up=up or 0,
+                    down=down or 0,
+                    flaps=flaps or 0,
+                    percentiles=_percentiles(histograms.get(target_id, [])),
+                    last_status=last_status,
+                    last_seen=last_ts / 1000,
+                )
+            )
+        return sorted(summaries, key=lambda summary: (summary.kind, summary.target))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _percentiles(histogram: List[tuple]) -> Dict[str, float]:
+    """Nearest-rank percentiles from ``(bucket, count)`` pairs sorted by bucket."""
+    total = sum(count for _, count in histogram)
+    result: Dict[str, float] = {}
+    if not total:
+        return result
+    wanted = [(p, max(1, math.ceil(p * total / 100))) for p in PERCENTILES]
+    seen = 0
+    for bucket, count in histogram:
+        seen += count
+        while wanted and wanted[0][1] <= seen:
+            result[f"p{wanted.pop(0)[0]}"] = round(bucket_value(bucket), 3)
+    return result
+
+
+def vm_sample(record: Mapping[str, object]) -> Sample:
+    """Turn a ``HealthStatus.as_dict()`` record into a history sample."""
+    if record["status"] == GUEST_STOPPED:
+        status = STATUS_STOPPED
+    else:
+        status = STATUS_UP if record["status"] == "healthy" else STATUS_DOWN
+    # avg_ms is only present for probes that got at least one answer
+    probes = record.get("probes") or {}
+    latency = probes.get("ping", {}).get("avg_ms", probes.get("ssh", {}).get("avg_ms"))
+    return Sample("vm", str(record["name"]), status, latency)
@@ -0,0 +1,231 @@
+"""In-process ICMP echo (ping) without forking the ping binary."""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+_HEADER = struct.Struct("!BBHHH")
+_PAYLOAD = struct.Struct("!d")
+
+ProbeResult = Tuple[bool, Optional[str]]
+
+
+class IcmpUnavailable(OSError):
+    """Raised when neither an ICMP datagram nor a raw socket can be opened."""
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident: int, seq: int, v6: bool = False) -> bytes:
+    """Build an ICMP/ICMPv6 echo request carrying the send time as payload."""
+    icmp_type = ICMPV6_ECHO_REQUEST if v6 else ICMP_ECHO_REQUEST
+    payload = _PAYLOAD.pack(time.monotonic())
+    header = _HEADER.pack(icmp_type, 0, 0, ident, seq)
+    if v6:
+        # The kernel fills in the ICMPv6 checksum (it covers a pseudo-header)
+        return header + payload
+    checksum = _checksum(header + payload)
+    return _HEADER.pack(icmp_type, 0, checksum, ident, seq) + payload
+
+
+def _normalize(ip: str) -> str:
+    return ipaddress.ip_address(ip.split("%", 1)[0]).compressed
+
+
+class _EchoSocket:
+    """One ICMP socket for an address family, shared by all pending requests."""
+
+    def __init__(self, family: int, loop: asyncio.AbstractEventLoop) -> None:
+        self.family = family
+        self.v6 = family == socket.AF_INET6
+        proto = socket.IPPROTO_ICMPV6 if self.v6 else socket.IPPROTO_ICMP
+        try:
+            # Unprivileged "ping socket"; allowed by net.ipv4.ping_group_range
+            self.sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+            self.raw = False
+        except OSError:
+            try:
+                self.sock = socket.socket(family, socket.SOCK_RAW, proto)
+                self.raw = True
+            except OSError as exc:
+                raise IcmpUnavailable(f"cannot open ICMP socket: {exc}") from exc
+        self.sock.setblocking(False)
+        if self.raw:
+            self.ident = os.getpid() & 0xFFFF
+        else:
+            # The kernel rewrites the identifier to the socket's local "port"
+            self.sock.bind(("::" if self.v6 else "0.0.0.0", 0))
+            self.ident = self.sock.getsockname()[1]
+        self.loop = loop
+        self._seq = 0
+        self._pending: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Call ``listener`` with the source address of every echo reply for this socket."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str], None]) -> None:
+        self._listeners.remove(listener)
+
+    def next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                packet, addr = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            self._handle_packet(packet, addr[0])
+
+    def _handle_packet(self, packet: bytes, source: str) -> None:
+        if self.raw and not self.v6:
+            # Raw IPv4 sockets deliver the IP header as well
+            packet = packet[(packet[0] & 0x0F) * 4 :]
+        if len(packet) < _HEADER.size:
+            return
+        icmp_type, _, _, ident, seq = _HEADER.unpack_from(packet)
+        expected = ICMPV6_ECHO_REPLY if self.v6 else ICMP_ECHO_REPLY
+        if icmp_type != expected or ident != self.ident:
+            return
+        for listener in self._listeners:
+            listener(_normalize(source))
+        future = self._pending.pop((_normalize(source), seq), None)
+        if future is not None and not future.done():
+            future.set_result(self.loop.time())
+
+    async def echo(self, ip: str, timeout: float) -> float:
+        """Send one echo request and return the round-trip time in seconds."""
+        seq = self.next_seq()
+        key = (_normalize(ip), seq)
+        future = self.loop.create_future()
+        self._pending[key] = future
+        packet = build_echo_request(self.ident, seq, v6=self.v6)
+        try:
+            start = self.loop.time()
+            await self.loop.sock_sendto(self.sock, packet, (key[0], 0))
+            received_at = await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(key, None)
+        return received_at - start
+
+    async def send(self, ip: str) -> None:
+        """Send one echo request without waiting for its reply."""
+        packet = build_echo_request(self.ident, self.next_seq(), v6=self.v6)
+        await self.loop.sock_sendto(self.sock, packet, (_normalize(ip), 0))
+
+    def close(self) -> None:
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+
+class Pinger:
+    """Ping many hosts concurrently through one socket per address family.
+
+    Replies are matched to requests by source address and sequence number,
+    and filtered on the echo identifier owned by the socket.
+    """
+
+    def __init__(self) -> None:
+        self._sockets: Dict[int, _EchoSocket] = {}
+
+    def _socket_for(self, ip: str) -> _EchoSocket:
+        family = socket.AF_INET6 if ipaddress.ip_address(ip).version == 6 else socket.AF_INET
+        echo_socket = self._sockets.get(family)
+        if echo_socket is None:
+            echo_socket = _EchoSocket(family, asyncio.get_running_loop())
+            self._sockets[family] = echo_socket
+        return echo_socket
+
+    def check_available(self, ip: str) -> None:
+        """Open the socket for ``ip``'s family now; raises IcmpUnavailable if that fails."""
+        self._socket_for(ip)
+
+    async def ping(self, ip: str, timeout: float = 2) -> ProbeResult:
+        """Send one echo request; same ``(ok, err)`` contract as ``vm_health._ping``.
+
+        Raises IcmpUnavailable when no ICMP socket can be opened at all.
+        """
+        echo_socket = self._socket_for(ip)
+        try:
+            await echo_socket.echo(ip, timeout)
+        except asyncio.TimeoutError:
+            return False, "ping timed out"
+        except OSError as exc:
+            return False, str(exc)
+        return True, None
+
+    async def sweep(
+        self,
+        ips: Iterable[str],
+        timeout: float = 2,
+        pace: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Set[str]:
+        """Send one echo to every address and return those that answered.
+
+        Nothing is tracked per request: replies are collected by source
+        address until ``timeout`` after the last send, so a /16 costs one
+        packet per host and no futures. ``pace`` is awaited before each send.
+        """
+        targets = list(ips)
+        if not targets:
+            return set()
+        echo_socket = self._socket_for(targets[0])
+        wanted = {_normalize(ip) for ip in targets}
+        answered: Set[str] = set()
+
+        def _collect(source: str) -> None:
+            if source in wanted:
+                answered.add(source)
+
+        echo_socket.add_listener(_collect)
+        try:
+            for ip in targets:
+                if pace is not None:
+                    await pace()
+                try:
+                    await echo_socket.send(ip)
+                except OSError:
+                    continue  # unreachable routes and the like: just no reply
+            await asyncio.sleep(timeout)
+        finally:
+            echo_socket.remove_listener(_collect)
+        return answered
+
+    async def ping_many(self, ips: Iterable[str], timeout: float = 2) -> Dict[str, ProbeResult]:
+        """Ping every address at once and return results keyed by address."""
+        targets: List[str] = list(dict.fromkeys(ips))
+        results = await asyncio.gather(*(self.ping(ip, timeout) for ip in targets))
+        return dict(zip(targets, results))
+
+    def close(self) -> None:
+        for echo_socket in self._sockets.values():
+            echo_socket.close()
+        self._sockets.clear()
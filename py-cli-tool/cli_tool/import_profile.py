@@ -0,0 +1,76 @@
+"""Per-module import cost report for ``--import-profile``."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+REPORT_LIMIT = 25
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> Tuple[List[ImportRecord], List[str]]:
+    """Split ``-X importtime`` output into records and the remaining stderr lines."""
+    records: List[ImportRecord] = []
+    other: List[str] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            other.append(line)
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # column header
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                module=stripped,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records, other
+
+
+def format_report(records: List[ImportRecord], limit: int = REPORT_LIMIT) -> str:
+    total_us = sum(r.cumulative_us for r in records if r.depth == 0)
+    lines = [f"import profile: {len(records)} modules, {total_us / 1000:.1f} ms total"]
+    lines.append(f"  {'self ms':>8} {'cumul ms':>9}  module")
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:limit]:
+        lines.append(f"  {record.self_us / 1000:8.1f} {record.cumulative_us / 1000:9.1f}  {record.module}")
+    return "\n".join(lines)
+
+
+def profile_imports(argv: List[str]) -> int:
+    """Re-run the CLI with ``-X importtime`` and print a cost report to stderr.
+
+    Re-executing is the only way to see the imports that happen before
+    argument parsing, which are exactly the ones that dominate cold start.
+    """
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME="1")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PACKAGE_ROOT), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-m", "cli_tool.main", *argv],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+    records, other = parse_importtime(proc.stderr)
+    for line in other:
+        print(line, file=sys.stderr)
+    print(format_report(records), file=sys.stderr)
+    return proc.returncode
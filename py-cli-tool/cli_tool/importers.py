@@ -0,0 +1,357 @@
+"""Streaming importers for dnsmasq and Ansible host sources.
+
+Each ``iter_*`` function reads its source one line (or one YAML event) at
+a time and yields ``ImportedHost`` records, so a 100k-line lease file is
+never held as text or a parsed tree, only as merged hosts.
+``merge_hosts`` folds records from several sources into one host per
+name, and ``to_vm`` maps a host onto the configured networks as a
+``VMDefinition``.
+"""
+
+from __future__ import annotations
+
+import re
+import shlex
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cli_tool.config import RootConfig, VMDefinition, VMNetwork
+from cli_tool.defaults import DEFAULT_IMPORT_ROLE
+from cli_tool.subnet_index import SubnetIndex, parse_ip
+
+SOURCE_DNSMASQ = "dnsmasq"
+SOURCE_LEASES = "leases"
+SOURCE_ANSIBLE = "ansible"
+
+_MAC = re.compile(r"^([0-9a-fA-F*]{1,2}[:-]){5}[0-9a-fA-F*]{1,2}$")
+_LEASE_TIME = re.compile(r"^(\d+[smhdw]?|infinite)$")
+_HOST_RANGE = re.compile(r"\[(\d+):(\d+)\]")
+# Groups every Ansible host belongs to; they say nothing about its role
+_IMPLICIT_GROUPS = {"all", "ungrouped"}
+
+
+@dataclass
+class ImportedHost:
+    name: str  # short name, lower case
+    ip: Optional[str] = None
+    fqdn: Optional[str] = None
+    mac: Optional[str] = None
+    groups: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        data: Dict[str, Any] = {"name": self.name, "ip": self.ip, "fqdn": self.fqdn, "sources": self.sources}
+        if self.mac:
+            data["mac"] = self.mac
+        if self.groups:
+            data["groups"] = self.groups
+        return data
+
+
+def _is_ip(text: str) -> bool:
+    # Names cannot pass for addresses unless they start with a digit or hold a colon
+    if not text or not (text[0].isdigit() or ":" in text):
+        return False
+    try:
+        parse_ip(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _host(name: str, ip: Optional[str], source: str, **extra: Any) -> Optional[ImportedHost]:
+    name = name.strip().rstrip(".").lower()
+    # Hosts listed only by address have no name to give the VM
+    if not name or name == "*" or _is_ip(name):
+        return None
+    short, dot, _ = name.partition(".")
+    return ImportedHost(name=short, ip=ip, fqdn=name if dot else None, sources=[source], **extra)
+
+
+# -- dnsmasq --------------------------------------------------------------------
+
+
+def _dhcp_host(value: str) -> Optional[ImportedHost]:
+    """``dhcp-host=[<hwaddr>...][,id:..][,set:..][,<ipaddr>][,<hostname>][,<lease_time>][,ignore]``."""
+    mac = ip = name = None
+    for part in value.split(","):
+        part = part.strip()
+        if not part or part == "ignore" or part.startswith(("id:", "set:", "tag:", "[")):
+            continue
+        if _MAC.match(part):
+            mac = mac or part.lower()
+        elif _is_ip(part):
+            ip = ip or part
+        elif _LEASE_TIME.match(part):
+            continue
+        else:
+            name = part
+    if name is None:
+        return None
+    return _host(name, ip, SOURCE_DNSMASQ, mac=mac)
+
+
+def iter_dnsmasq_config(lines: Iterable[str], domain: Optional[str] = None) -> Iterator[ImportedHost]:
+    """Hosts from ``dhcp-host``, ``host-record`` and ``address=/name/ip`` lines.
+
+    Short ``dhcp-host`` names are qualified with the ``domain=`` seen so far;
+    ``address`` entries naming that domain itself are wildcards, not hosts.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == "#" or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        key = key.strip()
+        if key == "domain":
+            domain = value.split(",", 1)[0].strip().lower()
+        elif key == "dhcp-host":
+            host = _dhcp_host(value)
+            if host is not None:
+                if host.fqdn is None and domain:
+                    host.fqdn = f"{host.name}.{domain}"
+                yield host
+        elif key == "host-record":
+            fields = [part.strip() for part in value.split(",")]
+            names = [part for part in fields if part and not _is_ip(part) and not part.isdigit()]
+            ips = [part for part in fields if _is_ip(part)]
+            ipv4 = next((ip for ip in ips if ":" not in ip), None)
+            if names:
+                host = _host(names[0], ipv4 or (ips[0] if ips else None), SOURCE_DNSMASQ)
+                if host is not None:
+                    yield host
+        elif key == "address":
+            parts = value.split("/")
+            if len(parts) >= 3 and _is_ip(parts[-1]):
+                for name in parts[1:-1]:
+                    if name and name.lower() != domain:
+                        host = _host(name, parts[-1], SOURCE_DNSMASQ)
+                        if host is not None:
+                            yield host
+
+
+def iter_dnsmasq_leases(lines: Iterable[str]) -> Iterator[ImportedHost]:
+    """Hosts from a dnsmasq lease file: ``<expiry> <mac> <ip> <hostname> <client-id>``.
+
+    Leases without a client-supplied hostname (``*``) are skipped.
+    """
+    # The hot path of a large import, so ``_host`` is inlined: dnsmasq only
+    # records names that clients sent, never bare addresses. The ``duid``
+    # line has two fields and falls through the length check.
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        name = fields[3].lower()
+        if name == "*":
+            continue
+        short, dot, _ = name.partition(".")
+        yield ImportedHost(short, fields[2], name if dot else None, fields[1].lower(), [], [SOURCE_LEASES])
+
+
+# -- Ansible --------------------------------------------------------------------
+
+
+def _expand_range(pattern: str) -> List[str]:
+    """``web[01:03]`` -> ``web01``, ``web02``, ``web03`` (one numeric range)."""
+    match = _HOST_RANGE.search(pattern)
+    if match is None:
+        return [pattern]
+    start, end = match.group(1), match.group(2)
+    width = len(start) if start.startswith("0") else 0
+    return [
+        f"{pattern[: match.start()]}{str(number).zfill(width)}{pattern[match.end():]}"
+        for number in range(int(start), int(end) + 1)
+    ]
+
+
+def _ansible_host(name: str, variables: Dict[str, Any], group: Optional[str]) -> Iterator[ImportedHost]:
+    address = variables.get("ansible_host")
+    for expanded in _expand_range(name):
+        ip = str(address) if address is not None else (expanded if _is_ip(expanded) else None)
+        host = _host(expanded, ip, SOURCE_ANSIBLE)
+        if host is None:
+            continue
+        if address is not None and not _is_ip(str(address)):
+            host.fqdn = host.fqdn or str(address).lower()
+            host.ip = None
+        if group and group not in _IMPLICIT_GROUPS:
+            host.groups.append(group)
+        yield host
+
+
+def iter_ansible_ini(lines: Iterable[str]) -> Iterator[ImportedHost]:
+    """Hosts from an INI inventory, one per host line and group."""
+    group: Optional[str] = "ungrouped"
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line[0] == "[" and line.endswith("]"):
+            section = line[1:-1]
+            # [group:vars] and [group:children] hold no host lines
+            group = None if ":" in section else section
+            continue
+        if group is None:
+            continue
+        fields = shlex.split(line, comments=True) if any(ch in line for ch in "'\"#") else line.split()
+        if not fields:
+            continue
+        variables = dict(field.split("=", 1) for field in fields[1:] if "=" in field)
+        yield from _ansible_host(fields[0], variables, group)
+
+
+_MAPPING = object()
+
+
+def _yaml_leaves(stream: IO[str]) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """``(key path, value)`` for every scalar in a YAML stream, from parser events.
+
+    Mapping starts are reported too, with ``_MAPPING`` as the value, so
+    empty mappings (``host: {}``) still surface their key.
+    """
+    import yaml
+    from yaml.events import (
+        AliasEvent,
+        CollectionEndEvent,
+        MappingStartEvent,
+        ScalarEvent,
+        SequenceStartEvent,
+    )
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    stack: List[List[Any]] = []  # [is_mapping, current key or sequence index]
+
+    def _path() -> Tuple[str, ...]:
+        return tuple(str(frame[1]) for frame in stack)
+
+    def _advance() -> None:
+        if stack:
+            if stack[-1][0]:
+                stack[-1][1] = None
+            else:
+                stack[-1][1] += 1
+
+    for event in yaml.parse(stream, Loader=loader):
+        if isinstance(event, ScalarEvent):
+            if stack and stack[-1][0] and stack[-1][1] is None:
+                stack[-1][1] = event.value
+                continue
+            plain_null = event.implicit[0] and event.value in ("", "~", "null", "Null", "NULL")
+            yield _path(), None if plain_null else event.value
+            _advance()
+        elif isinstance(event, AliasEvent):
+            yield _path(), None
+            _advance()
+        elif isinstance(event, MappingStartEvent):
+            if stack:
+                yield _path(), _MAPPING
+            stack.append([True, None])
+        elif isinstance(event, SequenceStartEvent):
+            stack.append([False, 0])
+        elif isinstance(event, CollectionEndEvent):
+            stack.pop()
+            _advance()
+
+
+def _host_key(path: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+    """The ``(..., group, "hosts", host)`` prefix of ``path``, if it is inside a host entry."""
+    for idx in range(1, len(path) - 1):
+        if path[idx] == "hosts" and (idx == 1 or path[idx - 2] == "children"):
+            return path[: idx + 2]
+    return None
+
+
+def iter_ansible_yaml(stream: IO[str]) -> Iterator[ImportedHost]:
+    """Hosts from a YAML inventory (``all: {hosts: ..., children: ...}``), one per host entry."""
+    current: Optional[Tuple[str, ...]] = None
+    variables: Dict[str, Any] = {}
+    for path, value in _yaml_leaves(stream):
+        key = _host_key(path)
+        if key != current:
+            if current is not None:
+                yield from _ansible_host(current[-1], variables, current[-3])
+            current, variables = key, {}
+        if key is not None and len(path) == len(key) + 1 and value is not _MAPPING:
+            variables[path[-1]] = value
+    if current is not None:
+        yield from _ansible_host(current[-1], variables, current[-3])
+
+
+def iter_source(kind: str, path: Path) -> Iterator[ImportedHost]:
+    """Stream hosts from ``path``; Ansible inventories are told apart by extension."""
+    with path.open(encoding="utf-8", errors="replace") as fh:
+        if kind == SOURCE_DNSMASQ:
+            yield from iter_dnsmasq_config(fh)
+        elif kind == SOURCE_LEASES:
+            yield from iter_dnsmasq_leases(fh)
+        elif path.suffix in (".yaml", ".yml"):
+            yield from iter_ansible_yaml(fh)
+        else:
+            yield from iter_ansible_ini(fh)
+
+
+# -- merging and mapping ----------------------------------------------------------
+
+
+def merge_hosts(records: Iterable[ImportedHost]) -> Tuple[Dict[str, ImportedHost], List[str]]:
+    """One host per short name; earlier sources win on conflicting addresses.
+
+    Returns the hosts in first-seen order and a list of conflicts.
+    """
+    hosts: Dict[str, ImportedHost] = {}
+    conflicts: List[str] = []
+    for record in records:
+        host = hosts.get(record.name)
+        if host is None:
+            hosts[record.name] = record
+            continue
+        if record.ip and host.ip and record.ip != host.ip:
+            conflicts.append(f"{record.name}: {record.sources[0]} says {record.ip}, keeping {host.ip}")
+        host.ip = host.ip or record.ip
+        host.fqdn = host.fqdn or record.fqdn
+        host.mac = host.mac or record.mac
+        host.groups.extend(group for group in record.groups if group not in host.groups)
+        if record.sources[0] not in host.sources:
+            host.sources.append(record.sources[0])
+    return hosts, conflicts
+
+
+def to_vm(
+    host: ImportedHost, config: RootConfig, index: SubnetIndex, role: str = DEFAULT_IMPORT_ROLE
+) -> Tuple[Optional[VMDefinition], Optional[str]]:
+    """The host as a VM on its configured network, or None and the reason it cannot be."""
+    if not host.ip:
+        return None, f"{host.name}: no address"
+    network = index.lookup(host.ip)
+    if network is None:
+        return None, f"{host.name}: {host.ip} is outside every configured network"
+    defaults = config.defaults
+    return (
+        VMDefinition(
+            name=host.name,
+            hostname=host.fqdn or f"{host.name}.{config.environment.domain}",
+            role=host.groups[0] if host.groups else role,
+            os_family=defaults.vm_os_family or "unknown",
+            os_version=defaults.vm_os_version,
+            machine_type="vm",
+            networks=[VMNetwork(name=network, ip=host.ip)],
+            checks=defaults.vm_checks,
+        ),
+        None,
+    )
+
+
+def vm_entry(vm: VMDefinition, config: RootConfig) -> dict:
+    """``vm`` as a ``vms`` list entry, leaving out whatever the defaults supply."""
+    entry: Dict[str, Any] = {
+        "name": vm.name,
+        "hostname": vm.hostname,
+        "role": vm.role,
+        "machine_type": vm.machine_type,
+        "networks": [{"name": attachment.name, "ip": attachment.ip} for attachment in vm.networks],
+    }
+    if not config.defaults.vm_os_family:
+        entry["os"] = {"family": vm.os_family}
+    return entry
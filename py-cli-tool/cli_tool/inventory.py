@@ -0,0 +1,129 @@
+"""Indexed view of the VM inventory for constant-time lookups and selection."""
+
+from __future__ import annotations
+
+import fnmatch
+import ipaddress
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+if TYPE_CHECKING:
+    from cli_tool.config import VMDefinition
+
+_GLOB_CHARS = set("*?[")
+
+
+def _normalize_ip(ip: str) -> str:
+    # A valid IPv4 literal is already in compressed form; anything else
+    # without a colon is returned unchanged by the fallback below anyway
+    if ":" not in ip:
+        return ip
+    try:
+        return ipaddress.ip_address(ip).compressed
+    except ValueError:
+        return ip
+
+
+class Inventory:
+    """Indexes VMs by name, hostname, IP, network, role and machine type.
+
+    Built once per config load; every lookup after that is a dict access,
+    and selections return VMs in config order.
+    """
+
+    def __init__(self, vms: Iterable["VMDefinition"]) -> None:
+        self.vms: List["VMDefinition"] = list(vms)
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_hostname: Dict[str, int] = {}
+        self._by_ip: Dict[str, int] = {}
+        self._by_network: Dict[str, List[int]] = {}
+        self._by_role: Dict[str, List[int]] = {}
+        self._by_machine_type: Dict[str, List[int]] = {}
+        for idx, vm in enumerate(self.vms):
+            self._by_name.setdefault(vm.name.lower(), []).append(idx)
+            # First definition wins, matching a linear scan over the config
+            self._by_hostname.setdefault(vm.hostname.lower(), idx)
+            for attachment in vm.networks:
+                self._by_ip.setdefault(_normalize_ip(attachment.ip), idx)
+                group = self._by_network.setdefault(attachment.name, [])
+                if not group or group[-1] != idx:
+                    group.append(idx)
+            self._by_role.setdefault(vm.role, []).append(idx)
+            self._by_machine_type.setdefault(vm.machine_type, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self.vms)
+
+    def by_name(self, name: str) -> Optional["VMDefinition"]:
+        """First VM with this name; select(names=...) returns every duplicate."""
+        members = self._by_name.get(name.lower())
+        return self.vms[members[0]] if members else None
+
+    def by_hostname(self, hostname: str) -> Optional["VMDefinition"]:
+        idx = self._by_hostname.get(hostname.lower())
+        return None if idx is None else self.vms[idx]
+
+    def by_ip(self, ip: str) -> Optional["VMDefinition"]:
+        idx = self._by_ip.get(_normalize_ip(ip))
+        return None if idx is None else self.vms[idx]
+
+    def in_network(self, network: str) -> List["VMDefinition"]:
+        return [self.vms[idx] for idx in self._by_network.get(network, [])]
+
+    def with_role(self, role: str) -> List["VMDefinition"]:
+        return [self.vms[idx] for idx in self._by_role.get(role, [])]
+
+    def of_machine_type(self, machine_type: str) -> List["VMDefinition"]:
+        return [self.vms[idx] for idx in self._by_machine_type.get(machine_type, [])]
+
+    def groups(self, key: str) -> Dict[str, List["VMDefinition"]]:
+        """Group VMs by ``network``, ``role`` or ``machine_type``."""
+        index = {
+            "network": self._by_network,
+            "role": self._by_role,
+            "machine_type": self._by_machine_type,
+        }[key]
+        return {value: [self.vms[idx] for idx in members] for value, members in index.items()}
+
+    def _match_names(self, patterns: Iterable[str]) -> Set[int]:
+        matched: Set[int] = set()
+        for pattern in patterns:
+            lowered = pattern.lower()
+            if _GLOB_CHARS & set(lowered):
+                for name in fnmatch.filter(self._by_name, lowered):
+                    matched.update(self._by_name[name])
+            else:
+                matched.update(self._by_name.get(lowered, ()))
+        return matched
+
+    @staticmethod
+    def _match_values(index: Dict[str, List[int]], values: Iterable[str]) -> Set[int]:
+        matched: Set[int] = set()
+        for value in values:
+            matched.update(index.get(value, ()))
+        return matched
+
+    def select(
+        self,
+        names: Optional[Iterable[str]] = None,
+        roles: Optional[Iterable[str]] = None,
+        networks: Optional[Iterable[str]] = None,
+        machine_types: Optional[Iterable[str]] = None,
+    ) -> List["VMDefinition"]:
+        """Return VMs matching every given selector, in config order.
+
+        Each selector matches any of its values; names accept shell-style
+        globs (``k3s-*``) and compare case-insensitively.
+        """
+        selected: Optional[Set[int]] = None
+        for matched in (
+            self._match_names(names) if names else None,
+            self._match_values(self._by_role, roles) if roles else None,
+            self._match_values(self._by_network, networks) if networks else None,
+            self._match_values(self._by_machine_type, machine_types) if machine_types else None,
+        ):
+            if matched is None:
+                continue
+            selected = matched if selected is None else selected & matched
+        if selected is None:
+            return list(self.vms)
+        return [self.vms[idx] for idx in sorted(selected)]
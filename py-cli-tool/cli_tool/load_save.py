@@ -1,10 +1,38 @@
 """Module for managing loading and saving of YAML an JSON configuration files"""
 
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from pathlib import Path
+import hashlib
 import logging
 import json
+import os
 import yaml
+from yaml.events import (
+    AliasEvent,
+    CollectionStartEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+)
+from yaml.nodes import ScalarNode
+
+# libyaml's parser when PyYAML was built with it
+_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_RESOLVER = yaml.resolver.Resolver()
+_CONSTRUCTOR = yaml.constructor.SafeConstructor()
+_TAG = "tag:yaml.org,2002:"
+_TYPED_SCALARS = {f"{_TAG}{name}" for name in ("null", "bool", "int", "float")}
+_TEXT_SCALARS = {f"{_TAG}{name}" for name in ("str", "timestamp", "binary", "value")}
+_MERGE_TAG = f"{_TAG}merge"
+_encode_str = json.encoder.encode_basestring  # the C encoder json.dump uses with ensure_ascii=False
+
+MANIFEST_NAME = ".yaml2json-manifest.json"
+YAML_SUFFIXES = (".yaml", ".yml")
 
 
 def load_yaml(file: Path, logger: logging.Logger) -> dict[str, Any]:
@@ -56,19 +84,358 @@ def load_json(file: Path, logger: logging.Logger) -> dict[str, Any]:
         return data
 
 
+def _scalar_tag(event: ScalarEvent) -> str:
+    if event.tag is None or event.tag == "!":
+        return _RESOLVER.resolve(ScalarNode, event.value, event.implicit)
+    return event.tag
+
+
+def _scalar_value(event: ScalarEvent) -> Any:
+    """Python value of a scalar, as yaml.safe_load resolves it.
+
+    Timestamps and binary stay as their YAML text, which JSON can hold.
+    """
+    if event.style and event.tag is None:
+        # Quoted and block scalars are always strings
+        return event.value
+    tag = _scalar_tag(event)
+    if tag in _TEXT_SCALARS:
+        return event.value
+    if tag in _TYPED_SCALARS:
+        node = ScalarNode(tag, event.value, event.start_mark, event.end_mark, event.style)
+        return _CONSTRUCTOR.yaml_constructors[tag](_CONSTRUCTOR, node)
+    raise ValueError(f"line {event.start_mark.line + 1}: unsupported tag {tag}")
+
+
+def _json_scalar(value: Any) -> str:
+    if isinstance(value, str):
+        return _encode_str(value)
+    return json.dumps(value)
+
+
+def _json_key(value: Any, event: ScalarEvent) -> str:
+    """A mapping key as json.dump converts it: strings stay, other scalars become text."""
+    if isinstance(value, str):
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    raise ValueError(f"line {event.start_mark.line + 1}: unsupported key {value!r}")
+
+
+class _StreamConverter:
+    """Writes JSON (as json.dump(indent=2) would) while reading YAML parser events.
+
+    Only the events of anchored nodes are kept, to replay them for aliases,
+    plus the keys of each open mapping, to reject duplicates.
+
+    Merge keys (``<<``) are expanded after the mapping's own keys, which
+    win over them. yaml.safe_load lists the merged keys first instead;
+    putting them there would mean holding the whole mapping, so such
+    mappings get the same values as json.dump but a different key order.
+    """
+
+    def __init__(self, events: Iterator[Any], write: Callable[[str], Any]) -> None:
+        self._events = events
+        self._write = write
+        self._anchors: Dict[str, List[Any]] = {}
+        self._recording: List[List[Any]] = []
+
+    def next(self) -> Any:
+        event = next(self._events)
+        for buffer in self._recording:
+            buffer.append(event)
+        return event
+
+    def node(self, event: Any, depth: int) -> None:
+        if isinstance(event, AliasEvent):
+            self._replay(event, lambda first: self.node(first, depth))
+            return
+        if isinstance(event, ScalarEvent):
+            if event.anchor is not None:
+                self._anchors[event.anchor] = [event]
+            self._write(_json_scalar(_scalar_value(event)))
+            return
+        if event.anchor is not None:
+            self._recording.append([event])
+        if isinstance(event, SequenceStartEvent):
+            self._sequence(depth)
+        else:
+            self._mapping(depth)
+        if event.anchor is not None:
+            self._anchors[event.anchor] = self._recording.pop()
+
+    def _replay(self, alias: AliasEvent, handle: Callable[[Any], Any]) -> Any:
+        events = self._anchors.get(alias.anchor)
+        if events is None:
+            raise ValueError(f"line {alias.start_mark.line + 1}: unknown anchor {alias.anchor!r}")
+        # The alias itself is already in any outer recording; its expansion must not be
+        saved = self._events, self._recording
+        self._events, self._recording = iter(events), []
+        try:
+            return handle(self.next())
+        finally:
+            self._events, self._recording = saved
+
+    def _sequence(self, depth: int) -> None:
+        event = self.next()
+        if isinstance(event, SequenceEndEvent):
+            self._write("[]")
+            return
+        indent = "\n" + "  " * (depth + 1)
+        self._write("[" + indent)
+        self.node(event, depth + 1)
+        event = self.next()
+        while not isinstance(event, SequenceEndEvent):
+            self._write("," + indent)
+            self.node(event, depth + 1)
+            event = self.next()
+        self._write("\n" + "  " * depth + "]")
+
+    def _mapping(self, depth: int) -> None:
+        indent = "\n" + "  " * (depth + 1)
+        seen = set()
+        merged: List[Dict[str, Any]] = []
+        event = self.next()
+        while not isinstance(event, MappingEndEvent):
+            if isinstance(event, ScalarEvent) and not event.style and _scalar_tag(event) == _MERGE_TAG:
+                merged.extend(self._merge_sources(self.next()))
+                event = self.next()
+                continue
+            key = self._key(event)
+            if key in seen:
+                raise ValueError(f"line {event.start_mark.line + 1}: duplicate key {key!r}")
+            self._write(("," if seen else "{") + indent + _encode_str(key) + ": ")
+            seen.add(key)
+            self.node(self.next(), depth + 1)
+            event = self.next()
+        for source in merged:
+            for key, value in source.items():
+                if key not in seen:
+                    dumped = json.dumps(value, indent=2, ensure_ascii=False).replace("\n", indent)
+                    self._write(("," if seen else "{") + indent + _encode_str(key) + ": " + dumped)
+                    seen.add(key)
+        self._write("\n" + "  " * depth + "}" if seen else "{}")
+
+    def _key(self, event: Any) -> str:
+        if isinstance(event, AliasEvent):
+            return self._replay(event, self._key)
+        if not isinstance(event, ScalarEvent):
+            raise ValueError(f"line {event.start_mark.line + 1}: mapping keys must be scalars")
+        if event.anchor is not None:
+            self._anchors[event.anchor] = [event]
+        return _json_key(_scalar_value(event), event)
+
+    def _collect(self, event: Any) -> List[Any]:
+        """The events of the node starting at ``event``, consumed from the stream."""
+        events = [event]
+        depth = 1 if isinstance(event, CollectionStartEvent) else 0
+        while depth:
+            event = self.next()
+            events.append(event)
+            if isinstance(event, CollectionStartEvent):
+                depth += 1
+            elif isinstance(event, (MappingEndEvent, SequenceEndEvent)):
+                depth -= 1
+        return events
+
+    def _merge_sources(self, event: Any) -> List[Dict[str, Any]]:
+        """Mappings named by a ``<<`` value, in precedence order."""
+        events = self._collect(event)
+        if not isinstance(event, AliasEvent) and event.anchor is not None:
+            self._anchors[event.anchor] = events
+        value = self._build(iter(events))
+        sources = value if isinstance(value, list) else [value]
+        if not all(isinstance(source, dict) for source in sources):
+            raise ValueError(f"line {event.start_mark.line + 1}: << expects a mapping or a list of mappings")
+        return sources
+
+    def _build(self, events: Iterator[Any]) -> Any:
+        """Materialize one node; used only for the (small) targets of merge keys.
+
+        Returns _END at the end of the enclosing collection.
+        """
+        event = next(events)
+        if isinstance(event, AliasEvent):
+            stored = self._anchors.get(event.anchor)
+            if stored is None:
+                raise ValueError(f"line {event.start_mark.line + 1}: unknown anchor {event.anchor!r}")
+            return self._build(iter(stored))
+        if isinstance(event, ScalarEvent):
+            return _scalar_value(event)
+        if isinstance(event, SequenceStartEvent):
+            items = []
+            item = self._build(events)
+            while item is not _END:
+                items.append(item)
+                item = self._build(events)
+            return items
+        if isinstance(event, MappingStartEvent):
+            mapping: Dict[str, Any] = {}
+            defaults: Dict[str, Any] = {}
+            key_event = next(events)
+            while not isinstance(key_event, MappingEndEvent):
+                if isinstance(key_event, ScalarEvent) and not key_event.style and _scalar_tag(key_event) == _MERGE_TAG:
+                    value = self._build(events)
+                    for source in reversed(value if isinstance(value, list) else [value]):
+                        defaults.update(source)
+                else:
+                    mapping[self._key(key_event)] = self._build(events)
+                key_event = next(events)
+            return {**defaults, **mapping}
+        return _END
+
+
+_END = object()
+
+
+def _stream_yaml_to_json(source: Path, destination: Path) -> None:
+    """Convert ``source`` to ``destination`` event by event, replacing it atomically.
+
+    Raises ValueError for the same empty or non-mapping documents load_yaml rejects.
+    """
+    tmp = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    try:
+        with source.open(encoding="utf-8") as src, tmp.open("w", encoding="utf-8") as dst:
+            converter = _StreamConverter(yaml.parse(src, Loader=_LOADER), dst.write)
+            converter.next()  # StreamStartEvent
+            if isinstance(converter.next(), StreamEndEvent):
+                raise ValueError("YAML file is empty.")
+            root = converter.next()
+            if isinstance(root, ScalarEvent) and _scalar_value(root) is None:
+                raise ValueError("YAML file is empty.")
+            if not isinstance(root, MappingStartEvent):
+                raise ValueError("YAML root element must be a dictionary.")
+            converter.node(root, 0)
+            converter.next()  # DocumentEndEvent
+            if not isinstance(converter.next(), StreamEndEvent):
+                raise ValueError("YAML file must hold a single document.")
+        tmp.replace(destination)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
 def convert_yaml_to_json(
     logger: logging.Logger, source: Path, destination: Path = Path("config.json")
 ) -> None:
-    """Convert YAML file to JSON file"""
+    """Convert YAML file to JSON file
+
+    The document is streamed from parser events, so memory stays bounded
+    by its anchored nodes rather than its size. Keys keep document order.
+    """
     destination.parent.mkdir(exist_ok=True)
     logger.debug(f"Converting {source} to {destination}")
 
-    data = load_yaml(source, logger)
+    if source.is_dir():
+        raise IsADirectoryError("Cannot open a directory as a file.")
+
+    if not source.exists():
+        raise FileNotFoundError(f"Yaml file '{source}' not found.")
+
+    _stream_yaml_to_json(source, destination)
+    logger.info(f"YAML file '{source}' converted to JSON file '{destination}'")
+
+
+@dataclass
+class TreeConversion:
+    """Outcome of convert_yaml_tree, by source file."""
+
+    converted: List[Path] = field(default_factory=list)
+    skipped: List[Path] = field(default_factory=list)
+    failed: Dict[Path, str] = field(default_factory=dict)
+
+
+def _file_digest(file: Path) -> str:
+    digest = hashlib.sha256()
+    with file.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _convert_worker(source: str, destination: str) -> Optional[str]:
+    """Process pool entry point: the error message, or None on success."""
+    try:
+        _stream_yaml_to_json(Path(source), Path(destination))
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        return str(exc)
+    return None
+
+
+def convert_yaml_tree(
+    logger: logging.Logger,
+    source: Path,
+    destination: Path,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> TreeConversion:
+    """Convert every YAML file under ``source`` to JSON under ``destination``.
+
+    Files are converted in parallel across ``workers`` processes (default:
+    one per CPU). A manifest in ``destination`` records each source's
+    mtime, size and hash; files whose mtime and size, or failing that
+    whose content, are unchanged since their last conversion are skipped
+    unless ``force`` is set.
+    """
+    if not source.is_dir():
+        raise NotADirectoryError(f"'{source}' is not a directory.")
+    destination.mkdir(parents=True, exist_ok=True)
+    manifest_file = destination / MANIFEST_NAME
+    try:
+        manifest: Dict[str, Any] = json.loads(manifest_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+
+    result = TreeConversion()
+    entries: Dict[str, Any] = {}
+    pending: List[tuple] = []
+    for file in sorted(source.rglob("*")):
+        if file.suffix not in YAML_SUFFIXES or not file.is_file():
+            continue
+        rel = file.relative_to(source).as_posix()
+        target = destination / Path(rel).with_suffix(".json")
+        stat = file.stat()
+        previous = manifest.get(rel)
+        converted_before = not force and previous and target.exists()
+        if converted_before and (previous.get("mtime_ns"), previous.get("size")) == (stat.st_mtime_ns, stat.st_size):
+            entries[rel] = previous
+            result.skipped.append(file)
+            continue
+        # Hashed before converting, so an edit made meanwhile is caught next run
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": _file_digest(file)}
+        if converted_before and previous.get("sha256") == entry["sha256"]:
+            # Touched but not changed
+            entries[rel] = entry
+            result.skipped.append(file)
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        pending.append((file, target, rel, entry))
+
+    workers = workers or os.cpu_count() or 1
+    sources = [str(file) for file, _, _, _ in pending]
+    targets = [str(target) for _, target, _, _ in pending]
+    if workers == 1 or len(pending) <= 1:
+        errors = list(map(_convert_worker, sources, targets))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            chunksize = max(1, len(pending) // (workers * 4))
+            errors = list(pool.map(_convert_worker, sources, targets, chunksize=chunksize))
 
-    with destination.open(mode="w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, sort_keys=True, ensure_ascii=False)
+    for (file, _, rel, entry), error in zip(pending, errors):
+        if error is not None:
+            logger.error(f"Cannot convert '{file}': {error}")
+            result.failed[file] = error
+            continue
+        entries[rel] = entry
+        result.converted.append(file)
 
-        logger.info(f"YAML file '{source}' converted to JSON file '{destination}'")
+    tmp = manifest_file.with_name(f".{MANIFEST_NAME}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(entries, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(manifest_file)
+    logger.info(
+        f"Converted {len(result.converted)} YAML files under '{source}' to '{destination}', "
+        f"skipped {len(result.skipped)} unchanged, {len(result.failed)} failed"
+    )
+    return result
 
 
 def save_json(logger: logging.Logger, data: dict[str, Any], file: Path) -> None:
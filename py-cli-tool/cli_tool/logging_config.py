@@ -10,6 +10,17 @@ DEFAULT_LOG_FILE = DEFAULT_LOG_DIR / "clitool.log"
 LOG_FORMAT = "[%(asctime)s] %(levelname)s %(name)s - %(message)s"
 
 
+class _LazyFileHandler(logging.FileHandler):
+    """File handler that creates its directory and opens the file on first record."""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
 def get_logger(level: str = "INFO", log_file: Path | None = None) -> logging.Logger:
     """Return a configured application logger with console and file handlers."""
 
@@ -18,7 +29,6 @@ def get_logger(level: str = "INFO", log_file: Path | None = None) -> logging.Log
     logger.propagate = False
 
     log_path = log_file or DEFAULT_LOG_FILE
-    log_path.parent.mkdir(parents=True, exist_ok=True)
 
     formatter = logging.Formatter(LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S")
 
@@ -29,7 +39,8 @@ def get_logger(level: str = "INFO", log_file: Path | None = None) -> logging.Log
         stream_handler.setFormatter(formatter)
         logger.addHandler(stream_handler)
 
-        file_handler = logging.FileHandler(log_path)
+        # Nothing touches the filesystem until something is actually logged
+        file_handler = _LazyFileHandler(log_path)
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
@@ -2,15 +2,16 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import socket
-import subprocess
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
-import ipaddress
+from typing import Dict, List, Optional, Tuple
 
-from cli_tool.config import Network
+from cli_tool import dns_client, netlink
+from cli_tool.config import Network, RootConfig
+from cli_tool.profiling import traced
+from cli_tool.subnet_index import SubnetIndex
 
 
 @dataclass
@@ -19,52 +20,21 @@ class InterfaceInfo:
     addresses: List[str]
 
 
-def _run_ip_json() -> List[dict]:
-    try:
-        result = subprocess.run(
-            ["ip", "-json", "addr"],
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=3,
-        )
-        if result.returncode != 0:
-            return []
-        return json.loads(result.stdout)
-    except (FileNotFoundError, subprocess.SubprocessError, json.JSONDecodeError, OSError):
-        return []
-
-
-def _run_ip_route() -> List[str]:
-    try:
-        result = subprocess.run(
-            ["ip", "route", "show"],
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=3,
-        )
-        if result.returncode != 0:
-            return []
-        return [line.strip() for line in result.stdout.splitlines() if line.strip()]
-    except (FileNotFoundError, subprocess.SubprocessError, OSError):
-        return []
-
-
-def collect_interfaces() -> List[InterfaceInfo]:
-    interfaces: List[InterfaceInfo] = []
-    for iface in _run_ip_json():
-        name = iface.get("ifname")
-        addresses = []
-        for addr in iface.get("addr_info", []):
-            local = addr.get("local")
-            if local and addr.get("family") in {"inet", "inet6"}:
-                addresses.append(local)
-        if name:
-            interfaces.append(InterfaceInfo(name=name, addresses=addresses))
-    return interfaces
+@traced()
+def collect_network_state() -> netlink.NetworkState:
+    """Dump links, addresses, routes and neighbours in one netlink round."""
+    return netlink.collect()
+
 
+def collect_interfaces(state: Optional[netlink.NetworkState] = None) -> List[InterfaceInfo]:
+    state = state or collect_network_state()
+    return [
+        InterfaceInfo(name=name, addresses=addresses)
+        for name, addresses in state.addresses_by_link().items()
+    ]
 
+
+@traced()
 def collect_dns_servers(resolv_path: Path = Path("/etc/resolv.conf")) -> List[str]:
     servers: List[str] = []
     try:
@@ -78,27 +48,140 @@ def collect_dns_servers(resolv_path: Path = Path("/etc/resolv.conf")) -> List[st
     return servers
 
 
-def validate_subnets(interfaces: List[InterfaceInfo], networks: Dict[str, Network]) -> List[str]:
+@traced()
+def validate_subnets(
+    interfaces: List[InterfaceInfo],
+    networks: Dict[str, Network],
+    index: Optional[SubnetIndex] = None,
+) -> List[str]:
+    index = index or SubnetIndex(networks)
+    covered = index.covered(addr for iface in interfaces for addr in iface.addresses)
     warnings: List[str] = []
-    all_ips = [addr for iface in interfaces for addr in iface.addresses]
     for net in networks.values():
-        subnet = net.subnet()
-        matches = [ip for ip in all_ips if ipaddress.ip_address(ip) in subnet]
-        if not matches:
-            warnings.append(f"No local interface in expected subnet {net.name} ({subnet})")
+        if net.name not in covered:
+            warnings.append(f"No local interface in expected subnet {net.name} ({net.subnet()})")
     return warnings
 
 
-def test_dns_resolution(hostnames: List[str]) -> List[str]:
-    failures = []
+@traced()
+def map_addresses(
+    interfaces: List[InterfaceInfo],
+    config: RootConfig,
+    index: Optional[SubnetIndex] = None,
+) -> Tuple[List[str], List[str]]:
+    """Map local, expected-host and VM addresses onto the configured networks.
+
+    Returns ``(unmatched, misplaced)``: addresses outside every configured
+    network, and config addresses outside the network they are declared under.
+    """
+    index = index or SubnetIndex(config.networks)
+    unmatched: List[str] = []
+    misplaced: List[str] = []
+
+    def _check(ip: str, label: str, declared: Optional[str]) -> None:
+        actual = index.lookup(ip)
+        if actual is None:
+            unmatched.append(f"{label} {ip}")
+        elif declared is not None and actual != declared and not index.contains(declared, ip):
+            misplaced.append(f"{label} {ip} is outside its network {declared} (falls in {actual})")
+
+    for iface in interfaces:
+        for addr in iface.addresses:
+            if not index.is_host_local(addr):
+                _check(addr, f"local {iface.name}", None)
+    for net in config.networks.values():
+        for host, ip in net.expected_hosts.items():
+            _check(ip, f"expected host {net.name}.{host}", net.name)
+    for vm in config.vms:
+        for attachment in vm.networks:
+            _check(attachment.ip, f"vm {vm.name}", attachment.name)
+    return unmatched, misplaced
+
+
+@traced()
+def resolve_hostnames(hostnames: List[str]) -> Dict[str, str | None]:
+    """Resolve each hostname; map it to an error message, or None on success."""
+    errors: Dict[str, str | None] = {}
     for host in hostnames:
         try:
             socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+            errors[host] = None
         except OSError as exc:
-            failures.append(f"{host}: {exc}")
-    return failures
+            errors[host] = str(exc)
+    return errors
 
 
+def test_dns_resolution(hostnames: List[str]) -> List[str]:
+    return [f"{host}: {err}" for host, err in resolve_hostnames(hostnames).items() if err]
+
+
+@traced()
+def check_configured_dns(
+    config: RootConfig,
+    timeout: float = 1.0,
+    retries: int = 2,
+    port: int = dns_client.DNS_PORT,
+) -> Tuple[List[str], Dict[str, dict], List[str]]:
+    """Check each network's expected_hosts against that network's dns_servers.
+
+    Every forward (A/AAAA) and reverse (PTR) query goes out at once, so the
+    whole run costs about one round trip per retry. Returns
+    ``(failures, per-server latency, hostnames not covered by any server)``.
+    """
+    questions: List[Tuple[Tuple[str, int], str, int]] = []
+    expectations: List[Tuple[str, str, str]] = []
+    uncovered: List[str] = []
+    for net in config.networks.values():
+        for host, ip in net.expected_hosts.items():
+            if not net.dns_servers:
+                uncovered.append(host)
+                continue
+            fqdn = dns_client.qualify(host, config.environment.domain)
+            qtype = dns_client.QTYPE_AAAA if ":" in ip else dns_client.QTYPE_A
+            for server in net.dns_servers:
+                questions.append(((server, port), fqdn, qtype))
+                expectations.append((fqdn, ip, server))
+                questions.append(((server, port), dns_client.reverse_name(ip), dns_client.QTYPE_PTR))
+                expectations.append((fqdn, ip, server))
+    if not questions:
+        return [], {}, uncovered
+
+    async def _run() -> Tuple[List, Dict[str, dict]]:
+        client = dns_client.DnsClient(timeout=timeout, retries=retries)
+        try:
+            return await client.query_many(questions), client.latency_report()
+        finally:
+            client.close()
+
+    results, latency = asyncio.run(_run())
+    failures: List[str] = []
+    for (_, qname, qtype), (fqdn, ip, server), result in zip(questions, expectations, results):
+        kind = dns_client.QTYPE_NAMES[qtype]
+        if isinstance(result, dns_client.DnsError):
+            failures.append(f"{fqdn}: {result}")
+        elif result.rcode != dns_client.RCODE_NOERROR:
+            failures.append(f"{fqdn}: {kind} {qname} via {server}: {result.rcode_name}")
+        elif qtype == dns_client.QTYPE_PTR:
+            names = [name.lower() for name in result.values(qtype)]
+            if fqdn.lower() not in names:
+                failures.append(f"{fqdn}: PTR {ip} via {server} returned {names or 'no records'}")
+        elif ip not in result.values(qtype):
+            got = result.values(qtype) or "no records"
+            failures.append(f"{fqdn}: {kind} via {server} returned {got}, expected {ip}")
+    return failures, latency, uncovered
+
+
+def system_resolver_hosts(config: RootConfig) -> List[str]:
+    """Hostnames checked through the system resolver: the domain, then every
+    expected host of a network without its own ``dns_servers``."""
+    hosts = [config.environment.domain]
+    for net in config.networks.values():
+        if not net.dns_servers:
+            hosts.extend(net.expected_hosts)
+    return list(dict.fromkeys(hosts))
+
+
+@traced()
 def test_external_connectivity(host: str = "1.1.1.1", port: int = 443, timeout: float = 2.0) -> str | None:
     try:
         with socket.create_connection((host, port), timeout=timeout):
@@ -107,23 +190,35 @@ def test_external_connectivity(host: str = "1.1.1.1", port: int = 443, timeout:
         return str(exc)
 
 
-def summarize_routes() -> List[str]:
-    return _run_ip_route()
+def summarize_routes(state: Optional[netlink.NetworkState] = None) -> List[dict]:
+    state = state or collect_network_state()
+    return [route.as_dict() for route in state.routes]
+
+
+def summarize_neighbours(state: Optional[netlink.NetworkState] = None) -> List[dict]:
+    state = state or collect_network_state()
+    return [asdict(neighbour) for neighbour in state.neighbours]
 
 
 def summarize_network(
     interfaces: List[InterfaceInfo],
-    routes: List[str],
+    routes: List[dict],
     dns_servers: List[str],
     subnet_warnings: List[str],
     dns_failures: List[str],
     ext_error: str | None,
+    unmatched_addresses: List[str] | None = None,
+    dns_latency: Dict[str, dict] | None = None,
+    neighbours: List[dict] | None = None,
 ) -> Dict[str, object]:
     return {
         "interfaces": [{"name": i.name, "addresses": i.addresses} for i in interfaces],
         "routes": routes,
+        "neighbours": neighbours or [],
         "dns_servers": dns_servers,
         "subnet_warnings": subnet_warnings,
+        "unmatched_addresses": unmatched_addresses or [],
         "dns_failures": dns_failures,
+        "dns_server_latency": dns_latency or {},
         "external_connectivity_error": ext_error,
     }
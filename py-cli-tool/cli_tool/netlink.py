@@ -0,0 +1,428 @@
+"""Interface, address, route and neighbour collection over rtnetlink.
+
+One AF_NETLINK socket dumps everything the ``ip`` command would print,
+without forking it or decoding JSON. When netlink is unavailable the
+same objects are rebuilt from ``/proc/net`` (and sysfs).
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import struct
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+NETLINK_ROUTE = 0
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_GETADDR = 22
+RTM_NEWROUTE = 24
+RTM_GETROUTE = 26
+RTM_NEWNEIGH = 28
+RTM_GETNEIGH = 30
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_OPERSTATE = 16
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+RTA_DST = 1
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RTA_PRIORITY = 6
+RTA_PREFSRC = 7
+RTA_TABLE = 15
+NDA_DST = 1
+NDA_LLADDR = 2
+
+RT_TABLE_MAIN = 254
+RTN_UNICAST = 1
+RTM_F_CLONED = 0x200
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_RTATTR = struct.Struct("=HH")
+_IFINFOMSG = struct.Struct("=BxHiII")
+_IFADDRMSG = struct.Struct("=BBBBI")
+_RTMSG = struct.Struct("=BBBBBBBBI")
+_NDMSG = struct.Struct("=BxxxiHBB")
+
+OPERSTATES = {0: "UNKNOWN", 1: "NOTPRESENT", 2: "DOWN", 3: "LOWERLAYERDOWN", 4: "TESTING", 5: "DORMANT", 6: "UP"}
+SCOPES = {0: "global", 200: "site", 253: "link", 254: "host", 255: "nowhere"}
+PROTOCOLS = {1: "redirect", 2: "kernel", 3: "boot", 4: "static", 16: "dhcp", 186: "bgp", 188: "ospf"}
+NUD_STATES = {
+    0x01: "INCOMPLETE",
+    0x02: "REACHABLE",
+    0x04: "STALE",
+    0x08: "DELAY",
+    0x10: "PROBE",
+    0x20: "FAILED",
+    0x40: "NOARP",
+    0x80: "PERMANENT",
+}
+
+_FAMILIES = {socket.AF_INET: 4, socket.AF_INET6: 6}
+
+
+@dataclass
+class Link:
+    index: int
+    name: str
+    mac: Optional[str] = None
+    mtu: Optional[int] = None
+    state: str = "UNKNOWN"
+
+
+@dataclass
+class Address:
+    index: int
+    ifname: str
+    family: int  # 4 or 6
+    address: str
+    prefixlen: int
+    scope: str
+
+
+@dataclass
+class Route:
+    family: int
+    destination: str  # "default" or a CIDR
+    gateway: Optional[str] = None
+    dev: Optional[str] = None
+    protocol: Optional[str] = None
+    scope: Optional[str] = None
+    src: Optional[str] = None
+    metric: Optional[int] = None
+
+    def describe(self) -> str:
+        """Render the route the way ``ip route show`` does."""
+        parts = [self.destination]
+        if self.gateway:
+            parts.append(f"via {self.gateway}")
+        if self.dev:
+            parts.append(f"dev {self.dev}")
+        if self.protocol and self.protocol != "boot":
+            parts.append(f"proto {self.protocol}")
+        if self.scope and self.scope != "global":
+            parts.append(f"scope {self.scope}")
+        if self.src:
+            parts.append(f"src {self.src}")
+        if self.metric is not None:
+            parts.append(f"metric {self.metric}")
+        return " ".join(parts)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Neighbour:
+    ifname: str
+    address: str
+    lladdr: Optional[str]
+    state: str
+
+
+@dataclass
+class NetworkState:
+    links: List[Link] = field(default_factory=list)
+    addresses: List[Address] = field(default_factory=list)
+    routes: List[Route] = field(default_factory=list)
+    neighbours: List[Neighbour] = field(default_factory=list)
+    source: str = "netlink"
+
+    def addresses_by_link(self) -> Dict[str, List[str]]:
+        """Map every link name (in index order) to its addresses."""
+        grouped: Dict[str, List[str]] = {link.name: [] for link in self.links}
+        for addr in self.addresses:
+            grouped.setdefault(addr.ifname, []).append(addr.address)
+        return grouped
+
+
+def _mac(raw: bytes) -> str:
+    return ":".join(f"{b:02x}" for b in raw)
+
+
+def _ip(family: int, raw: bytes) -> str:
+    return socket.inet_ntop(family, raw)
+
+
+def _attributes(data: memoryview, offset: int, end: int) -> Iterator[Tuple[int, memoryview]]:
+    while offset + _RTATTR.size <= end:
+        length, attr_type = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            return
+        yield attr_type & 0x3FFF, data[offset + _RTATTR.size : offset + length]
+        offset += (length + 3) & ~3
+
+
+def _messages(sock: socket.socket, seq: int) -> Iterator[Tuple[int, memoryview, int, int]]:
+    """Yield ``(type, buffer, payload offset, message end)`` until NLMSG_DONE."""
+    while True:
+        data = memoryview(sock.recv(65536))
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length, msg_type, _, msg_seq, _ = _NLMSGHDR.unpack_from(data, offset)
+            if length < _NLMSGHDR.size:
+                return
+            if msg_seq == seq:
+                if msg_type == NLMSG_DONE:
+                    return
+                if msg_type == NLMSG_ERROR:
+                    errno = -struct.unpack_from("=i", data, offset + _NLMSGHDR.size)[0]
+                    raise OSError(errno, os.strerror(errno))
+                yield msg_type, data, offset + _NLMSGHDR.size, offset + length
+            offset += (length + 3) & ~3
+
+
+def _dump(sock: socket.socket, msg_type: int, header: bytes, seq: int) -> Iterator[Tuple[int, memoryview, int, int]]:
+    request = _NLMSGHDR.pack(_NLMSGHDR.size + len(header), msg_type, NLM_F_REQUEST | NLM_F_DUMP, seq, 0)
+    sock.send(request + header)
+    return _messages(sock, seq)
+
+
+def _dump_netlink() -> NetworkState:
+    state = NetworkState(source="netlink")
+    names: Dict[int, str] = {}
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        sock.bind((0, 0))
+
+        for msg_type, data, off, end in _dump(sock, RTM_GETLINK, _IFINFOMSG.pack(0, 0, 0, 0, 0), 1):
+            if msg_type != RTM_NEWLINK:
+                continue
+            _, _, index, _, _ = _IFINFOMSG.unpack_from(data, off)
+            link = Link(index=index, name=str(index))
+            for attr, value in _attributes(data, off + _IFINFOMSG.size, end):
+                if attr == IFLA_IFNAME:
+                    link.name = bytes(value).rstrip(b"\0").decode()
+                elif attr == IFLA_ADDRESS:
+                    link.mac = _mac(value)
+                elif attr == IFLA_MTU:
+                    link.mtu = struct.unpack_from("=I", value)[0]
+                elif attr == IFLA_OPERSTATE:
+                    link.state = OPERSTATES.get(value[0], "UNKNOWN")
+            names[index] = link.name
+            state.links.append(link)
+
+        for msg_type, data, off, end in _dump(sock, RTM_GETADDR, _IFADDRMSG.pack(0, 0, 0, 0, 0), 2):
+            if msg_type != RTM_NEWADDR:
+                continue
+            family, prefixlen, _, scope, index = _IFADDRMSG.unpack_from(data, off)
+            if family not in _FAMILIES:
+                continue
+            found: Dict[int, str] = {}
+            for attr, value in _attributes(data, off + _IFADDRMSG.size, end):
+                if attr in (IFA_ADDRESS, IFA_LOCAL):
+                    found[attr] = _ip(family, value)
+            # IFA_LOCAL is the interface's own address on point-to-point links
+            address = found.get(IFA_LOCAL) or found.get(IFA_ADDRESS)
+            if address:
+                state.addresses.append(
+                    Address(
+                        index=index,
+                        ifname=names.get(index, str(index)),
+                        family=_FAMILIES[family],
+                        address=address,
+                        prefixlen=prefixlen,
+                        scope=SCOPES.get(scope, str(scope)),
+                    )
+                )
+
+        for msg_type, data, off, end in _dump(sock, RTM_GETROUTE, _RTMSG.pack(0, 0, 0, 0, 0, 0, 0, 0, 0), 3):
+            if msg_type != RTM_NEWROUTE:
+                continue
+            family, dst_len, _, _, table, protocol, scope, rtype, flags = _RTMSG.unpack_from(data, off)
+            if family not in _FAMILIES or rtype != RTN_UNICAST or flags & RTM_F_CLONED:
+                continue
+            route = Route(
+                family=_FAMILIES[family],
+                destination="default",
+                protocol=PROTOCOLS.get(protocol, str(protocol)),
+                scope=SCOPES.get(scope, str(scope)),
+            )
+            for attr, value in _attributes(data, off + _RTMSG.size, end):
+                if attr == RTA_TABLE:
+                    table = struct.unpack_from("=I", value)[0]
+                elif attr == RTA_DST:
+                    route.destination = f"{_ip(family, value)}/{dst_len}"
+                elif attr == RTA_GATEWAY:
+                    route.gateway = _ip(family, value)
+                elif attr == RTA_OIF:
+                    route.dev = names.get(struct.unpack_from("=i", value)[0])
+                elif attr == RTA_PREFSRC:
+                    route.src = _ip(family, value)
+                elif attr == RTA_PRIORITY:
+                    route.metric = struct.unpack_from("=I", value)[0]
+            # Same view as "ip route show": the main table only
+            if table == RT_TABLE_MAIN:
+                state.routes.append(route)
+
+        for msg_type, data, off, end in _dump(sock, RTM_GETNEIGH, _NDMSG.pack(0, 0, 0, 0, 0), 4):
+            if msg_type != RTM_NEWNEIGH:
+                continue
+            family, index, nud_state, _, _ = _NDMSG.unpack_from(data, off)
+            if family not in _FAMILIES:
+                continue
+            neighbour = Neighbour(
+                ifname=names.get(index, str(index)),
+                address="",
+                lladdr=None,
+                state=NUD_STATES.get(nud_state, str(nud_state)),
+            )
+            for attr, value in _attributes(data, off + _NDMSG.size, end):
+                if attr == NDA_DST:
+                    neighbour.address = _ip(family, value)
+                elif attr == NDA_LLADDR:
+                    neighbour.lladdr = _mac(value)
+            if neighbour.address:
+                state.neighbours.append(neighbour)
+    return state
+
+
+def _read_lines(path: Path) -> List[str]:
+    try:
+        return path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+
+
+def _read_sysfs(name: str, item: str) -> Optional[str]:
+    try:
+        return (Path("/sys/class/net") / name / item).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+
+def _ipv4_from_ioctl(name: str) -> Optional[Tuple[str, int]]:
+    import fcntl
+
+    siocgifaddr, siocgifnetmask = 0x8915, 0x891B
+    request = struct.pack("256s", name.encode()[:15])
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            addr = fcntl.ioctl(sock.fileno(), siocgifaddr, request)[20:24]
+            mask = fcntl.ioctl(sock.fileno(), siocgifnetmask, request)[20:24]
+        except OSError:
+            return None
+    return socket.inet_ntoa(addr), bin(int.from_bytes(mask, "big")).count("1")
+
+
+def _le_ipv4(value: int) -> str:
+    return socket.inet_ntoa(struct.pack("<I", value))
+
+
+def _hex_ipv6(text: str) -> str:
+    return socket.inet_ntop(socket.AF_INET6, bytes.fromhex(text))
+
+
+def _dump_procfs(proc_net: Path = Path("/proc/net")) -> NetworkState:
+    state = NetworkState(source="procfs")
+    names: List[str] = []
+    for line in _read_lines(proc_net / "dev")[2:]:
+        if ":" in line:
+            names.append(line.split(":", 1)[0].strip())
+    for name in names:
+        index = _read_sysfs(name, "ifindex")
+        mtu = _read_sysfs(name, "mtu")
+        state.links.append(
+            Link(
+                index=int(index) if index else 0,
+                name=name,
+                mac=_read_sysfs(name, "address"),
+                mtu=int(mtu) if mtu else None,
+                state=(_read_sysfs(name, "operstate") or "unknown").upper(),
+            )
+        )
+        ipv4 = _ipv4_from_ioctl(name)
+        if ipv4:
+            state.addresses.append(Address(int(index or 0), name, 4, ipv4[0], ipv4[1], "global"))
+    state.links.sort(key=lambda link: link.index)
+
+    for line in _read_lines(proc_net / "if_inet6"):
+        fields = line.split()
+        if len(fields) == 6:
+            scope = int(fields[3], 16)
+            state.addresses.append(
+                Address(
+                    index=int(fields[1], 16),
+                    ifname=fields[5],
+                    family=6,
+                    address=_hex_ipv6(fields[0]),
+                    prefixlen=int(fields[2], 16),
+                    scope={0x00: "global", 0x10: "host", 0x20: "link", 0x40: "site"}.get(scope, str(scope)),
+                )
+            )
+
+    for line in _read_lines(proc_net / "route")[1:]:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        dest, gateway, flags, metric, mask = (
+            int(fields[1], 16), int(fields[2], 16), int(fields[3], 16), int(fields[6]), int(fields[7], 16)
+        )
+        if not flags & 0x1:  # RTF_UP
+            continue
+        prefixlen = bin(mask).count("1")
+        state.routes.append(
+            Route(
+                family=4,
+                destination="default" if prefixlen == 0 else f"{_le_ipv4(dest)}/{prefixlen}",
+                gateway=_le_ipv4(gateway) if flags & 0x2 else None,
+                dev=fields[0],
+                scope="global" if flags & 0x2 else "link",
+                metric=metric or None,
+            )
+        )
+
+    for line in _read_lines(proc_net / "ipv6_route"):
+        fields = line.split()
+        if len(fields) != 10:
+            continue
+        flags = int(fields[8], 16)
+        # Skip local/cache entries (RTF_LOCAL, RTF_CACHE) and the loopback reject route
+        if not flags & 0x1 or flags & 0x80000000 or flags & 0x01000000 or fields[9] == "lo":
+            continue
+        if fields[0].startswith("ff"):  # multicast lives in the local table
+            continue
+        prefixlen = int(fields[1], 16)
+        gateway = _hex_ipv6(fields[4])
+        state.routes.append(
+            Route(
+                family=6,
+                destination="default" if prefixlen == 0 else f"{_hex_ipv6(fields[0])}/{prefixlen}",
+                gateway=None if gateway == "::" else gateway,
+                dev=fields[9],
+                metric=int(fields[5], 16),
+            )
+        )
+
+    for line in _read_lines(proc_net / "arp")[1:]:
+        fields = line.split()
+        if len(fields) >= 6:
+            flags = int(fields[2], 16)
+            state.neighbours.append(
+                Neighbour(
+                    ifname=fields[5],
+                    address=fields[0],
+                    lladdr=fields[3] if flags & 0x2 else None,
+                    state="REACHABLE" if flags & 0x2 else "INCOMPLETE",
+                )
+            )
+    return state
+
+
+def collect(fallback: Callable[[], NetworkState] = _dump_procfs) -> NetworkState:
+    """Dump links, addresses, routes and neighbours; fall back to /proc/net."""
+    try:
+        return _dump_netlink()
+    except (OSError, AttributeError, struct.error):
+        # AttributeError: no AF_NETLINK on this platform
+        return fallback()
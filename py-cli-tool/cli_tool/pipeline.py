@@ -0,0 +1,150 @@
+"""Run independent diagnostic stages concurrently along a dependency graph."""
+
+from __future__ import annotations
+
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from cli_tool.profiling import span
+
+STAGE_OK = "ok"
+STAGE_ERROR = "error"
+STAGE_TIMEOUT = "timeout"
+STAGE_SKIPPED = "skipped"
+
+
+@dataclass
+class Stage:
+    """One unit of work; ``run`` receives the values of the ``after`` stages, in order."""
+
+    name: str
+    run: Callable[..., Any]
+    after: Tuple[str, ...] = ()
+    timeout: float = 5.0
+    default: Any = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    value: Any
+    status: str
+    elapsed: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STAGE_OK
+
+    def timing(self) -> Dict[str, object]:
+        report: Dict[str, object] = {"status": self.status, "elapsed_ms": round(self.elapsed * 1000, 1)}
+        if self.error:
+            report["error"] = self.error
+        return report
+
+
+def _check_graph(stages: Sequence[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Stage names must be unique")
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.after if dep not in known]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {', '.join(missing)}")
+    resolved: set = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [stage for stage in remaining if set(stage.after) <= resolved]
+        if not ready:
+            raise ValueError(f"Stage dependency cycle among: {', '.join(s.name for s in remaining)}")
+        resolved.update(stage.name for stage in ready)
+        remaining = [stage for stage in remaining if stage.name not in resolved]
+
+
+def run_stages(
+    stages: Sequence[Stage], on_result: Optional[Callable[[StageResult], None]] = None
+) -> Dict[str, StageResult]:
+    """Run every stage as soon as its dependencies finish; return results by name.
+
+    Each stage runs on its own daemon thread and is given ``timeout``
+    seconds from the moment it starts. A stage that fails or times out
+    yields its ``default`` value, and stages depending on it are skipped,
+    so the slowest stage bounds the whole run instead of the sum of all
+    of them. A timed-out thread is abandoned, not interrupted.
+
+    ``on_result`` is called on the calling thread as each stage settles.
+    """
+    _check_graph(stages)
+    results: Dict[str, StageResult] = {}
+    running: Dict[str, Tuple[Stage, float]] = {}
+    pending = list(stages)
+
+    def _settle(result: StageResult) -> None:
+        results[result.name] = result
+        if on_result is not None:
+            on_result(result)
+
+    finished: "queue.Queue[Tuple[str, str, Any, Optional[str], float]]" = queue.Queue()
+
+    def _work(stage: Stage, inputs: list) -> None:
+        try:
+            with span(f"stage {stage.name}"):
+                value = stage.run(*inputs)
+        except Exception as exc:  # reported per stage, never fatal to the run
+            finished.put((stage.name, STAGE_ERROR, stage.default, str(exc) or type(exc).__name__, time.perf_counter()))
+        else:
+            finished.put((stage.name, STAGE_OK, value, None, time.perf_counter()))
+
+    while pending or running:
+        launched = True
+        while launched:
+            launched = False
+            for stage in list(pending):
+                if not all(dep in results for dep in stage.after):
+                    continue
+                pending.remove(stage)
+                launched = True
+                failed = [dep for dep in stage.after if not results[dep].ok]
+                if failed:
+                    _settle(
+                        StageResult(
+                            stage.name, stage.default, STAGE_SKIPPED, 0.0, f"{failed[0]} {results[failed[0]].status}"
+                        )
+                    )
+                    continue
+                inputs = [results[dep].value for dep in stage.after]
+                running[stage.name] = (stage, time.perf_counter())
+                # Each worker gets a copy of the caller's context so profiling spans nest under it
+                threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(_work, stage, inputs),
+                    name=f"stage-{stage.name}",
+                    daemon=True,
+                ).start()
+        if not running:
+            break
+        now = time.perf_counter()
+        wait = min(started + stage.timeout for stage, started in running.values()) - now
+        try:
+            name, status, value, error, ended = finished.get(timeout=max(wait, 0.0))
+        except queue.Empty:
+            now = time.perf_counter()
+            for name, (stage, started) in list(running.items()):
+                if now - started >= stage.timeout:
+                    del running[name]
+                    _settle(
+                        StageResult(
+                            name, stage.default, STAGE_TIMEOUT, now - started, f"no result after {stage.timeout:g}s"
+                        )
+                    )
+            continue
+        if name not in running:
+            continue  # a straggler that already timed out
+        _, started = running.pop(name)
+        _settle(StageResult(name, value, status, ended - started, error))
+    return {stage.name: results[stage.name] for stage in stages}
@@ -0,0 +1,186 @@
+"""Span recording for ``--profile`` and ``--trace``.
+
+Instrumented code calls ``span(name)`` unconditionally; while no recorder
+is active that returns a shared no-op context manager, so the cost in a
+normal run is one global lookup. Nesting follows ``contextvars``, which
+asyncio tasks inherit, so concurrent checks each get their own branch.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("profiling_span", default=None)
+_recorder: Optional["Recorder"] = None
+
+
+@dataclass
+class Span:
+    name: str
+    start_ns: int
+    parent: Optional["Span"]
+    lane: int
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    end_ns: Optional[int] = None
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+
+class _NullSpan:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _lane() -> int:
+    """Trace lane: the running asyncio task if any, else the thread."""
+    asyncio = sys.modules.get("asyncio")  # never imported just for this
+    try:
+        task = asyncio.current_task() if asyncio is not None else None
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class _ActiveSpan:
+    __slots__ = ("recorder", "name", "attrs", "span", "token")
+
+    def __init__(self, recorder: "Recorder", name: str, attrs: Dict[str, Any]) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> Span:
+        parent = _current.get()
+        self.span = Span(self.name, time.perf_counter_ns(), parent, _lane(), self.attrs)
+        self.recorder._add(self.span)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.span.end_ns = time.perf_counter_ns()
+        _current.reset(self.token)
+
+
+class Recorder:
+    """Collects spans for one CLI run."""
+
+    def __init__(self) -> None:
+        self.roots: List[Span] = []
+        self.spans: List[Span] = []
+        self.origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            (span.parent.children if span.parent is not None else self.roots).append(span)
+
+    def tree(self) -> List[dict]:
+        """Nested ``{"name", "ms", "children"}`` dicts, in start order."""
+
+        def _node(span: Span) -> dict:
+            node: dict = {"name": span.name, "ms": round(span.duration_ms, 3)}
+            if span.attrs:
+                node["attrs"] = span.attrs
+            if span.children:
+                node["children"] = [_node(child) for child in span.children]
+            return node
+
+        return [_node(root) for root in self.roots]
+
+    def format_tree(self) -> List[str]:
+        lines: List[str] = []
+
+        def _walk(span: Span, depth: int) -> None:
+            lines.append(f"{'  ' * depth}{span.duration_ms:10.3f} ms  {span.name}")
+            for child in span.children:
+                _walk(child, depth + 1)
+
+        for root in self.roots:
+            _walk(root, 0)
+        return lines
+
+    def chrome_trace(self) -> dict:
+        """Spans as Chrome trace "complete" events (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        lanes: Dict[int, int] = {}
+        events = []
+        for span in self.spans:
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            end = span.end_ns if span.end_ns is not None else time.perf_counter_ns()
+            events.append(
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": (span.start_ns - self.origin_ns) / 1000,
+                    "dur": (end - span.start_ns) / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": span.attrs,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+
+
+def span(name: str, **attrs: Any):
+    """Context manager timing ``name`` under the current span; a no-op unless recording."""
+    recorder = _recorder
+    if recorder is None:
+        return _NULL_SPAN
+    return _ActiveSpan(recorder, name, attrs)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of ``span`` for synchronous functions."""
+
+    def _decorate(func: F) -> F:
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+
+        return _wrapper  # type: ignore[return-value]
+
+    return _decorate
+
+
+def start() -> Recorder:
+    """Begin recording spans for this process."""
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def stop() -> Optional[Recorder]:
+    """Stop recording and return what was recorded."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
@@ -0,0 +1,118 @@
+"""On-disk TTL cache for probe results shared across CLI invocations."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+CACHE_FILE_NAME = "results.sqlite"
+DEFAULT_MAX_ENTRIES = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+"""
+
+
+def make_key(check: str, target: str, params: Mapping[str, Any] | None = None) -> str:
+    """Build a cache key from the check type, its target and its parameters."""
+    return json.dumps([check, target, dict(params or {})], sort_keys=True, separators=(",", ":"))
+
+
+class ResultCache:
+    """SQLite-backed result cache with TTL reads and LRU eviction.
+
+    SQLite's WAL journal and busy timeout make it safe for several CLI
+    processes (cron jobs, timers, shells) to share one cache file.
+    """
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(str(path), timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get_many(self, keys: Iterable[str], max_age: float) -> Dict[str, Any]:
+        """Return cached values younger than ``max_age`` seconds, keyed by cache key."""
+        wanted = list(dict.fromkeys(keys))
+        if not wanted or max_age <= 0:
+            return {}
+        now = time.time()
+        found: Dict[str, Any] = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start : start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({marks}) AND stored_at >= ?",
+                (*chunk, now - max_age),
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        if found:
+            with self._transaction():
+                self._conn.executemany(
+                    "UPDATE results SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        return found
+
+    def get(self, key: str, max_age: float) -> Optional[Any]:
+        return self.get_many([key], max_age).get(key)
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Store values and evict the least recently used entries beyond the size bound."""
+        now = time.time()
+        rows = [(key, json.dumps(value), now, now) for key, value in items]
+        if not rows:
+            return
+        with self._transaction():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many([(key, value)])
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._conn)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, so concurrent writers queue on the busy timeout."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type: object, *exc_info: object) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,249 @@
+"""Paced ICMP and TCP-connect sweeps of whole subnets."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import errno
+import ipaddress
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from cli_tool.defaults import (
+    DEFAULT_SCAN_CONCURRENCY,
+    DEFAULT_SCAN_PORTS,
+    DEFAULT_SCAN_RATE,
+    DEFAULT_SCAN_TIMEOUT,
+)
+from cli_tool.icmp import IcmpUnavailable, Pinger
+
+MIN_PREFIXLEN = 16  # a /16 is the largest sweep we allow
+
+# A refused connection still proves the host is up
+_ALIVE_ERRNOS = {errno.ECONNREFUSED, errno.ECONNRESET}
+
+
+class HostBitmap:
+    """One bit per host offset inside an IPv4 network."""
+
+    def __init__(self, network: ipaddress.IPv4Network) -> None:
+        self.network = network
+        self._base = int(network.network_address)
+        self._bits = bytearray((network.num_addresses + 7) // 8)
+
+    def add(self, ip: str) -> None:
+        offset = int(ipaddress.IPv4Address(ip)) - self._base
+        self._bits[offset >> 3] |= 1 << (offset & 7)
+
+    def __contains__(self, ip: str) -> bool:
+        offset = int(ipaddress.IPv4Address(ip)) - self._base
+        if not 0 <= offset < self.network.num_addresses:
+            return False
+        return bool(self._bits[offset >> 3] & (1 << (offset & 7)))
+
+    def __len__(self) -> int:
+        return sum(bin(byte).count("1") for byte in self._bits)
+
+    def __iter__(self) -> Iterator[str]:
+        for index, byte in enumerate(self._bits):
+            while byte:
+                low = byte & -byte
+                yield str(ipaddress.IPv4Address(self._base + index * 8 + low.bit_length() - 1))
+                byte ^= low
+
+    def encode(self) -> str:
+        """Base64 of the raw bitmap (bit ``n`` of byte ``n // 8`` is offset ``n``)."""
+        return base64.b64encode(bytes(self._bits)).decode("ascii")
+
+
+def sweep_targets(network: ipaddress.IPv4Network) -> List[str]:
+    """Host addresses to probe; refuses anything larger than a /16."""
+    if network.prefixlen < MIN_PREFIXLEN:
+        raise ValueError(f"{network} is larger than a /{MIN_PREFIXLEN}")
+    return [str(host) for host in network.hosts()]
+
+
+class _Pacer:
+    """Release probes at ``rate`` per second in small batches instead of one sleep per probe."""
+
+    def __init__(self, rate: float, tick: float = 0.01) -> None:
+        self.batch = max(1, int(rate * tick))
+        self.tick = self.batch / rate
+        self._next = time.monotonic()
+        self._left = self.batch
+
+    async def wait(self) -> None:
+        if self._left == 0:
+            self._next += self.tick
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Running late: do not burst to catch up
+                self._next = time.monotonic()
+            self._left = self.batch
+        self._left -= 1
+
+
+async def _tcp_alive(ip: str, port: int, timeout: float) -> bool:
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), timeout)
+        return True
+    except OSError as exc:
+        return exc.errno in _ALIVE_ERRNOS
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        sock.close()
+
+
+@dataclass
+class SweepResult:
+    network: ipaddress.IPv4Network
+    live: HostBitmap
+    probed: int
+    elapsed: float
+    icmp: bool
+    errors: List[str] = field(default_factory=list)
+    name: str = ""
+
+
+class Sweeper:
+    """Sweep IPv4 subnets: one ICMP pass, then TCP connects to hosts that stayed silent.
+
+    ``rate`` paces both passes; ``concurrency`` caps open TCP sockets.
+    Once ICMP worked, only silent *expected* hosts get the TCP pass (hosts
+    that filter ping) unless ``tcp_all`` is set. A TCP pass over every
+    address waits out ``timeout`` on each silent one per port: a sparse
+    /16 at the defaults is about 131k connects, roughly two minutes.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_SCAN_RATE,
+        concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+        timeout: float = DEFAULT_SCAN_TIMEOUT,
+        ports: Sequence[int] = DEFAULT_SCAN_PORTS,
+        ping: bool = True,
+        tcp_all: bool = False,
+    ) -> None:
+        if rate <= 0 or concurrency < 1:
+            raise ValueError("rate and concurrency must be positive")
+        self.rate = rate
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ports = tuple(ports)
+        self.ping = ping
+        self.tcp_all = tcp_all
+
+    async def _run_paced(self, jobs: Iterable[Awaitable[None]], pacer: _Pacer) -> None:
+        """Run TCP connects paced by ``pacer`` with at most ``concurrency`` open sockets."""
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def _guarded(job: Awaitable[None]) -> None:
+            try:
+                await job
+            finally:
+                slots.release()
+
+        tasks = set()
+        for job in jobs:
+            await slots.acquire()
+            await pacer.wait()
+            task = asyncio.ensure_future(_guarded(job))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def sweep(
+        self,
+        network: ipaddress.IPv4Network,
+        pinger: Optional[Pinger] = None,
+        expected: Collection[str] = (),
+        name: str = "",
+    ) -> SweepResult:
+        targets = sweep_targets(network)
+        live = HostBitmap(network)
+        errors: List[str] = []
+        start = time.monotonic()
+        pacer = _Pacer(self.rate)
+        icmp_used = False
+
+        if self.ping and pinger is not None and targets:
+            try:
+                # Open the socket up front so a missing ICMP capability surfaces once
+                pinger.check_available(targets[0])
+                icmp_used = True
+            except IcmpUnavailable as exc:
+                errors.append(f"ICMP unavailable, TCP only: {exc}")
+
+        if icmp_used:
+            for ip in await pinger.sweep(targets, self.timeout, pace=pacer.wait):
+                live.add(ip)
+
+        if self.ports:
+
+            async def _connect(ip: str, port: int) -> None:
+                if ip not in live and await _tcp_alive(ip, port, self.timeout):
+                    live.add(ip)
+
+            candidates = targets if self.tcp_all or not icmp_used else [ip for ip in targets if ip in expected]
+            silent = [ip for ip in candidates if ip not in live]
+            await self._run_paced((_connect(ip, port) for port in self.ports for ip in silent), pacer)
+
+        return SweepResult(network, live, len(targets), time.monotonic() - start, icmp_used, errors, name)
+
+    def sweep_all(
+        self,
+        networks: Mapping[str, ipaddress.IPv4Network],
+        on_result: Optional[Callable[[SweepResult], None]] = None,
+        expected: Optional[Mapping[str, Collection[str]]] = None,
+    ) -> List[SweepResult]:
+        """Sweep each named network in turn; ``on_result`` sees every result as it finishes.
+
+        ``expected`` lists, per network name, the addresses the TCP pass
+        still tries after a working ICMP pass. Results carry the name, so
+        two networks sharing a CIDR stay apart.
+        """
+
+        async def _main() -> List[SweepResult]:
+            pinger = Pinger() if self.ping else None
+            results: List[SweepResult] = []
+            try:
+                for name, network in networks.items():
+                    result = await self.sweep(network, pinger, (expected or {}).get(name, ()), name)
+                    if on_result is not None:
+                        on_result(result)
+                    results.append(result)
+            finally:
+                if pinger is not None:
+                    pinger.close()
+            return results
+
+        return asyncio.run(_main())
+
+
+def compare(result: SweepResult, expected: Dict[str, str]) -> Dict[str, object]:
+    """Report a sweep against the hosts the config expects (``label -> ip``)."""
+    expected_ips = set(expected.values())
+    missing = [
+        f"{label} ({ip})" for label, ip in expected.items()
+        if ipaddress.ip_address(ip) in result.network and ip not in result.live
+    ]
+    unexpected = [ip for ip in result.live if ip not in expected_ips]
+    return {
+        "probed": result.probed,
+        "live": len(result.live),
+        "elapsed_ms": round(result.elapsed * 1000, 1),
+        "icmp": result.icmp,
+        "unexpected": unexpected,
+        "missing": missing,
+        "bitmap": result.live.encode(),
+        "errors": result.errors,
+    }
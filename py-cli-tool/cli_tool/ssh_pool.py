@@ -0,0 +1,160 @@
+"""Multiplexed SSH connections for remote host facts (``uptime_check``).
+
+Connections go through OpenSSH's ControlMaster: the first command to a
+host opens a master connection whose socket lives under ``control_dir``,
+and every later command to that host, from this run, a later watch cycle
+or the next CLI invocation within ``persist`` seconds, reuses it instead
+of paying a new handshake. Authentication and host keys follow the user's
+own ssh configuration; ``BatchMode`` makes missing credentials fail fast
+instead of prompting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cli_tool.logging_config import DEFAULT_LOG_DIR
+
+DEFAULT_CONTROL_DIR = DEFAULT_LOG_DIR / "ssh"
+DEFAULT_PERSIST = 600  # seconds an idle master connection stays open
+
+# One round trip: uptime, load, memory and root filesystem usage
+FACTS_COMMAND = (
+    "cat /proc/uptime /proc/loadavg && "
+    "grep -E '^(MemTotal|MemAvailable):' /proc/meminfo && "
+    "df -Pk / | tail -n 1"
+)
+
+
+class SshError(Exception):
+    """Raised when a remote command cannot be run or its output is unusable."""
+
+
+@dataclass
+class HostFacts:
+    uptime_s: float
+    load: Tuple[float, float, float]
+    mem_total_kb: int
+    mem_available_kb: int
+    disk_total_kb: int
+    disk_used_kb: int
+
+    @property
+    def mem_used_pct(self) -> float:
+        return 100.0 * (self.mem_total_kb - self.mem_available_kb) / self.mem_total_kb if self.mem_total_kb else 0.0
+
+    @property
+    def disk_used_pct(self) -> float:
+        return 100.0 * self.disk_used_kb / self.disk_total_kb if self.disk_total_kb else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["load"] = list(self.load)
+        data["mem_used_pct"] = round(self.mem_used_pct, 1)
+        data["disk_used_pct"] = round(self.disk_used_pct, 1)
+        return data
+
+
+def parse_facts(text: str) -> HostFacts:
+    """Parse the output of ``FACTS_COMMAND``."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    try:
+        uptime_s = float(lines[0].split()[0])
+        load = tuple(float(value) for value in lines[1].split()[:3])
+        memory: Dict[str, int] = {}
+        for line in lines[2:-1]:
+            key, _, value = line.partition(":")
+            memory[key] = int(value.split()[0])
+        disk = lines[-1].split()
+        return HostFacts(
+            uptime_s=uptime_s,
+            load=load,  # type: ignore[arg-type]
+            mem_total_kb=memory["MemTotal"],
+            mem_available_kb=memory["MemAvailable"],
+            disk_total_kb=int(disk[1]),
+            disk_used_kb=int(disk[2]),
+        )
+    except (IndexError, KeyError, ValueError) as exc:
+        raise SshError(f"unexpected facts output: {exc}") from None
+
+
+class SshPool:
+    """Run commands over one multiplexed SSH connection per host."""
+
+    def __init__(
+        self,
+        control_dir: Path = DEFAULT_CONTROL_DIR,
+        persist: int = DEFAULT_PERSIST,
+        ssh_binary: str = "ssh",
+    ) -> None:
+        self.control_dir = control_dir
+        self.persist = persist
+        self.ssh_binary = ssh_binary
+        self._masters: Dict[Tuple[Optional[str], str, int], asyncio.Lock] = {}
+
+    def command(self, host: str, port: int, user: Optional[str], timeout: float, remote: str) -> List[str]:
+        target = f"{user}@{host}" if user else host
+        return [
+            self.ssh_binary,
+            "-o", "BatchMode=yes",
+            "-o", f"ConnectTimeout={max(1, math.ceil(timeout))}",
+            "-o", "ControlMaster=auto",
+            # %C hashes host, port and user, keeping the socket path short
+            "-o", f"ControlPath={self.control_dir / '%C'}",
+            "-o", f"ControlPersist={self.persist}",
+            "-p", str(port),
+            target,
+            remote,
+        ]  # fmt: skip
+
+    async def run(
+        self, host: str, remote: str, port: int = 22, user: Optional[str] = None, timeout: float = 2.0
+    ) -> str:
+        """Run ``remote`` on ``host`` and return its stdout; raise SshError on failure."""
+        if shutil.which(self.ssh_binary) is None:
+            raise SshError("ssh command not available")
+        self.control_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        key = (user, host, port)
+        lock = self._masters.get(key)
+        if lock is None:
+            # The first command opens the master; later ones wait for it so
+            # concurrent checks of one host share a single handshake
+            lock = self._masters[key] = asyncio.Lock()
+            await lock.acquire()
+            try:
+                return await self._exec(self.command(host, port, user, timeout, remote), timeout)
+            finally:
+                lock.release()
+        async with lock:
+            pass
+        return await self._exec(self.command(host, port, user, timeout, remote), timeout)
+
+    async def _exec(self, cmd: List[str], timeout: float) -> str:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as exc:
+            raise SshError(str(exc)) from None
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout + 1)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise SshError("ssh timed out") from None
+        if proc.returncode != 0:
+            message = stderr.decode(errors="replace").strip().splitlines()
+            raise SshError(message[-1] if message else f"ssh exited with status {proc.returncode}")
+        return stdout.decode(errors="replace")
+
+    async def facts(self, host: str, port: int = 22, user: Optional[str] = None, timeout: float = 2.0) -> HostFacts:
+        """Collect uptime, load, memory and disk usage in one round trip."""
+        return parse_facts(await self.run(host, FACTS_COMMAND, port, user, timeout))
@@ -0,0 +1,127 @@
+"""Bulk guest run-state sources, queried once per run instead of per VM."""
+
+from __future__ import annotations
+
+import json
+import os
+import ssl
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Type
+
+from cli_tool.config import StateProviderConfig, VMDefinition
+from cli_tool.vm_health import HealthStatus
+
+GUEST_RUNNING = "running"
+GUEST_STOPPED = "stopped"
+
+
+class StateProviderError(Exception):
+    """Raised when guest state cannot be fetched from the hypervisor."""
+
+
+@dataclass
+class GuestState:
+    name: str
+    status: str
+    vmid: Optional[int] = None
+    node: Optional[str] = None
+
+
+class StateProvider(ABC):
+    """Base class for sources that report the run state of every guest at once."""
+
+    @classmethod
+    @abstractmethod
+    def from_config(cls, cfg: StateProviderConfig) -> "StateProvider":
+        """Build the provider from its ``state_provider`` config section."""
+
+    @abstractmethod
+    def fetch(self) -> Dict[str, GuestState]:
+        """Return guest states keyed by lowercased guest name."""
+
+
+class ProxmoxStateProvider(StateProvider):
+    """Read guest state from ``/cluster/resources`` on a Proxmox VE API."""
+
+    RESOURCES_PATH = "/api2/json/cluster/resources?type=vm"
+
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        verify_tls: bool = True,
+        timeout: float = 5.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        if not verify_tls:
+            # Proxmox ships with a self-signed certificate by default
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            self._ssl_context = context
+
+    @classmethod
+    def from_config(cls, cfg: StateProviderConfig) -> "ProxmoxStateProvider":
+        token = None
+        secret = os.environ.get(cfg.token_secret_env)
+        if cfg.token_id and secret:
+            token = f"{cfg.token_id}={secret}"
+        return cls(cfg.url, token=token, verify_tls=cfg.verify_tls, timeout=cfg.timeout)
+
+    def fetch(self) -> Dict[str, GuestState]:
+        request = urllib.request.Request(self.base_url + self.RESOURCES_PATH)
+        if self.token:
+            request.add_header("Authorization", f"PVEAPIToken={self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout, context=self._ssl_context) as resp:
+                payload = json.load(resp)
+        except (urllib.error.URLError, OSError, ValueError) as exc:
+            raise StateProviderError(f"cannot fetch guest state from {self.base_url}: {exc}") from exc
+        resources = payload.get("data") if isinstance(payload, dict) else None
+        if not isinstance(resources, list):
+            raise StateProviderError("unexpected response from hypervisor: missing data list")
+        states: Dict[str, GuestState] = {}
+        for item in resources:
+            if not isinstance(item, dict) or not item.get("name"):
+                continue
+            state = GuestState(
+                name=item["name"],
+                status=str(item.get("status", "unknown")),
+                vmid=item.get("vmid"),
+                node=item.get("node"),
+            )
+            states[state.name.lower()] = state
+        return states
+
+
+PROVIDERS: Dict[str, Type[StateProvider]] = {"proxmox": ProxmoxStateProvider}
+
+
+def build_provider(cfg: StateProviderConfig) -> StateProvider:
+    return PROVIDERS[cfg.type].from_config(cfg)
+
+
+def guest_state_for(vm: VMDefinition, states: Mapping[str, GuestState]) -> Optional[GuestState]:
+    """Find the hypervisor's view of ``vm`` by name, then by short hostname."""
+    if vm.machine_type != "vm":
+        return None
+    state = states.get(vm.name.lower())
+    if state is None:
+        state = states.get(vm.hostname.split(".", 1)[0].lower())
+    return state
+
+
+def stopped_status(vm: VMDefinition, state: GuestState) -> HealthStatus:
+    where = f" on {state.node}" if state.node else ""
+    return HealthStatus(
+        name=vm.name,
+        hostname=vm.hostname,
+        status=GUEST_STOPPED,
+        reasons=[f"hypervisor reports guest {state.status}{where}; probes skipped"],
+    )
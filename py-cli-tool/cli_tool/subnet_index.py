@@ -0,0 +1,117 @@
+"""Integer-keyed longest-prefix-match index over the configured networks."""
+
+from __future__ import annotations
+
+import ipaddress
+import socket
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from cli_tool.config import Network
+
+_WIDTH = {4: 32, 6: 128}
+
+# Addresses that are never expected to belong to a configured network
+_HOST_LOCAL = [ipaddress.ip_network(n) for n in ("127.0.0.0/8", "169.254.0.0/16", "::1/128", "fe80::/10")]
+
+
+def parse_ip(ip: str) -> Tuple[int, int]:
+    """Parse an address into ``(version, integer)`` without building ip_address objects.
+
+    Raises ValueError for anything that is not a strict IPv4/IPv6 literal.
+    """
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        pass
+    try:
+        # Strip a zone index such as fe80::1%eth0
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip.split("%", 1)[0]), "big")
+    except OSError as exc:
+        raise ValueError(f"not an IP address: {ip!r}") from exc
+
+
+class SubnetIndex:
+    """Map addresses to the most specific configured network containing them.
+
+    Each address family keeps one hash table per prefix length, keyed by
+    the masked network integer, which behaves like a level-compressed
+    prefix trie. A lookup costs at most one dict probe per distinct prefix
+    length, however many networks or addresses there are.
+    """
+
+    def __init__(self, networks: Mapping[str, Network]) -> None:
+        self._tables: Dict[int, Dict[int, Dict[int, str]]] = {4: {}, 6: {}}
+        self._spans: Dict[str, Tuple[int, int, int]] = {}
+        for name, net in networks.items():
+            subnet = net.subnet()
+            self._spans[name] = (subnet.version, int(subnet.network_address), int(subnet.netmask))
+            table = self._tables[subnet.version].setdefault(subnet.prefixlen, {})
+            # First definition wins for duplicate CIDRs
+            table.setdefault(int(subnet.network_address), name)
+        self._masks: Dict[int, List[Tuple[int, int, Dict[int, str]]]] = {}
+        for version, tables in self._tables.items():
+            width = _WIDTH[version]
+            self._masks[version] = [
+                (prefixlen, ((1 << prefixlen) - 1) << (width - prefixlen), tables[prefixlen])
+                for prefixlen in sorted(tables, reverse=True)
+            ]
+        self._host_local = [
+            (n.version, int(n.network_address), int(n.netmask)) for n in _HOST_LOCAL
+        ]
+
+    def lookup_int(self, version: int, value: int) -> Optional[str]:
+        for _, mask, table in self._masks[version]:
+            name = table.get(value & mask)
+            if name is not None:
+                return name
+        return None
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """Return the name of the longest matching network, or None."""
+        try:
+            version, value = parse_ip(ip)
+        except ValueError:
+            return None
+        return self.lookup_int(version, value)
+
+    def contains(self, network: str, ip: str) -> bool:
+        """True if ``ip`` lies inside the named network's CIDR."""
+        span = self._spans.get(network)
+        try:
+            version, value = parse_ip(ip)
+        except ValueError:
+            return False
+        return span is not None and span[0] == version and value & span[2] == span[1]
+
+    def covered(self, ips: Iterable[str]) -> Set[str]:
+        """Names of every network containing at least one of ``ips``.
+
+        Unlike lookup, enclosing networks and duplicate CIDRs count too.
+        """
+        parsed = set()
+        for ip in ips:
+            try:
+                parsed.add(parse_ip(ip))
+            except ValueError:
+                continue
+        return {
+            name
+            for name, (version, base, mask) in self._spans.items()
+            if any(v == version and value & mask == base for v, value in parsed)
+        }
+
+    def map_addresses(self, ips: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Map each distinct address to its network name (None when outside all)."""
+        result: Dict[str, Optional[str]] = {}
+        for ip in ips:
+            if ip not in result:
+                result[ip] = self.lookup(ip)
+        return result
+
+    def is_host_local(self, ip: str) -> bool:
+        """True for loopback and link-local addresses."""
+        try:
+            version, value = parse_ip(ip)
+        except ValueError:
+            return False
+        return any(v == version and value & mask == base for v, base, mask in self._host_local)
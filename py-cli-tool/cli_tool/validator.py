@@ -0,0 +1,546 @@
+"""Whole-document config validation for ``validate``.
+
+Unlike ``load_config``, which stops at the first problem, this walks the
+composed YAML node graph once and reports every finding with its YAML
+path and line. Addresses are parsed to integers and the cross-checks
+(duplicate addresses and names, VMs and gateways outside their subnet,
+overlapping networks) use dict and interval lookups, so a config with
+tens of thousands of hosts validates in one linear pass.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+from yaml.constructor import SafeConstructor
+from yaml.nodes import MappingNode, ScalarNode, SequenceNode
+
+from cli_tool.config import (
+    FRAGMENT_KEYS,
+    PROXMOX_API_PORT,
+    STATE_PROVIDER_TYPES,
+    ConfigError,
+    gc_paused,
+    fragment_paths,
+    include_patterns,
+)
+from cli_tool.subnet_index import parse_ip
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+Address = Tuple[int, int]  # (IP version, integer value)
+
+_STR = "tag:yaml.org,2002:str"
+_INT = "tag:yaml.org,2002:int"
+_BOOL = "tag:yaml.org,2002:bool"
+_MERGE = "tag:yaml.org,2002:merge"
+_CHECK_BOOLS = ("ping", "uptime_check")
+_CHECK_THRESHOLDS = (("max_rtt_ms", None), ("max_loss_pct", 100.0), ("max_jitter_ms", None))
+
+
+@dataclass
+class Issue:
+    file: str
+    line: int
+    path: str
+    message: str
+    severity: str = SEVERITY_ERROR
+
+    def __str__(self) -> str:
+        return f"{self.file}:{self.line}: {self.severity}: {self.path}: {self.message}"
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Report:
+    files: List[str] = field(default_factory=list)
+    networks: int = 0
+    vms: int = 0
+    issues: List[Issue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [issue for issue in self.issues if issue.severity == SEVERITY_ERROR]
+
+    def as_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "networks": self.networks,
+            "vms": self.vms,
+            "valid": not self.errors,
+            "errors": len(self.errors),
+            "warnings": len(self.issues) - len(self.errors),
+            "issues": [issue.as_dict() for issue in self.issues],
+        }
+
+
+def _parse_ip(text: str) -> Optional[Address]:
+    try:
+        return parse_ip(text)
+    except ValueError:
+        return None
+
+
+def parse_cidr(text: str) -> Optional[Tuple[int, int, int]]:
+    """``(version, first, last)`` for a network, host bits ignored as in ``load_config``."""
+    address, sep, prefix = text.partition("/")
+    ip = _parse_ip(address)
+    if ip is None:
+        return None
+    version, value = ip
+    bits = 32 if version == 4 else 128
+    if not sep:
+        length = bits
+    elif prefix.isdigit() and prefix.isascii() and int(prefix) <= bits:
+        length = int(prefix)
+    else:
+        return None
+    host_mask = (1 << (bits - length)) - 1
+    first = value & ~host_mask
+    return version, first, first | host_mask
+
+
+def _format_ip(address: Address) -> str:
+    return str(ipaddress.ip_address(address[1]) if address[0] == 6 else ipaddress.IPv4Address(address[1]))
+
+
+class _Document:
+    """Issue collection for one YAML file, plus node helpers."""
+
+    def __init__(self, path: Path, report: Report) -> None:
+        self.file = str(path)
+        self.report = report
+        self._constructor = SafeConstructor()
+
+    def issue(self, node: Any, path: str, message: str, severity: str = SEVERITY_ERROR) -> None:
+        line = node.start_mark.line + 1 if node is not None else 1
+        self.report.issues.append(Issue(self.file, line, path, message, severity))
+
+    def value(self, node: Any) -> Any:
+        """Python value of a scalar node; containers come back as the node itself."""
+        if node.__class__ is not ScalarNode:
+            return node
+        tag = node.tag
+        if tag == _STR:
+            return node.value
+        if tag == _INT and node.value.isdigit():
+            return int(node.value)
+        if tag == _BOOL:
+            return node.value.lower() in ("true", "yes", "on")
+        try:
+            return self._constructor.construct_object(node)
+        except Exception:  # unusual scalar forms; keep the raw text
+            return node.value
+
+    def mapping(self, node: Any, path: str) -> Optional[Dict[str, Tuple[Any, Any]]]:
+        """``{key: (key_node, value_node)}``, reporting duplicate keys; None if not a mapping."""
+        if not isinstance(node, MappingNode):
+            self.issue(node, path, "must be a mapping")
+            return None
+        return self._items(node, path, report=True)
+
+    def _items(self, node: MappingNode, path: str, report: bool) -> Dict[str, Tuple[Any, Any]]:
+        # Merge keys (<<) expand like SafeConstructor.flatten_mapping: merged
+        # keys come first, earlier sources win, and explicit keys win over all
+        items: Dict[str, Tuple[Any, Any]] = {}
+        merged: Dict[str, Tuple[Any, Any]] = {}
+        for key_node, value_node in node.value:
+            if key_node.tag == _MERGE:
+                sources = value_node.value if isinstance(value_node, SequenceNode) else [value_node]
+                for source in sources:
+                    if not isinstance(source, MappingNode):
+                        if report:
+                            self.issue(source, f"{path}.<<" if path else "<<", "merge source must be a mapping")
+                        continue
+                    for key, entry in self._items(source, path, report=False).items():
+                        merged.setdefault(key, entry)
+                continue
+            key = str(self.value(key_node))
+            if key in items and report:
+                self.issue(key_node, f"{path}.{key}" if path else key, "duplicate key; only the last one is used")
+            items[key] = (key_node, value_node)
+        if not merged:
+            return items
+        merged = {key: entry for key, entry in merged.items() if key not in items}
+        merged.update(items)
+        return merged
+
+    def sequence(self, node: Any, path: str) -> Optional[List[Any]]:
+        if not isinstance(node, SequenceNode):
+            self.issue(node, path, "must be a list")
+            return None
+        return node.value
+
+
+@dataclass
+class _NetworkInfo:
+    name: str
+    doc: _Document
+    node: Any
+    version: int
+    first: int
+    last: int
+
+
+class _Validator:
+    def __init__(self) -> None:
+        self.report = Report()
+        self.networks: Dict[str, _NetworkInfo] = {}
+        self.network_nodes: Dict[str, Tuple[_Document, Any]] = {}
+        self.vm_refs: List[Tuple[_Document, Any, Any, str, Optional[Address]]] = []
+        self.vm_names: Dict[str, Tuple[_Document, Any, str]] = {}
+        self.hostnames: Dict[str, Tuple[_Document, Any, str]] = {}
+        self.vm_ips: Dict[Address, Tuple[_Document, Any, str]] = {}
+        self.expected_ips: Dict[Address, str] = {}
+
+    # -- documents ---------------------------------------------------------
+
+    def load(self, path: Path) -> Tuple[Optional[_Document], Optional[Any]]:
+        self.report.files.append(str(path))
+        doc = _Document(path, self.report)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as exc:
+            doc.issue(None, "", f"cannot read file: {exc}")
+            return None, None
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        try:
+            root = yaml.compose(text, Loader=loader)
+        except yaml.YAMLError as exc:
+            mark = getattr(exc, "problem_mark", None)
+            line = mark.line + 1 if mark is not None else 1
+            self.report.issues.append(Issue(doc.file, line, "", f"YAML syntax error: {getattr(exc, 'problem', exc)}"))
+            return None, None
+        if root is None:
+            doc.issue(None, "", "file is empty")
+            return None, None
+        return doc, root
+
+    def main(self, path: Path) -> None:
+        doc, root = self.load(path)
+        if doc is None:
+            return
+        top = doc.mapping(root, "")
+        if top is None:
+            return
+        self.environment(doc, top.get("environment"))
+        defaults = self.defaults(doc, top.get("defaults"))
+        if "networks" in top:
+            self.network_block(doc, top["networks"][1])
+        if "vms" in top:
+            self.vm_block(doc, top["vms"][1], defaults)
+
+        includes: List[str] = []
+        if "include" in top:
+            try:
+                includes = include_patterns({"include": doc.value(top["include"][1])})
+            except ConfigError as exc:
+                doc.issue(top["include"][1], "include", str(exc))
+        try:
+            fragments = fragment_paths(path, includes)
+        except ConfigError as exc:
+            doc.issue(top["include"][1] if "include" in top else None, "include", str(exc))
+            fragments = []
+        for fragment in fragments:
+            self.fragment(fragment, defaults)
+
+        self.cross_checks()
+        if "state_provider" in top:
+            self.state_provider(doc, top["state_provider"][1])
+
+    def fragment(self, path: Path, defaults: Dict[str, Any]) -> None:
+        doc, root = self.load(path)
+        if doc is None:
+            return
+        top = doc.mapping(root, "")
+        if top is None:
+            return
+        for key, (key_node, _) in top.items():
+            if key not in FRAGMENT_KEYS:
+                doc.issue(key_node, key, f"only {sorted(FRAGMENT_KEYS)} may be set in an included file")
+        if "networks" in top:
+            self.network_block(doc, top["networks"][1])
+        if "vms" in top:
+            self.vm_block(doc, top["vms"][1], defaults)
+
+    # -- sections ----------------------------------------------------------
+
+    def environment(self, doc: _Document, entry: Optional[Tuple[Any, Any]]) -> None:
+        if entry is None:
+            doc.issue(None, "environment", "is required")
+            return
+        node = doc.mapping(entry[1], "environment")
+        if node is None:
+            return
+        for key in ("name", "domain", "description"):
+            if key not in node:
+                doc.issue(entry[0], f"environment.{key}", "is required")
+            elif not isinstance(doc.value(node[key][1]), str):
+                doc.issue(node[key][1], f"environment.{key}", "must be a string")
+
+    def defaults(self, doc: _Document, entry: Optional[Tuple[Any, Any]]) -> Dict[str, Any]:
+        """The ``defaults.vm`` values VMs inherit, after checking them."""
+        if entry is None:
+            return {}
+        node = doc.mapping(entry[1], "defaults")
+        if node is None or "vm" not in node:
+            return {}
+        vm_node = doc.mapping(node["vm"][1], "defaults.vm")
+        if vm_node is None:
+            return {}
+        self.checks(doc, vm_node, "defaults.vm")
+        return {key: doc.value(value) for key, (_, value) in vm_node.items()}
+
+    def network_block(self, doc: _Document, node: Any) -> None:
+        networks = doc.mapping(node, "networks")
+        if networks is None:
+            return
+        for name, (key_node, value_node) in networks.items():
+            path = f"networks.{name}"
+            if name in self.network_nodes:
+                other_doc, other = self.network_nodes[name]
+                doc.issue(key_node, path, f"already defined at {other_doc.file}:{other.start_mark.line + 1}")
+                continue
+            self.network_nodes[name] = (doc, key_node)
+            self.network(doc, name, path, value_node)
+
+    def network(self, doc: _Document, name: str, path: str, node: Any) -> None:
+        items = doc.mapping(node, path)
+        if items is None:
+            return
+        subnet = None
+        if "cidr" not in items:
+            doc.issue(node, f"{path}.cidr", "is required")
+        else:
+            cidr_node = items["cidr"][1]
+            cidr = doc.value(cidr_node)
+            subnet = parse_cidr(cidr) if isinstance(cidr, str) else None
+            if subnet is None:
+                doc.issue(cidr_node, f"{path}.cidr", f"must be a valid CIDR, got {cidr!r}")
+            else:
+                self.networks[name] = _NetworkInfo(name, doc, cidr_node, *subnet)
+        if "gateway" not in items:
+            doc.issue(node, f"{path}.gateway", "is required")
+        else:
+            gateway_node = items["gateway"][1]
+            gateway = self.address(doc, gateway_node, f"{path}.gateway")
+            if gateway is not None and subnet is not None and not self.inside(gateway, subnet):
+                doc.issue(gateway_node, f"{path}.gateway", f"{_format_ip(gateway)} is outside {doc.value(items['cidr'][1])}")
+        if "dns_servers" in items:
+            servers = doc.sequence(items["dns_servers"][1], f"{path}.dns_servers")
+            for idx, server in enumerate(servers or []):
+                self.address(doc, server, f"{path}.dns_servers[{idx}]")
+        if "expected_hosts" in items:
+            hosts = doc.mapping(items["expected_hosts"][1], f"{path}.expected_hosts")
+            for host, (_, ip_node) in (hosts or {}).items():
+                host_path = f"{path}.expected_hosts.{host}"
+                address = self.address(doc, ip_node, host_path)
+                if address is None:
+                    continue
+                if subnet is not None and not self.inside(address, subnet):
+                    doc.issue(ip_node, host_path, f"{_format_ip(address)} is outside {name}", SEVERITY_WARNING)
+                previous = self.expected_ips.setdefault(address, host_path)
+                if previous != host_path:
+                    doc.issue(ip_node, host_path, f"{_format_ip(address)} is also used by {previous}")
+
+    def vm_block(self, doc: _Document, node: Any, defaults: Dict[str, Any]) -> None:
+        items = doc.sequence(node, "vms")
+        for idx, vm_node in enumerate(items or []):
+            self.vm(doc, f"vms[{idx}]", vm_node, defaults)
+            self.report.vms += 1
+
+    def vm(self, doc: _Document, path: str, node: Any, defaults: Dict[str, Any]) -> None:
+        items = doc.mapping(node, path)
+        if items is None:
+            return
+        name = doc.value(items["name"][1]) if "name" in items else None
+        for key in ("name", "hostname", "role"):
+            if key not in items:
+                doc.issue(node, f"{path}.{key}", "is required")
+            elif not isinstance(doc.value(items[key][1]), str):
+                doc.issue(items[key][1], f"{path}.{key}", "must be a string")
+        if isinstance(name, str):
+            path = f"{path}({name})"
+            self.unique(self.vm_names, name.lower(), doc, items["name"][1], f"{path}.name", "VM name")
+        if "hostname" in items and isinstance(doc.value(items["hostname"][1]), str):
+            hostname = doc.value(items["hostname"][1])
+            self.unique(self.hostnames, hostname.lower(), doc, items["hostname"][1], f"{path}.hostname", "hostname")
+        if "machine_type" in items and doc.value(items["machine_type"][1]) not in ("vm", "bare-metal"):
+            doc.issue(items["machine_type"][1], f"{path}.machine_type", "must be 'vm' or 'bare-metal'")
+
+        os_items = doc.mapping(items["os"][1], f"{path}.os") if "os" in items else {}
+        os_items = os_items or {}
+        family = doc.value(os_items["family"][1]) if "family" in os_items else defaults.get("os_family")
+        if not family:
+            doc.issue(node, f"{path}.os.family", "is required (or set defaults.vm.os_family)")
+        elif not isinstance(family, str):
+            doc.issue(os_items["family"][1], f"{path}.os.family", "must be a string")
+        if "version" in os_items:
+            version = doc.value(os_items["version"][1])
+            if version is not None and (isinstance(version, bool) or not isinstance(version, (str, int))):
+                doc.issue(os_items["version"][1], f"{path}.os.version", "must be string or int")
+
+        if "checks" in items:
+            checks = doc.mapping(items["checks"][1], f"{path}.checks")
+            if checks is not None:
+                self.checks(doc, checks, f"{path}.checks")
+
+        attachments = doc.sequence(items["networks"][1], f"{path}.networks") if "networks" in items else None
+        if not attachments:
+            doc.issue(node, f"{path}.networks", "must list at least one network")
+            return
+        for idx, attachment in enumerate(attachments):
+            att_path = f"{path}.networks[{idx}]"
+            att = doc.mapping(attachment, att_path)
+            if att is None:
+                continue
+            if "name" not in att or "ip" not in att:
+                doc.issue(attachment, att_path, "requires name and ip")
+                continue
+            address = self.address(doc, att["ip"][1], f"{att_path}.ip")
+            if address is not None:
+                self.unique(self.vm_ips, address, doc, att["ip"][1], f"{att_path}.ip", "address")
+            # Network names and ranges are known only once every file is read
+            self.vm_refs.append((doc, att["name"][1], att["ip"][1], att_path, address))
+
+    def checks(self, doc: _Document, items: Dict[str, Tuple[Any, Any]], path: str) -> None:
+        def _get(key: str) -> Tuple[Any, Any]:
+            node = items[key][1]
+            return node, doc.value(node)
+
+        for key in _CHECK_BOOLS:
+            if key in items and not isinstance(_get(key)[1], bool):
+                doc.issue(_get(key)[0], f"{path}.{key}", "must be a boolean")
+        if "ssh_port" in items:
+            node, port = _get("ssh_port")
+            if isinstance(port, bool) or not isinstance(port, int) or not 1 <= port <= 65535:
+                doc.issue(node, f"{path}.ssh_port", "must be an integer between 1 and 65535")
+        if "ssh_user" in items:
+            node, user = _get("ssh_user")
+            if user is not None and (not isinstance(user, str) or not user.strip()):
+                doc.issue(node, f"{path}.ssh_user", "must be a non-empty string")
+        if "interval" in items:
+            node, interval = _get("interval")
+            if interval is not None and (
+                isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0
+            ):
+                doc.issue(node, f"{path}.interval", "must be a positive number of seconds")
+        if "samples" in items:
+            node, samples = _get("samples")
+            if isinstance(samples, bool) or not isinstance(samples, int) or not 1 <= samples <= 100:
+                doc.issue(node, f"{path}.samples", "must be an integer between 1 and 100")
+        for key, upper in _CHECK_THRESHOLDS:
+            if key not in items:
+                continue
+            node, value = _get(key)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                doc.issue(node, f"{path}.{key}", "must be a non-negative number")
+            elif upper is not None and value > upper:
+                doc.issue(node, f"{path}.{key}", f"must be at most {upper:g}")
+
+    def state_provider(self, doc: _Document, node: Any) -> None:
+        items = doc.mapping(node, "state_provider")
+        if items is None:
+            return
+        provider_type = doc.value(items["type"][1]) if "type" in items else "proxmox"
+        if provider_type not in STATE_PROVIDER_TYPES:
+            doc.issue(items["type"][1], "state_provider.type", f"must be one of {sorted(STATE_PROVIDER_TYPES)}")
+        if "url" in items:
+            if not isinstance(doc.value(items["url"][1]), str):
+                doc.issue(items["url"][1], "state_provider.url", "must be a string")
+        elif "host" not in items:
+            doc.issue(node, "state_provider", f"requires url or host (the API is assumed on port {PROXMOX_API_PORT})")
+        else:
+            host = doc.value(items["host"][1])
+            if not isinstance(host, str) or host.lower() not in self.vm_names:
+                doc.issue(items["host"][1], "state_provider.host", f"references unknown VM {host!r}")
+        for key in ("token_id", "token_secret_env"):
+            if key in items and not isinstance(doc.value(items[key][1]), str):
+                doc.issue(items[key][1], f"state_provider.{key}", "must be a string")
+        if "verify_tls" in items and not isinstance(doc.value(items["verify_tls"][1]), bool):
+            doc.issue(items["verify_tls"][1], "state_provider.verify_tls", "must be a boolean")
+        if "timeout" in items:
+            timeout = doc.value(items["timeout"][1])
+            if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+                doc.issue(items["timeout"][1], "state_provider.timeout", "must be a positive number")
+
+    # -- cross-checks --------------------------------------------------------
+
+    def cross_checks(self) -> None:
+        self.report.networks = len(self.network_nodes)
+        if not self.network_nodes:
+            self.report.issues.append(Issue(self.report.files[0], 1, "networks", "at least one network is required"))
+        if not self.report.vms:
+            self.report.issues.append(Issue(self.report.files[0], 1, "vms", "at least one VM is required"))
+        for doc, name_node, ip_node, path, address in self.vm_refs:
+            name = str(doc.value(name_node))
+            if name not in self.network_nodes:
+                doc.issue(name_node, f"{path}.name", f"references unknown network {name!r}")
+                continue
+            network = self.networks.get(name)
+            if address is not None and network is not None and not self.inside(address, network):
+                doc.issue(ip_node, f"{path}.ip", f"{_format_ip(address)} is outside {name}")
+        self.overlaps()
+
+    def overlaps(self) -> None:
+        """Report networks whose ranges overlap, via one sort and sweep."""
+        ranges = sorted(self.networks.values(), key=lambda net: (net.version, net.first, -net.last))
+        widest: Optional[_NetworkInfo] = None
+        for network in ranges:
+            if widest is not None and widest.version == network.version and network.first <= widest.last:
+                network.doc.issue(
+                    network.node,
+                    f"networks.{network.name}.cidr",
+                    f"overlaps networks.{widest.name}",
+                    SEVERITY_WARNING,
+                )
+            if widest is None or widest.version != network.version or network.last > widest.last:
+                widest = network
+
+    # -- helpers ---------------------------------------------------------------
+
+    def address(self, doc: _Document, node: Any, path: str) -> Optional[Address]:
+        value = doc.value(node)
+        address = _parse_ip(value) if isinstance(value, str) else None
+        if address is None:
+            doc.issue(node, path, f"must be a valid IP address, got {value!r}")
+        return address
+
+    @staticmethod
+    def inside(address: Address, network: Any) -> bool:
+        if isinstance(network, tuple):
+            version, first, last = network
+        else:
+            version, first, last = network.version, network.first, network.last
+        return address[0] == version and first <= address[1] <= last
+
+    @staticmethod
+    def unique(
+        seen: Dict[Any, Tuple[_Document, Any, str]], key: Any, doc: _Document, node: Any, path: str, label: str
+    ) -> None:
+        first_doc, first_node, first_path = seen.setdefault(key, (doc, node, path))
+        if first_node is not node:
+            where = "" if first_doc is doc else f" in {first_doc.file}"
+            doc.issue(node, path, f"duplicate {label}; first used by {first_path}{where}")
+
+
+def validate_file(path: Path) -> Report:
+    """Validate ``path`` and its included files; every finding lands in the report."""
+    validator = _Validator()
+    if not path.is_file():
+        validator.report.files.append(str(path))
+        validator.report.issues.append(Issue(str(path), 1, "", "config file not found"))
+        return validator.report
+    with gc_paused():
+        validator.main(path)
+    validator.report.issues.sort(key=lambda issue: (issue.file != str(path), issue.file, issue.line))
+    return validator.report
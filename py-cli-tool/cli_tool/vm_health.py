@@ -2,12 +2,68 @@
 
 from __future__ import annotations
 
-import socket
-import subprocess
-from dataclasses import dataclass
-from typing import List, Tuple
+import asyncio
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
-from cli_tool.config import VMDefinition
+from cli_tool.config import VMChecks, VMDefinition
+from cli_tool.icmp import IcmpUnavailable, Pinger
+
+
+@dataclass
+class ProbeStats:
+    """Round-trip times from repeated probes of one kind (ICMP echo or TCP connect)."""
+
+    sent: int = 0
+    rtts_ms: List[float] = field(default_factory=list)
+    error: Optional[str] = None  # most recent failure
+
+    def add(self, result: Tuple[bool, str | None], rtt_ms: float) -> None:
+        self.sent += 1
+        ok, err = result
+        if ok:
+            self.rtts_ms.append(rtt_ms)
+        else:
+            self.error = err
+
+    @property
+    def received(self) -> int:
+        return len(self.rtts_ms)
+
+    @property
+    def loss_pct(self) -> float:
+        return 100.0 * (self.sent - self.received) / self.sent if self.sent else 0.0
+
+    @property
+    def avg_ms(self) -> Optional[float]:
+        return sum(self.rtts_ms) / len(self.rtts_ms) if self.rtts_ms else None
+
+    @property
+    def jitter_ms(self) -> Optional[float]:
+        """Mean absolute difference between consecutive RTTs."""
+        if len(self.rtts_ms) < 2:
+            return None
+        steps = [abs(b - a) for a, b in zip(self.rtts_ms, self.rtts_ms[1:])]
+        return sum(steps) / len(steps)
+
+    def result(self) -> Tuple[bool, str | None]:
+        """Collapse to the pass/fail form: up if any probe answered."""
+        return (True, None) if self.rtts_ms else (False, self.error)
+
+    def as_dict(self) -> dict:
+        report: dict = {"sent": self.sent, "received": self.received, "loss_pct": round(self.loss_pct, 1)}
+        if self.rtts_ms:
+            ordered = sorted(self.rtts_ms)
+            report.update(
+                min_ms=round(ordered[0], 3),
+                avg_ms=round(self.avg_ms, 3),
+                p95_ms=round(ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)], 3),
+                max_ms=round(ordered[-1], 3),
+            )
+        if self.jitter_ms is not None:
+            report["jitter_ms"] = round(self.jitter_ms, 3)
+        return report
 
 
 @dataclass
@@ -16,61 +72,114 @@ class HealthStatus:
     hostname: str
     status: str
     reasons: List[str]
+    probes: Dict[str, dict] = field(default_factory=dict)  # ProbeStats.as_dict() per probe
+    facts: Dict[str, Any] = field(default_factory=dict)  # HostFacts.as_dict() from uptime_check
 
     def as_dict(self) -> dict:
-        return {
+        data = {
             "name": self.name,
             "hostname": self.hostname,
             "status": self.status,
             "reasons": self.reasons,
         }
+        if self.probes:
+            data["probes"] = self.probes
+        if self.facts:
+            data["facts"] = self.facts
+        return data
 
 
-def _ping(ip: str, timeout: int = 2) -> Tuple[bool, str | None]:
-    cmd = ["ping", "-c", "1", "-W", str(timeout), ip]
+async def _ping(ip: str, timeout: float = 2, pinger: Optional[Pinger] = None) -> Tuple[bool, str | None]:
+    if pinger is not None:
+        try:
+            return await pinger.ping(ip, timeout)
+        except IcmpUnavailable:
+            # No ICMP socket permitted here; fall back to the setuid ping binary
+            pass
+    return await _ping_subprocess(ip, timeout)
+
+
+async def _ping_subprocess(ip: str, timeout: float = 2) -> Tuple[bool, str | None]:
+    cmd = ["ping", "-c", "1", "-W", str(int(timeout) or 1), ip]
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout + 1)
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
     except FileNotFoundError:
         return False, "ping command not available"
-    except subprocess.TimeoutExpired:
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout + 1)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
         return False, "ping timed out"
-    if result.returncode == 0:
+    if proc.returncode == 0:
         return True, None
-    return False, result.stderr.strip() or "ping failed"
+    return False, stderr.decode(errors="replace").strip() or "ping failed"
 
 
-def _probe_tcp(ip: str, port: int, timeout: int = 2) -> Tuple[bool, str | None]:
+async def _probe_tcp(ip: str, port: int, timeout: float = 2) -> Tuple[bool, str | None]:
     try:
-        with socket.create_connection((ip, port), timeout=timeout):
-            return True, None
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except asyncio.TimeoutError:
+        return False, "timed out"
     except OSError as exc:
         return False, str(exc)
-
-
-def check_vm(vm: VMDefinition, timeout: int = 2) -> HealthStatus:
-    """Run connectivity checks for a VM or host."""
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True, None
+
+
+def build_status(
+    vm: VMDefinition,
+    ping_result: Tuple[bool, str | None] | None = None,
+    ssh_result: Tuple[bool, str | None] | None = None,
+    stats: Optional[Dict[str, ProbeStats]] = None,
+    facts: Optional[Dict[str, Any]] = None,
+    facts_error: Optional[str] = None,
+) -> HealthStatus:
+    """Fold individual probe results into a HealthStatus for a VM or host.
+
+    With ``stats`` (repeated probes), the pass/fail results come from the
+    samples, each probe's summary (average latency included) is reported
+    under ``probes``, and the VM's RTT, loss and jitter thresholds are
+    applied. ``facts`` (or
+    ``facts_error``) is the outcome of the VM's ``uptime_check``.
+    """
     reasons: List[str] = []
     status = "healthy"
+    stats = stats or {}
+    if stats:
+        ping_result = stats["ping"].result() if "ping" in stats else ping_result
+        ssh_result = stats["ssh"].result() if "ssh" in stats else ssh_result
 
-    # Use first IP for reachability checks
-    primary_ip = vm.networks[0].ip if vm.networks else None
-    if vm.checks.ping and primary_ip:
-        ok, err = _ping(primary_ip, timeout)
+    if ping_result is not None:
+        ok, err = ping_result
         if not ok:
             status = "degraded"
             reasons.append(f"ping failed: {err}")
 
-    if vm.checks.ssh_port and primary_ip:
-        ok, err = _probe_tcp(primary_ip, vm.checks.ssh_port, timeout)
+    if ssh_result is not None:
+        ok, err = ssh_result
         if not ok:
             status = "degraded"
             reasons.append(f"ssh port {vm.checks.ssh_port} unreachable: {err}")
 
-    if vm.checks.uptime_check:
-        # Placeholder: without credentials we cannot check uptime
-        reasons.append("uptime_check requested but no credential mechanism implemented")
-        if status == "healthy":
+    for probe, probe_stats in stats.items():
+        breaches = _threshold_breaches(probe_stats, vm.checks)
+        if breaches and probe_stats.rtts_ms:
             status = "degraded"
+            label = "ping" if probe == "ping" else f"ssh port {vm.checks.ssh_port} connect"
+            reasons.append(f"{label} {', '.join(breaches)}")
+
+    if vm.checks.uptime_check and not facts:
+        reasons.append(f"uptime check failed: {facts_error or 'not run'}")
+        status = "degraded"
 
     if status == "healthy" and not reasons:
         reasons.append("all checks passed")
@@ -80,5 +189,27 @@ def check_vm(vm: VMDefinition, timeout: int = 2) -> HealthStatus:
         hostname=vm.hostname,
         status=status,
         reasons=reasons,
+        probes={probe: probe_stats.as_dict() for probe, probe_stats in stats.items()},
+        facts=facts or {},
     )
 
+
+def _threshold_breaches(stats: ProbeStats, checks: VMChecks) -> List[str]:
+    breaches = []
+    if checks.max_loss_pct is not None and stats.loss_pct > checks.max_loss_pct:
+        breaches.append(f"loss {stats.loss_pct:.0f}% above {checks.max_loss_pct:g}%")
+    avg = stats.avg_ms
+    if checks.max_rtt_ms is not None and avg is not None and avg > checks.max_rtt_ms:
+        breaches.append(f"avg RTT {avg:.1f} ms above {checks.max_rtt_ms:g} ms")
+    jitter = stats.jitter_ms
+    if checks.max_jitter_ms is not None and jitter is not None and jitter > checks.max_jitter_ms:
+        breaches.append(f"jitter {jitter:.1f} ms above {checks.max_jitter_ms:g} ms")
+    return breaches
+
+
+def check_vm(vm: VMDefinition, timeout: int = 2) -> HealthStatus:
+    """Run connectivity checks for a VM or host."""
+    # Imported here because the engine itself builds on this module
+    from cli_tool.check_engine import run_checks
+
+    return run_checks([vm], timeout=timeout)[0]
@@ -0,0 +1,185 @@
+"""Continuous VM monitoring that reports only status transitions."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import random
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from cli_tool.check_engine import CheckEngine
+from cli_tool.config import VMDefinition
+from cli_tool.defaults import DEFAULT_WATCH_INTERVAL, DEFAULT_WATCH_JITTER
+from cli_tool.state_provider import GuestState, StateProviderError
+
+
+@dataclass
+class Transition:
+    name: str
+    hostname: str
+    previous: Optional[str]
+    current: str
+    reasons: List[str]
+    at: float
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "hostname": self.hostname,
+            "previous": self.previous,
+            "status": self.current,
+            "reasons": self.reasons,
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.at)),
+        }
+
+
+class Watcher:
+    """Re-check VMs on jittered per-VM intervals with one long-lived engine.
+
+    The engine (and with it the ICMP sockets and per-host limits) is kept
+    for the whole run; only changes in a VM's status are reported.
+    """
+
+    def __init__(
+        self,
+        engine: CheckEngine,
+        vms: Sequence[VMDefinition],
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        jitter: float = DEFAULT_WATCH_JITTER,
+        refresh_states: Optional[Callable[[], Mapping[str, GuestState]]] = None,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be in [0, 1)")
+        self.engine = engine
+        self.vms = list(vms)
+        self.interval = interval
+        self.jitter = jitter
+        self.refresh_states = refresh_states
+        self._rng = rng or random.Random()
+        self.last_status: Dict[str, str] = {}
+
+    def interval_for(self, vm: VMDefinition) -> float:
+        return vm.checks.interval or self.interval
+
+    def _next_delay(self, base: float) -> float:
+        # Spread checks out so hosts sharing an interval do not fire in lockstep
+        return base * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    async def _check(self, index: int, on_transition: Callable[[Transition], None]) -> None:
+        vm = self.vms[index]
+        status = await self.engine.check_vm(vm)
+        previous = self.last_status.get(vm.name)
+        if previous != status.status:
+            self.last_status[vm.name] = status.status
+            on_transition(
+                Transition(
+                    name=vm.name,
+                    hostname=vm.hostname,
+                    previous=previous,
+                    current=status.status,
+                    reasons=status.reasons,
+                    at=time.time(),
+                )
+            )
+
+    async def _refresh_states(self) -> None:
+        if self.refresh_states is None:
+            return
+        try:
+            self.engine.guest_states = await asyncio.to_thread(self.refresh_states)
+        except StateProviderError:
+            # Keep the last known states; the next refresh may succeed
+            pass
+
+    async def run(
+        self,
+        on_transition: Callable[[Transition], None],
+        stop: Optional[asyncio.Event] = None,
+    ) -> None:
+        """Check every VM now, then keep re-checking each on its own schedule.
+
+        A VM is rescheduled only once its check finishes, so a slow host
+        never has two checks in flight. If a check or ``on_transition``
+        raises (say, BrokenPipeError on a closed stdout), the watcher stops
+        and re-raises that error.
+        """
+        stop = stop or asyncio.Event()
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        schedule: List[Tuple[float, int]] = [(loop.time(), idx) for idx in range(len(self.vms))]
+        heapq.heapify(schedule)
+        in_flight: Set[asyncio.Task] = set()
+        next_refresh = loop.time()
+        failures: List[BaseException] = []
+
+        def _reschedule(idx: int, task: asyncio.Task) -> None:
+            in_flight.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())
+                wakeup.set()
+                return
+            due = loop.time() + self._next_delay(self.interval_for(self.vms[idx]))
+            heapq.heappush(schedule, (due, idx))
+            wakeup.set()
+
+        while not stop.is_set() and not failures:
+            now = loop.time()
+            if now >= next_refresh:
+                await self._refresh_states()
+                next_refresh = now + self._next_delay(self.interval)
+            while schedule and schedule[0][0] <= now:
+                _, idx = heapq.heappop(schedule)
+                task = asyncio.create_task(self._check(idx, on_transition))
+                in_flight.add(task)
+                task.add_done_callback(partial(_reschedule, idx))
+            wake_at = min(schedule[0][0], next_refresh) if schedule else next_refresh
+            wakeup.clear()
+            waiters = [asyncio.ensure_future(stop.wait()), asyncio.ensure_future(wakeup.wait())]
+            await asyncio.wait(
+                waiters,
+                timeout=max(wake_at - loop.time(), 0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for waiter in waiters:
+                waiter.cancel()
+
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        if failures:
+            raise failures[0]
+
+
+def run_watch(
+    vms: Sequence[VMDefinition],
+    on_transition: Callable[[Transition], None],
+    interval: float = DEFAULT_WATCH_INTERVAL,
+    jitter: float = DEFAULT_WATCH_JITTER,
+    refresh_states: Optional[Callable[[], Mapping[str, GuestState]]] = None,
+    **engine_options: float,
+) -> None:
+    """Watch ``vms`` until interrupted (Ctrl-C)."""
+
+    async def _main() -> None:
+        engine = CheckEngine(**engine_options)
+        try:
+            await Watcher(
+                engine,
+                vms,
+                interval=interval,
+                jitter=jitter,
+                refresh_states=refresh_states,
+            ).run(on_transition)
+        finally:
+            engine.close()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,35 @@
+"""Shared fixtures for the test suite."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def config_path(tmp_path: Path) -> Path:
+    """A minimal one-VM config written to ``tmp_path/config.yaml``."""
+    config = {
+        "environment": {
+            "name": "test-env",
+            "domain": "test.local",
+            "description": "test description",
+        },
+        "defaults": {"vm": {"os_family": "debian", "os_version": "12"}},
+        "networks": {
+            "lan": {"cidr": "10.10.0.0/24", "gateway": "10.10.0.1"},
+        },
+        "vms": [
+            {
+                "name": "host1",
+                "hostname": "host1.test.local",
+                "role": "control",
+                "machine_type": "bare-metal",
+                "os": {"family": "ubuntu", "version": "25.04"},
+                "networks": [{"name": "lan", "ip": "10.10.0.10"}],
+            }
+        ],
+    }
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(json.dumps(config), encoding="utf-8")
+    return cfg
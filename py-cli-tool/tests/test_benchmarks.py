@@ -0,0 +1,33 @@
+"""Smoke test for the benchmark suite."""
+
+import json
+
+from benchmarks.__main__ import check_thresholds, main
+
+
+def test_smallest_inventory_runs_every_benchmark(tmp_path):
+    out = tmp_path / "results.json"
+    assert main(["--sizes", "10", "--repeat", "1", "--timeout", "0.1", "--output", str(out)]) == 0
+    results = json.loads(out.read_text(encoding="utf-8"))["results"]
+    assert {r["benchmark"] for r in results} == {
+        "load_config",
+        "load_config_cached",
+        "filter_vms",
+        "validate_subnets",
+        "render_json",
+        "render_text",
+        "handle_vms",
+    }
+    assert all(r["hosts"] == 10 and r["seconds"] >= 0 for r in results)
+
+
+def test_per_host_budgets_flag_regressions():
+    results = [
+        {"benchmark": "load_config", "hosts": 100, "per_host_us": 900.0},
+        {"benchmark": "load_config", "hosts": 10_000, "per_host_us": 900.0},
+        {"benchmark": "filter_vms", "hosts": 10_000, "per_host_us": 0.5},
+    ]
+    thresholds = {"min_hosts": 1000, "per_host_us": {"load_config": 400, "filter_vms": 2}}
+    assert check_thresholds(results, thresholds) == [
+        "load_config at 10000 hosts: 900.0 us/host exceeds 400 us/host"
+    ]
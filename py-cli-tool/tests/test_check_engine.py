@@ -0,0 +1,121 @@
+"""Tests for the concurrent VM check engine."""
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from cli_tool import check_engine, vm_health
+from cli_tool.config import VMChecks, VMDefinition, VMNetwork
+
+
+def _vm(name: str, ip: str, ping: bool = False, ssh_port: int = 0) -> VMDefinition:
+    return VMDefinition(
+        name=name,
+        hostname=f"{name}.test.local",
+        role="lab",
+        os_family="debian",
+        os_version="12",
+        machine_type="vm",
+        networks=[VMNetwork(name="lan", ip=ip)],
+        checks=VMChecks(ping=ping, ssh_port=ssh_port),
+    )
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    yield server.getsockname()[1]
+    server.close()
+
+
+def _closed_port() -> int:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_results_keep_config_order(listener):
+    closed = _closed_port()
+    vms = [
+        _vm("up", "127.0.0.1", ssh_port=listener),
+        _vm("down", "127.0.0.1", ssh_port=closed),
+        _vm("up-again", "127.0.0.1", ssh_port=listener),
+    ]
+    statuses = check_engine.run_checks(vms, timeout=1)
+    assert [s.name for s in statuses] == ["up", "down", "up-again"]
+    assert [s.status for s in statuses] == ["healthy", "degraded", "healthy"]
+    assert f"ssh port {closed} unreachable" in statuses[1].reasons[0]
+
+
+def test_checks_run_concurrently(monkeypatch):
+    async def slow_ping(ip, timeout, pinger=None):
+        await asyncio.sleep(0.2)
+        return False, "ping timed out"
+
+    monkeypatch.setattr(vm_health, "_ping", slow_ping)
+    vms = [_vm(f"vm{i}", f"10.0.0.{i}", ping=True) for i in range(1, 21)]
+
+    start = time.monotonic()
+    statuses = check_engine.run_checks(vms, timeout=1)
+    assert time.monotonic() - start < 1.0
+    assert all(s.status == "degraded" for s in statuses)
+
+
+def test_per_host_limit_is_respected(monkeypatch):
+    in_flight = {"now": 0, "max": 0}
+
+    async def counting_ping(ip, timeout, pinger=None):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.05)
+        in_flight["now"] -= 1
+        return True, None
+
+    monkeypatch.setattr(vm_health, "_ping", counting_ping)
+    vms = [_vm(f"alias{i}", "10.0.0.5", ping=True) for i in range(6)]
+
+    statuses = check_engine.run_checks(vms, timeout=1, per_host=2)
+    assert in_flight["max"] == 2
+    assert all(s.status == "healthy" for s in statuses)
+
+
+def test_repeated_samples_give_rtt_loss_and_jitter(monkeypatch):
+    replies = iter([(True, None), (False, "ping timed out"), (True, None), (True, None)])
+
+    async def flaky_ping(ip, timeout, pinger=None):
+        await asyncio.sleep(0.01)
+        return next(replies)
+
+    monkeypatch.setattr(vm_health, "_ping", flaky_ping)
+    monkeypatch.setattr(check_engine, "SAMPLE_SPACING", 0)
+    vm = _vm("lossy", "10.0.0.9", ping=True)
+    vm.checks = VMChecks(ping=True, ssh_port=0, samples=4, max_loss_pct=10)
+
+    (status,) = check_engine.run_checks([vm], timeout=1)
+    ping = status.probes["ping"]
+    assert (ping["sent"], ping["received"], ping["loss_pct"]) == (4, 3, 25.0)
+    assert ping["min_ms"] <= ping["avg_ms"] <= ping["p95_ms"] <= ping["max_ms"]
+    assert "jitter_ms" in ping
+    assert status.status == "degraded"
+    assert status.reasons == ["ping loss 25% above 10%"]
+
+
+def test_unanswered_first_probe_is_not_repeated(monkeypatch):
+    calls = []
+
+    async def dead_ping(ip, timeout, pinger=None):
+        calls.append(ip)
+        return False, "ping timed out"
+
+    monkeypatch.setattr(vm_health, "_ping", dead_ping)
+    vm = _vm("dead", "10.0.0.10", ping=True)
+    vm.checks = VMChecks(ping=True, ssh_port=0, samples=5)
+    (status,) = check_engine.run_checks([vm], timeout=1)
+    assert len(calls) == 1
+    assert status.reasons == ["ping failed: ping timed out"]
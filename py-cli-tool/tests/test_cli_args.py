@@ -1,46 +1,23 @@
 """Tests for CLI argument handling and subcommand routing."""
 
 import json
+import logging
 from pathlib import Path
+import subprocess
 import sys
 
 import pytest
 
+from cli_tool import check_engine
 from cli_tool import cli
 from cli_tool import env_detect
+from cli_tool import import_profile
+from cli_tool import logging_config
 from cli_tool import vm_health
 
 
-def _write_config(tmp_path: Path) -> Path:
-    config = {
-        "environment": {
-            "name": "test-env",
-            "domain": "test.local",
-            "description": "test description",
-        },
-        "defaults": {"vm": {"os_family": "debian", "os_version": "12"}},
-        "networks": {
-            "lan": {"cidr": "10.10.0.0/24", "gateway": "10.10.0.1"},
-        },
-        "vms": [
-            {
-                "name": "host1",
-                "hostname": "host1.test.local",
-                "role": "control",
-                "machine_type": "bare-metal",
-                "os": {"family": "ubuntu", "version": "25.04"},
-                "networks": [{"name": "lan", "ip": "10.10.0.10"}],
-            }
-        ],
-    }
-    cfg = tmp_path / "config.yaml"
-    cfg.write_text(json.dumps(config), encoding="utf-8")
-    return cfg
-
-
-def test_env_command_outputs_expected_fields(monkeypatch, capsys, tmp_path):
-    cfg = _write_config(tmp_path)
-    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", cfg)
+def test_env_command_outputs_expected_fields(monkeypatch, capsys, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
     monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
 
     monkeypatch.setattr(env_detect, "detect_os", lambda: env_detect.OSInfo("ubuntu", "25.04"))
@@ -57,15 +34,14 @@ def test_env_command_outputs_expected_fields(monkeypatch, capsys, tmp_path):
     assert "Host OS: ubuntu 25.04" in out
 
 
-def test_vms_command_uses_health_checks(monkeypatch, capsys, tmp_path):
-    cfg = _write_config(tmp_path)
-    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", cfg)
+def test_vms_command_uses_health_checks(monkeypatch, capsys, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
     monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
 
-    def fake_check(vm):
+    async def fake_check(self, vm):
         return vm_health.HealthStatus(name=vm.name, hostname=vm.hostname, status="healthy", reasons=["ok"])
 
-    monkeypatch.setattr(vm_health, "check_vm", fake_check)
+    monkeypatch.setattr(check_engine.CheckEngine, "check_vm", fake_check)
     monkeypatch.setattr(sys, "argv", ["prog", "vms", "--output", "json"])
 
     cli.run()
@@ -75,6 +51,28 @@ def test_vms_command_uses_health_checks(monkeypatch, capsys, tmp_path):
     assert data["vms"][0]["status"] == "healthy"
 
 
+def test_vms_ndjson_streams_one_record_per_vm(monkeypatch, capsys, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+
+    async def fake_check(self, vm):
+        return vm_health.HealthStatus(name=vm.name, hostname=vm.hostname, status="healthy", reasons=["ok"])
+
+    monkeypatch.setattr(check_engine.CheckEngine, "check_vm", fake_check)
+    monkeypatch.setattr(sys, "argv", ["prog", "vms", "--output", "ndjson"])
+
+    cli.run()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0]) == {
+        "type": "vm",
+        "name": "host1",
+        "hostname": "host1.test.local",
+        "status": "healthy",
+        "reasons": ["ok"],
+    }
+
+
 def test_config_error_causes_exit(monkeypatch, capsys, tmp_path):
     bad_cfg = tmp_path / "bad.yaml"
     bad_cfg.write_text("{}", encoding="utf-8")
@@ -87,3 +85,43 @@ def test_config_error_causes_exit(monkeypatch, capsys, tmp_path):
     assert exc.value.code == 2
     err = capsys.readouterr().err
     assert "Configuration error" in err
+
+
+def test_cli_import_does_not_load_subcommand_modules():
+    code = (
+        "import sys, cli_tool.cli; "
+        "heavy = {'cli_tool.check_engine', 'cli_tool.net_diag', 'cli_tool.env_detect', 'yaml', 'asyncio'}; "
+        "print(sorted(heavy & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(cli.__file__).resolve().parent.parent,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_log_file_is_opened_lazily(tmp_path):
+    log_path = tmp_path / "logs" / "clitool.log"
+    handler = logging_config._LazyFileHandler(log_path)
+    assert not log_path.parent.exists()
+    handler.emit(logging.LogRecord("t", logging.INFO, __file__, 1, "hello", None, None))
+    handler.close()
+    assert "hello" in log_path.read_text(encoding="utf-8")
+
+
+def test_parse_importtime_output():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   yaml.error\n"
+        "import time:      4000 |       9000 | yaml\n"
+        "some warning\n"
+    )
+    records, other = import_profile.parse_importtime(stderr)
+    assert [(r.module, r.self_us, r.cumulative_us, r.depth) for r in records] == [
+        ("yaml.error", 120, 120, 1),
+        ("yaml", 4000, 9000, 0),
+    ]
+    assert other == ["some warning"]
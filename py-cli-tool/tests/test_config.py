@@ -4,6 +4,7 @@ from pathlib import Path
 
 import pytest
 
+from cli_tool import config as config_module
 from cli_tool.config import ConfigError, load_config
 
 
@@ -90,3 +91,184 @@ vms:
     )
     with pytest.raises(ConfigError):
         load_config(cfg)
+
+
+@pytest.mark.parametrize(
+    "cidr, gateway, ip, url",
+    [
+        ("10.10.0.0/24", "10.10.0.1", "10.10.0.2", "https://10.10.0.2:8006"),
+        ("fd00:10::/64", "fd00:10::1", "fd00:10::2", "https://[fd00:10::2]:8006"),
+    ],
+)
+def test_state_provider_host_resolves_to_vm_ip(tmp_path: Path, cidr, gateway, ip, url):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(
+        f"""
+environment:
+  name: homelab
+  domain: lab.local
+  description: test env
+defaults:
+  vm:
+    os_family: debian
+networks:
+  lan:
+    cidr: {cidr}
+    gateway: {gateway}
+state_provider:
+  type: proxmox
+  host: hv
+  token_id: root@pam!cli
+  verify_tls: false
+vms:
+  - name: hv
+    hostname: hv.lab.local
+    role: hypervisor
+    machine_type: bare-metal
+    networks:
+      - name: lan
+        ip: {ip}
+""",
+        encoding="utf-8",
+    )
+    config = load_config(cfg)
+    assert config.state_provider is not None
+    assert config.state_provider.url == url
+    assert config.state_provider.verify_tls is False
+
+
+def _minimal_config(ip: str) -> str:
+    return f"""
+environment:
+  name: homelab
+  domain: lab.local
+  description: test env
+defaults:
+  vm:
+    os_family: debian
+networks:
+  lan:
+    cidr: 10.10.0.0/24
+    gateway: 10.10.0.1
+vms:
+  - name: node1
+    hostname: node1.lab.local
+    role: control
+    networks:
+      - name: lan
+        ip: {ip}
+"""
+
+
+def test_config_cache_hit_skips_parsing(tmp_path: Path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(_minimal_config("10.10.0.10"), encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+
+    first = load_config(cfg, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.pickle"))) == 1
+
+    def fail_parse(content):
+        raise AssertionError("cache hit should not re-parse YAML")
+
+    monkeypatch.setattr(config_module, "_parse_yaml", fail_parse)
+    assert load_config(cfg, cache_dir=cache_dir) == first
+
+
+def test_config_cache_invalidated_by_content_change(tmp_path: Path):
+    cfg = tmp_path / "config.yaml"
+    cache_dir = tmp_path / "cache"
+    cfg.write_text(_minimal_config("10.10.0.10"), encoding="utf-8")
+    load_config(cfg, cache_dir=cache_dir)
+    cfg.write_text(_minimal_config("10.10.0.11"), encoding="utf-8")
+    assert load_config(cfg, cache_dir=cache_dir).vms[0].networks[0].ip == "10.10.0.11"
+
+
+def test_probe_sampling_thresholds_are_validated(tmp_path: Path):
+    cfg = tmp_path / "config.yaml"
+    base = _minimal_config("10.10.0.10")
+    cfg.write_text(base + "    checks:\n      samples: 5\n      max_loss_pct: 20\n      max_rtt_ms: 50\n", encoding="utf-8")
+    checks = load_config(cfg).vms[0].checks
+    assert (checks.samples, checks.max_loss_pct, checks.max_rtt_ms, checks.max_jitter_ms) == (5, 20.0, 50.0, None)
+
+    cfg.write_text(base + "    checks:\n      max_loss_pct: 150\n", encoding="utf-8")
+    with pytest.raises(ConfigError):
+        load_config(cfg)
+
+
+def test_fragments_are_merged_and_reparsed_individually(tmp_path: Path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(
+        _minimal_config("10.10.0.10") + "include:\n  - teams/*.yaml\n",
+        encoding="utf-8",
+    )
+    teams = tmp_path / "teams"
+    teams.mkdir()
+    (teams / "storage.yaml").write_text(
+        "networks:\n  san:\n    cidr: 10.20.0.0/24\n    gateway: 10.20.0.1\n"
+        "vms:\n  - name: nas\n    hostname: nas.lab.local\n    role: storage\n"
+        "    networks:\n      - name: san\n        ip: 10.20.0.5\n",
+        encoding="utf-8",
+    )
+    conf_d = tmp_path / "conf.d"
+    conf_d.mkdir()
+    fragment = conf_d / "k8s.yaml"
+    fragment.write_text(
+        "vms:\n  - name: k8s\n    hostname: k8s.lab.local\n    role: worker\n"
+        "    networks:\n      - name: lan\n        ip: 10.10.0.20\n",
+        encoding="utf-8",
+    )
+    cache_dir = tmp_path / "cache"
+
+    config = load_config(cfg, cache_dir=cache_dir)
+    assert [vm.name for vm in config.vms] == ["node1", "nas", "k8s"]
+    assert set(config.networks) == {"lan", "san"}
+    assert config.inventory.by_ip("10.20.0.5").name == "nas"
+
+    parsed = []
+    real_parse = config_module._parse_yaml
+    monkeypatch.setattr(config_module, "_parse_yaml", lambda content: parsed.append(content) or real_parse(content))
+    assert load_config(cfg, cache_dir=cache_dir) == config
+    assert parsed == []
+
+    fragment.write_text(fragment.read_text(encoding="utf-8").replace("10.10.0.20", "10.10.0.21"), encoding="utf-8")
+    assert load_config(cfg, cache_dir=cache_dir).inventory.by_name("k8s").networks[0].ip == "10.10.0.21"
+    # The main file and the edited fragment only; storage.yaml came from its cache
+    assert len(parsed) == 2 and "10.10.0.21" in parsed[1]
+
+
+def test_fragment_cache_survives_more_fragments_than_cache_keep(monkeypatch, tmp_path: Path):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(_minimal_config("10.10.0.10"), encoding="utf-8")
+    conf_d = tmp_path / "conf.d"
+    conf_d.mkdir()
+    count = config_module.CONFIG_CACHE_KEEP * 2 + 4
+    for idx in range(count):
+        (conf_d / f"vm{idx:02d}.yaml").write_text(
+            f"vms:\n  - name: vm{idx}\n    hostname: vm{idx}.lab.local\n    role: worker\n"
+            f"    networks:\n      - name: lan\n        ip: 10.10.0.{100 + idx}\n",
+            encoding="utf-8",
+        )
+    cache_dir = tmp_path / "cache"
+    load_config(cfg, cache_dir=cache_dir)
+    assert len(list((cache_dir / "fragments").glob("*.pickle"))) == count
+
+    parsed = []
+    real_parse = config_module._parse_yaml
+    monkeypatch.setattr(config_module, "_parse_yaml", lambda content: parsed.append(content) or real_parse(content))
+    edited = conf_d / "vm00.yaml"
+    edited.write_text(edited.read_text(encoding="utf-8").replace("10.10.0.100", "10.10.0.99"), encoding="utf-8")
+    config = load_config(cfg, cache_dir=cache_dir)
+    assert config.inventory.by_name("vm0").networks[0].ip == "10.10.0.99"
+    # The main file and the edited fragment only
+    assert len(parsed) == 2 and "10.10.0.99" in parsed[1]
+
+
+def test_fragment_errors_name_the_file(tmp_path: Path):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(_minimal_config("10.10.0.10"), encoding="utf-8")
+    conf_d = tmp_path / "conf.d"
+    conf_d.mkdir()
+    (conf_d / "bad.yaml").write_text("networks:\n  lan:\n    cidr: 10.30.0.0/24\n    gateway: 10.30.0.1\n")
+    with pytest.raises(ConfigError, match=r"bad\.yaml: networks\.lan is already defined"):
+        load_config(cfg)
@@ -0,0 +1,164 @@
+"""Tests for the UDP DNS client against a local stub server."""
+
+import asyncio
+import socket
+import struct
+import threading
+
+import pytest
+
+from cli_tool import dns_client, net_diag
+from cli_tool.config import Defaults, Environment, Network, RootConfig, VMChecks
+
+RECORDS = {
+    ("dns-01.lab.local", dns_client.QTYPE_A): ["10.10.0.20"],
+    ("proxmox.lab.local", dns_client.QTYPE_A): ["10.10.0.99"],
+    ("20.0.10.10.in-addr.arpa", dns_client.QTYPE_PTR): ["dns-01.lab.local"],
+}
+SILENT = {"blackhole.lab.local"}
+
+
+def _encode(name):
+    return b"".join(bytes([len(p)]) + p.encode() for p in name.split(".")) + b"\x00"
+
+
+def _answer(query):
+    qid = struct.unpack_from("!H", query)[0]
+    qname, offset = dns_client._read_name(query, 12)
+    qtype = struct.unpack_from("!H", query, offset)[0]
+    question = query[12 : offset + 4]
+    if qname in SILENT:
+        return None
+    values = RECORDS.get((qname, qtype))
+    rcode = 0 if values else 3
+    body = b""
+    for value in values or []:
+        if qtype == dns_client.QTYPE_A:
+            rdata = socket.inet_aton(value)
+        else:
+            rdata = _encode(value)
+        # Name is a compression pointer back to the question (offset 12)
+        body += struct.pack("!HHHIH", 0xC00C, qtype, 1, 60, len(rdata)) + rdata
+    if not values:
+        soa = _encode("ns.lab.local") + _encode("admin.lab.local") + struct.pack("!IIIII", 1, 60, 60, 60, 30)
+        body += _encode("lab.local") + struct.pack("!HHIH", dns_client.QTYPE_SOA, 1, 120, len(soa)) + soa
+    header = struct.pack("!HHHHHH", qid, 0x8180 | rcode, 1, len(values or []), 0 if values else 1, 0)
+    return header + question + body
+
+
+@pytest.fixture
+def stub_dns():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.1)
+    seen = []
+    running = threading.Event()
+    running.set()
+
+    def serve():
+        while running.is_set():
+            try:
+                query, addr = sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            seen.append(query)
+            reply = _answer(query)
+            if reply:
+                sock.sendto(reply, addr)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield sock.getsockname()[1], seen
+    running.clear()
+    thread.join()
+    sock.close()
+
+
+def _run(coro_factory):
+    async def _main():
+        client = dns_client.DnsClient(timeout=0.2, retries=1)
+        try:
+            return await coro_factory(client), client
+        finally:
+            client.close()
+
+    return asyncio.run(_main())
+
+
+def test_pipelined_queries_and_ttl_cache(stub_dns):
+    port, seen = stub_dns
+    server = ("127.0.0.1", port)
+
+    async def queries(client):
+        first = await client.query_many(
+            [
+                (server, "dns-01.lab.local", dns_client.QTYPE_A),
+                (server, dns_client.reverse_name("10.10.0.20"), dns_client.QTYPE_PTR),
+                (server, "missing.lab.local", dns_client.QTYPE_A),
+            ]
+        )
+        again = await client.query(server, "DNS-01.lab.local.", dns_client.QTYPE_A)
+        return first, again
+
+    (first, again), client = _run(queries)
+    assert first[0].values(dns_client.QTYPE_A) == ["10.10.0.20"]
+    assert first[1].values(dns_client.QTYPE_PTR) == ["dns-01.lab.local"]
+    assert first[2].rcode == dns_client.RCODE_NXDOMAIN and first[2].negative_ttl == 30
+    assert again.cached
+    assert len(seen) == 3
+    assert client.latency_report()[f"127.0.0.1:{port}"]["queries"] == 3
+
+
+def test_concurrent_queries_share_one_endpoint(stub_dns, monkeypatch):
+    port, seen = stub_dns
+    server = ("127.0.0.1", port)
+    endpoints = []
+
+    class CountingProtocol(dns_client._ServerProtocol):
+        def connection_made(self, transport):
+            endpoints.append(transport)
+            super().connection_made(transport)
+
+    monkeypatch.setattr(dns_client, "_ServerProtocol", CountingProtocol)
+    names = ["dns-01.lab.local", "proxmox.lab.local", "missing.lab.local"]
+    results, _ = _run(lambda client: client.query_many([(server, name, dns_client.QTYPE_A) for name in names]))
+    assert [result.rcode for result in results] == [0, 0, dns_client.RCODE_NXDOMAIN]
+    assert len(endpoints) == 1 and len(seen) == 3
+
+
+def test_timeout_retries_then_fails(stub_dns):
+    port, seen = stub_dns
+    with pytest.raises(dns_client.DnsError):
+        _run(lambda client: client.query(("127.0.0.1", port), "blackhole.lab.local"))
+    assert len(seen) == 2
+
+
+def test_check_configured_dns_reports_mismatches(stub_dns):
+    port, _ = stub_dns
+    config = RootConfig(
+        environment=Environment(name="lab", domain="lab.local", description="d"),
+        networks={
+            "lab_lan": Network(
+                name="lab_lan",
+                cidr="10.10.0.0/24",
+                gateway="10.10.0.1",
+                dns_servers=["127.0.0.1"],
+                expected_hosts={"dns-01": "10.10.0.20", "proxmox": "10.10.0.2"},
+            ),
+            "home_wan": Network(
+                name="home_wan",
+                cidr="192.168.45.0/24",
+                gateway="192.168.45.1",
+                expected_hosts={"router_a": "192.168.45.1"},
+            ),
+        },
+        vms=[],
+        defaults=Defaults(vm_checks=VMChecks()),
+    )
+    failures, latency, uncovered = net_diag.check_configured_dns(config, timeout=0.2, retries=0, port=port)
+    assert uncovered == ["router_a"]
+    assert failures == [
+        "proxmox.lab.local: A via 127.0.0.1 returned ['10.10.0.99'], expected 10.10.0.2",
+        "proxmox.lab.local: PTR 2.0.10.10.in-addr.arpa via 127.0.0.1: NXDOMAIN",
+    ]
+    assert list(latency) == [f"127.0.0.1:{port}"]
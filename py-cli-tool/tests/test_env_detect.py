@@ -0,0 +1,40 @@
+"""Tests for host environment detection and the boot-scoped fact cache."""
+
+from cli_tool import env_detect
+
+
+def test_cpuinfo_scan_stops_at_first_flags_line(tmp_path):
+    cpuinfo = tmp_path / "cpuinfo"
+    cpuinfo.write_text(
+        "processor\t: 0\nflags\t\t: fpu vme sse2\n\nprocessor\t: 1\nflags\t\t: fpu hypervisor\n",
+        encoding="utf-8",
+    )
+    assert env_detect._cpu_has_hypervisor_flag(cpuinfo) is False
+    cpuinfo.write_text("processor\t: 0\nflags\t\t: fpu hypervisor sse2\n", encoding="utf-8")
+    assert env_detect._cpu_has_hypervisor_flag(cpuinfo) is True
+
+
+def test_host_facts_are_cached_per_boot(monkeypatch, tmp_path):
+    boot_id = tmp_path / "boot_id"
+    boot_id.write_text("boot-1\n", encoding="utf-8")
+    monkeypatch.setattr(env_detect, "BOOT_ID_PATH", boot_id)
+    calls = []
+
+    def fake_os():
+        calls.append("os")
+        return env_detect.OSInfo("debian", "12")
+
+    monkeypatch.setattr(env_detect, "detect_os", fake_os)
+    monkeypatch.setattr(
+        env_detect, "detect_virtualization", lambda: env_detect.VirtualizationInfo(True, "kvm", "QEMU")
+    )
+    cache = tmp_path / "state" / env_detect.HOST_FACTS_FILE_NAME
+
+    first = env_detect.host_facts(cache)
+    assert env_detect.host_facts(cache) == first
+    assert calls == ["os"]
+    assert first[1] == env_detect.VirtualizationInfo(True, "kvm", "QEMU")
+
+    boot_id.write_text("boot-2\n", encoding="utf-8")
+    env_detect.host_facts(cache)
+    assert calls == ["os", "os"]
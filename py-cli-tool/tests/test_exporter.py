@@ -0,0 +1,72 @@
+"""Tests for the OpenMetrics exporter behind ``serve``."""
+
+import threading
+import urllib.request
+
+from cli_tool import exporter
+
+
+def _net_report():
+    return {
+        "dns_failures": ["a: timeout"],
+        "dns_server_latency": {"10.0.0.53": {"avg_ms": 2.5, "failures": 1, "queries": 4}},
+        "subnet_warnings": [],
+        "unmatched_addresses": ["local eth0 192.0.2.2"],
+        "external_connectivity_error": None,
+    }
+
+
+def test_render_exposition_format():
+    vms = [
+        {
+            "name": 'we"ird',
+            "status": "degraded",
+            "reasons": [],
+            "probes": {"ping": {"sent": 3, "received": 2, "loss_pct": 33.3, "avg_ms": 1.5, "jitter_ms": 0.25}},
+        }
+    ]
+    refreshes = {
+        "vms": exporter.Refresh(value=vms, finished_at=100.0, duration=0.5),
+        "net": exporter.Refresh(value=_net_report(), finished_at=101.0, duration=0.1, failures=2),
+    }
+    lines = exporter.render(refreshes).decode().splitlines()
+
+    assert lines[-1] == "# EOF"
+    assert 'homelab_vm_status{vm="we\\"ird",homelab_vm_status="degraded"} 1' in lines
+    assert 'homelab_vm_status{vm="we\\"ird",homelab_vm_status="healthy"} 0' in lines
+    assert 'homelab_probe_rtt_seconds{vm="we\\"ird",probe="ping",stat="avg"} 0.0015' in lines
+    assert 'homelab_probe_loss_ratio{vm="we\\"ird",probe="ping"} 0.333' in lines
+    assert 'homelab_dns_server_rtt_seconds{server="10.0.0.53"} 0.0025' in lines
+    assert "homelab_external_up 1" in lines
+    assert 'homelab_refresh_failures_total{collector="net"} 2' in lines
+    assert "# TYPE homelab_refresh_failures counter" in lines
+
+
+def test_failed_refresh_keeps_last_good_value():
+    snapshot = exporter.Snapshot(["net"])
+    assert b"homelab_external_up" not in snapshot.body
+    snapshot.update("net", _net_report(), 0.1)
+    snapshot.update("net", None, 0.2, "boom")
+    body = snapshot.body.decode()
+    assert "homelab_external_up 1" in body
+    assert 'homelab_refresh_failures_total{collector="net"} 1' in body
+
+
+def test_scrapes_read_the_snapshot_without_collecting():
+    calls = []
+    snapshot = exporter.Snapshot(["net"])
+    refresher = exporter.Refresher("net", lambda: calls.append(1) or _net_report(), 3600, snapshot)
+    refresher.refresh()
+    server = exporter.MetricsServer(("127.0.0.1", 0), snapshot)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        for _ in range(3):
+            with urllib.request.urlopen(url, timeout=5) as response:
+                assert response.headers["Content-Type"] == exporter.CONTENT_TYPE
+                assert response.read() == snapshot.body
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert calls == [1]
@@ -0,0 +1,73 @@
+"""Tests for the run history store and the history subcommand."""
+
+import json
+import sys
+
+import pytest
+
+from cli_tool import check_engine, cli, history, vm_health
+
+
+def test_summary_counts_availability_flaps_and_percentiles(tmp_path):
+    store = history.HistoryStore(tmp_path / "history.sqlite")
+    statuses = [history.STATUS_UP, history.STATUS_DOWN, history.STATUS_STOPPED, history.STATUS_DOWN, history.STATUS_UP]
+    for run, status in enumerate(statuses):
+        store.append(
+            [
+                history.Sample("vm", "web", status, 10.0 * (run + 1) if status == history.STATUS_UP else None),
+                history.Sample("dns", "lab.local", history.STATUS_UP),
+            ],
+            at=1000 + run,
+        )
+    store.append([history.Sample("vm", "web", history.STATUS_DOWN)], at=10)  # outside the window
+
+    (web,) = store.summarize(since=1000, until=2000, kinds=["vm"])
+    assert (web.samples, web.up, web.down) == (5, 2, 2)
+    assert web.availability == 50.0
+    # up -> down, (stopped ignored), down -> up
+    assert web.flaps == 2
+    assert web.percentiles["p50"] == pytest.approx(10.0, rel=0.02)
+    assert web.percentiles["p99"] == pytest.approx(50.0, rel=0.02)
+    assert web.as_dict()["last_status"] == "up"
+    assert [s.target for s in store.summarize(since=1000, until=2000, names=["lab*"])] == ["lab.local"]
+    store.close()
+
+
+def test_vms_runs_are_recorded_and_summarized(monkeypatch, capsys, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+
+    async def fake_check(self, vm):
+        return vm_health.HealthStatus(
+            name=vm.name,
+            hostname=vm.hostname,
+            status="healthy",
+            reasons=["ok"],
+            probes={"ping": {"sent": 1, "received": 1, "loss_pct": 0.0, "avg_ms": 1.5}},
+        )
+
+    monkeypatch.setattr(check_engine.CheckEngine, "check_vm", fake_check)
+    monkeypatch.setattr(sys, "argv", ["prog", "vms", "--no-history"])
+    cli.run()
+    assert not (tmp_path / history.HISTORY_FILE_NAME).exists()
+
+    for _ in range(2):
+        monkeypatch.setattr(sys, "argv", ["prog", "vms"])
+        cli.run()
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, "argv", ["prog", "history", "--since", "1h", "-o", "json"])
+    cli.run()
+    (target,) = json.loads(capsys.readouterr().out)["history"]["targets"]
+    assert target["target"] == "host1"
+    assert target["samples"] == 2
+    assert target["availability_pct"] == 100.0
+    assert target["latency_ms"]["p50"] == pytest.approx(1.5, rel=0.02)
+
+
+def test_history_runs_without_a_config(monkeypatch, capsys, tmp_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", tmp_path / "missing.yaml")
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+    monkeypatch.setattr(sys, "argv", ["prog", "history", "-o", "json"])
+    cli.run()
+    assert json.loads(capsys.readouterr().out)["history"]["targets"] == []
@@ -0,0 +1,64 @@
+"""Tests for the in-process ICMP pinger."""
+
+import asyncio
+import struct
+
+import pytest
+
+from cli_tool import icmp, vm_health
+
+
+def _run_pinger(coro_factory):
+    async def _main():
+        pinger = icmp.Pinger()
+        try:
+            return await coro_factory(pinger)
+        finally:
+            pinger.close()
+
+    return asyncio.run(_main())
+
+
+def test_echo_request_checksum_is_valid():
+    packet = icmp.build_echo_request(ident=0x1234, seq=7)
+    icmp_type, code, _, ident, seq = struct.unpack_from("!BBHHH", packet)
+    assert (icmp_type, code, ident, seq) == (icmp.ICMP_ECHO_REQUEST, 0, 0x1234, 7)
+    # A packet including its own checksum sums to zero
+    assert icmp._checksum(packet) == 0
+
+
+def test_ping_many_loopback_from_one_socket():
+    try:
+        results = _run_pinger(lambda p: p.ping_many(["127.0.0.1", "127.0.0.2", "127.0.0.1"], 1))
+    except icmp.IcmpUnavailable:
+        pytest.skip("ICMP sockets not permitted in this environment")
+    assert results == {"127.0.0.1": (True, None), "127.0.0.2": (True, None)}
+
+
+def test_ping_unanswered_host_times_out():
+    try:
+        ok, err = _run_pinger(lambda p: p.ping("198.51.100.1", 0.2))
+    except icmp.IcmpUnavailable:
+        pytest.skip("ICMP sockets not permitted in this environment")
+    assert not ok
+    assert err
+
+
+def test_vm_health_falls_back_to_subprocess(monkeypatch):
+    class NoIcmp:
+        async def ping(self, ip, timeout):
+            raise icmp.IcmpUnavailable("denied")
+
+    async def fake_subprocess(ip, timeout):
+        return True, None
+
+    monkeypatch.setattr(vm_health, "_ping_subprocess", fake_subprocess)
+    assert asyncio.run(vm_health._ping("10.0.0.1", 1, NoIcmp())) == (True, None)
+
+
+def test_sweep_collects_responders_without_per_host_waits():
+    try:
+        answered = _run_pinger(lambda p: p.sweep(["127.0.0.1", "127.0.0.3", "198.51.100.1"], 0.3))
+    except icmp.IcmpUnavailable:
+        pytest.skip("ICMP sockets not permitted in this environment")
+    assert answered == {"127.0.0.1", "127.0.0.3"}
@@ -0,0 +1,107 @@
+"""Tests for the dnsmasq and Ansible importers and the import subcommand."""
+
+import io
+import json
+import sys
+
+from cli_tool import cli, importers
+from cli_tool.config import load_config
+
+
+def test_dnsmasq_config_and_leases():
+    conf = [
+        "domain=lab.local",
+        "dhcp-host=AA:BB:CC:DD:EE:FF,set:lab,10.10.0.7,Box,12h",
+        "dhcp-host=11:22:33:44:55:66,ignore",
+        "host-record=r610.lab.local,r610,10.10.0.2,fd00::2",
+        "address=/dns-01.lab.local/10.10.0.20",
+        "address=/lab.local/10.10.0.20",
+        "# dhcp-host=commented,10.10.0.9",
+    ]
+    hosts = [(h.name, h.ip, h.fqdn, h.mac) for h in importers.iter_dnsmasq_config(conf)]
+    assert hosts == [
+        ("box", "10.10.0.7", "box.lab.local", "aa:bb:cc:dd:ee:ff"),
+        ("r610", "10.10.0.2", "r610.lab.local", None),
+        ("dns-01", "10.10.0.20", "dns-01.lab.local", None),
+    ]
+
+    leases = [
+        "1700000000 52:54:00:00:00:01 10.10.0.51 web1 01:52:54:00:00:00:01",
+        "1700000000 52:54:00:00:00:02 10.10.0.52 * *",
+        "duid 00:01:00:01:2c:2a:7e:5f:52:54:00:00:00:01",
+    ]
+    assert [(h.name, h.ip, h.mac) for h in importers.iter_dnsmasq_leases(leases)] == [
+        ("web1", "10.10.0.51", "52:54:00:00:00:01")
+    ]
+
+
+def test_ansible_ini_and_yaml_inventories():
+    ini = """
+[k3s]
+k3s-[01:02] ansible_user=root
+nas.lab.local ansible_host="10.10.0.30"  # storage
+10.10.0.40
+[k3s:vars]
+not_a_host=1
+"""
+    hosts = [(h.name, h.ip, h.fqdn, h.groups) for h in importers.iter_ansible_ini(io.StringIO(ini))]
+    assert hosts == [
+        ("k3s-01", None, None, ["k3s"]),
+        ("k3s-02", None, None, ["k3s"]),
+        ("nas", "10.10.0.30", "nas.lab.local", ["k3s"]),
+    ]
+
+    yaml_inventory = """
+all:
+  hosts:
+    gw: {ansible_host: 10.10.0.1}
+  children:
+    mon:
+      vars: {hosts: ignored}
+      children:
+        graf:
+          hosts:
+            grafana:
+              ansible_host: 10.10.0.60
+              tags: [a, b]
+            loki:
+"""
+    hosts = [(h.name, h.ip, h.groups) for h in importers.iter_ansible_yaml(io.StringIO(yaml_inventory))]
+    assert hosts == [("gw", "10.10.0.1", []), ("grafana", "10.10.0.60", ["graf"]), ("loki", None, ["graf"])]
+
+
+def test_import_writes_fragment_the_config_merges(monkeypatch, capsys, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+    leases = tmp_path / "dnsmasq.leases"
+    leases.write_text(
+        "1700000000 52:54:00:00:00:01 10.10.0.10 host1 *\n"  # already configured
+        "1700000000 52:54:00:00:00:02 10.10.0.20 web1 *\n"
+        "1700000000 52:54:00:00:00:03 192.168.1.5 laptop *\n"
+        "1700000000 52:54:00:00:00:04 10.10.0.21 web2 *\n"
+    )
+    inventory = tmp_path / "hosts.ini"
+    inventory.write_text("[web]\nweb1 ansible_host=10.10.0.99\nweb2\n")
+    fragment = tmp_path / "conf.d" / "imported.yaml"
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["prog", "import", "--leases", str(leases), "--ansible", str(inventory), "--write", str(fragment), "-o", "json"],
+    )
+    cli.run()
+    report = json.loads(capsys.readouterr().out)["import"]
+    assert [vm["name"] for vm in report["new"]] == ["web1", "web2"]
+    assert report["existing"] == ["host1"]
+    assert report["skipped"] == ["laptop: 192.168.1.5 is outside every configured network"]
+    assert report["conflicts"] == ["web1: ansible says 10.10.0.99, keeping 10.10.0.20"]
+
+    merged = load_config(config_path)
+    web1 = merged.inventory.by_name("web1")
+    assert (web1.hostname, web1.role, web1.os_family, web1.networks[0].ip) == (
+        "web1.test.local",
+        "web",
+        "debian",
+        "10.10.0.20",
+    )
+    assert [vm.name for vm in merged.vms] == ["host1", "web1", "web2"]
@@ -0,0 +1,65 @@
+"""Tests for the indexed inventory."""
+
+from cli_tool.config import VMChecks, VMDefinition, VMNetwork
+from cli_tool.inventory import Inventory
+
+
+def _vm(name, role, ips, machine_type="vm"):
+    return VMDefinition(
+        name=name,
+        hostname=f"{name.replace('_', '-')}.lab.local",
+        role=role,
+        os_family="debian",
+        os_version="12",
+        machine_type=machine_type,
+        networks=[VMNetwork(name=net, ip=ip) for net, ip in ips],
+        checks=VMChecks(),
+    )
+
+
+INVENTORY = Inventory(
+    [
+        _vm("proxmox_hypervisor", "hypervisor", [("lab_lan", "10.10.0.2"), ("home_wan", "192.168.45.50")], "bare-metal"),
+        _vm("dns-01", "dns_dhcp", [("lab_lan", "10.10.0.20")]),
+        _vm("k3s_master01", "k3s_server", [("lab_lan", "10.10.0.40")]),
+        _vm("k3s_worker01", "k3s_agent", [("lab_lan", "10.10.0.41")]),
+        _vm("v6-host", "lab_machine", [("lab_v6", "fd00::10")]),
+    ]
+)
+
+
+def test_lookups():
+    assert INVENTORY.by_name("DNS-01").hostname == "dns-01.lab.local"
+    assert INVENTORY.by_hostname("k3s-master01.lab.local").name == "k3s_master01"
+    assert INVENTORY.by_ip("192.168.45.50").name == "proxmox_hypervisor"
+    assert INVENTORY.by_ip("fd00:0:0:0::10").name == "v6-host"
+    assert INVENTORY.by_ip("10.10.0.99") is None
+
+
+def test_grouping():
+    assert [vm.name for vm in INVENTORY.in_network("home_wan")] == ["proxmox_hypervisor"]
+    assert [vm.name for vm in INVENTORY.of_machine_type("bare-metal")] == ["proxmox_hypervisor"]
+    assert set(INVENTORY.groups("role")) == {"hypervisor", "dns_dhcp", "k3s_server", "k3s_agent", "lab_machine"}
+
+
+def test_select_combines_selectors_in_config_order():
+    assert [vm.name for vm in INVENTORY.select(names=["k3s_*", "dns-01"])] == [
+        "dns-01",
+        "k3s_master01",
+        "k3s_worker01",
+    ]
+    assert [vm.name for vm in INVENTORY.select(names=["k3s*"], roles=["k3s_agent"])] == ["k3s_worker01"]
+    assert [vm.name for vm in INVENTORY.select(networks=["lab_lan"], machine_types=["vm"])] == [
+        "dns-01",
+        "k3s_master01",
+        "k3s_worker01",
+    ]
+    assert INVENTORY.select(names=["missing"]) == []
+    assert len(INVENTORY.select()) == 5
+
+
+def test_duplicate_names_are_all_selected():
+    inventory = Inventory([_vm("dup", "a", [("lab_lan", "10.10.0.5")]), _vm("DUP", "b", [("lab_lan", "10.10.0.6")])])
+    assert inventory.by_name("dup").role == "a"
+    assert [vm.role for vm in inventory.select(names=["dup"])] == ["a", "b"]
+    assert [vm.role for vm in inventory.select(names=["du?"])] == ["a", "b"]
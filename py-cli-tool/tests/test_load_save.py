@@ -1,7 +1,12 @@
 """Test the load_save module"""
 
+import json
 import logging
+import os
+
 import pytest
+import yaml
+
 from cli_tool import load_save as ls
 
 LOGGER = logging.getLogger("test")
@@ -62,3 +67,77 @@ def test_load_yaml_raises_value_error(tmp_path):
 
     with pytest.raises(ValueError):
         ls.load_yaml(cfg, LOGGER)
+
+
+def test_convert_yaml_to_json_streams_same_output_as_json_dump(tmp_path):
+    """test the streamed JSON matches json.dump, with anchors and merge keys expanded"""
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(
+        "base: &base {ssh_port: 22, ping: yes}\n"
+        "vms:\n"
+        "  - name: web1\n"
+        "    checks: *base\n"
+        "    ip: 10.0.0.1\n"
+        "    tags: []\n"
+        "  - name: \"é\"\n"
+        "    num: 0x1F\n"
+        "    ratio: 1.5\n"
+        "    note: ~\n"
+        "    text: |\n"
+        "      two\n"
+        "      lines\n",
+        encoding="utf-8",
+    )
+    out = tmp_path / "out" / "config.json"
+
+    ls.convert_yaml_to_json(LOGGER, cfg, out)
+
+    expected = yaml.safe_load(cfg.read_text(encoding="utf-8"))
+    assert out.read_text(encoding="utf-8") == json.dumps(expected, indent=2, ensure_ascii=False)
+
+    cfg.write_text("defaults: &d {a: 1, b: 2}\nvm:\n  b: 3\n  <<: *d\n  c: 4\n", encoding="utf-8")
+    ls.convert_yaml_to_json(LOGGER, cfg, out)
+    vm = json.loads(out.read_text(encoding="utf-8"))["vm"]
+    assert vm == yaml.safe_load(cfg.read_text(encoding="utf-8"))["vm"]
+    # Own keys first, then merged ones (safe_load would give a, b, c)
+    assert list(vm) == ["b", "c", "a"]
+
+
+@pytest.mark.parametrize(
+    "yaml_text",
+    ["", "- hosts\n", "a: 1\na: 2\n", "a: 1\n---\nb: 2\n"],
+)
+def test_convert_yaml_to_json_rejects_and_keeps_destination(tmp_path, yaml_text):
+    """test the case of empty, non-mapping, duplicate-key and multi-document YAML"""
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(yaml_text, encoding="utf-8")
+    out = tmp_path / "config.json"
+    out.write_text("{}", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        ls.convert_yaml_to_json(LOGGER, cfg, out)
+    assert out.read_text(encoding="utf-8") == "{}"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["config.json", "config.yaml"]
+
+
+def test_convert_yaml_tree_skips_unchanged_files(tmp_path):
+    """test the directory mode converts in parallel and skips files unchanged since last run"""
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    for name in ("a.yaml", "b.yaml", "sub/c.yml"):
+        (src / name).write_text(f"name: {name}\n", encoding="utf-8")
+    (src / "bad.yaml").write_text("- not a mapping\n", encoding="utf-8")
+    dest = tmp_path / "json"
+
+    result = ls.convert_yaml_tree(LOGGER, src, dest, workers=2)
+    assert sorted(p.name for p in result.converted) == ["a.yaml", "b.yaml", "c.yml"]
+    assert list(result.failed) == [src / "bad.yaml"]
+    assert (dest / "sub" / "c.json").read_text(encoding="utf-8") == '{\n  "name": "sub/c.yml"\n}'
+
+    os.utime(src / "a.yaml", ns=(1, 1))  # touched, same content
+    (src / "b.yaml").write_text("name: changed\n", encoding="utf-8")
+    result = ls.convert_yaml_tree(LOGGER, src, dest, workers=2)
+    assert [p.name for p in result.converted] == ["b.yaml"]
+    assert sorted(p.name for p in result.skipped) == ["a.yaml", "c.yml"]
+
+    assert len(ls.convert_yaml_tree(LOGGER, src, dest, force=True).converted) == 3
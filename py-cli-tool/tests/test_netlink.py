@@ -0,0 +1,58 @@
+"""Tests for the rtnetlink reader and its /proc/net fallback."""
+
+from cli_tool import net_diag, netlink
+
+
+def test_netlink_dump_sees_loopback():
+    state = netlink.collect()
+    links = {link.name: link for link in state.links}
+    assert "lo" in links
+    assert "127.0.0.1" in state.addresses_by_link()["lo"]
+    assert all(route.family in (4, 6) for route in state.routes)
+
+
+def test_procfs_fallback_parses_route_tables(tmp_path):
+    (tmp_path / "dev").write_text(
+        "Inter-|   Receive\n face |bytes\n    lo: 0 0 0 0\n  eth0: 0 0 0 0\n", encoding="utf-8"
+    )
+    (tmp_path / "route").write_text(
+        "Iface\tDestination\tGateway\tFlags\tRefCnt\tUse\tMetric\tMask\tMTU\tWindow\tIRTT\n"
+        "eth0\t00000000\t010200C0\t0003\t0\t0\t0\t00000000\t0\t0\t0\n"
+        "eth0\t000200C0\t00000000\t0001\t0\t0\t0\t00FFFFFF\t0\t0\t0\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "if_inet6").write_text(
+        "fd000000000000000000000000000002 04 40 00 80     eth0\n", encoding="utf-8"
+    )
+    (tmp_path / "ipv6_route").write_text(
+        "fd000000000000000000000000000000 40 00000000000000000000000000000000 00 "
+        "00000000000000000000000000000000 00000100 00000001 00000000 00000001     eth0\n"
+        "ff000000000000000000000000000000 08 00000000000000000000000000000000 00 "
+        "00000000000000000000000000000000 00000100 00000001 00000000 00000001     eth0\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "arp").write_text(
+        "IP address       HW type     Flags       HW address            Mask     Device\n"
+        "192.0.2.1        0x1         0x2         02:fc:00:00:00:05     *        eth0\n",
+        encoding="utf-8",
+    )
+    state = netlink._dump_procfs(tmp_path)
+    assert state.source == "procfs"
+    assert [route.describe() for route in state.routes] == [
+        "default via 192.0.2.1 dev eth0",
+        "192.0.2.0/24 dev eth0 scope link",
+        "fd00::/64 dev eth0 metric 256",
+    ]
+    assert "fd00::2" in state.addresses_by_link()["eth0"]
+    assert state.neighbours[0].lladdr == "02:fc:00:00:00:05"
+
+
+def test_collect_falls_back_when_netlink_fails(monkeypatch):
+    def _unavailable():
+        raise OSError("netlink unavailable")
+
+    monkeypatch.setattr(netlink, "_dump_netlink", _unavailable)
+    fallback = netlink.NetworkState(links=[netlink.Link(index=1, name="lo")], source="procfs")
+    state = netlink.collect(fallback=lambda: fallback)
+    assert state.source == "procfs"
+    assert [iface.name for iface in net_diag.collect_interfaces(state)] == ["lo"]
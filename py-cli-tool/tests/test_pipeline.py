@@ -0,0 +1,63 @@
+"""Tests for the concurrent stage pipeline."""
+
+import time
+
+import pytest
+
+from cli_tool.pipeline import Stage, run_stages
+
+
+def test_independent_stages_overlap_and_dependencies_see_inputs():
+    def _slow(value):
+        def _run():
+            time.sleep(0.2)
+            return value
+
+        return _run
+
+    start = time.perf_counter()
+    results = run_stages(
+        [
+            Stage("a", _slow(1)),
+            Stage("b", _slow(2)),
+            Stage("sum", lambda a, b: a + b, after=("a", "b")),
+        ]
+    )
+    assert time.perf_counter() - start < 0.35
+    assert results["sum"].value == 3
+    assert list(results) == ["a", "b", "sum"]
+    assert results["a"].timing()["status"] == "ok"
+
+
+def test_timeout_and_error_skip_dependents():
+    def _boom():
+        raise RuntimeError("broken")
+
+    start = time.perf_counter()
+    results = run_stages(
+        [
+            Stage("hang", lambda: time.sleep(5), timeout=0.1, default="fallback"),
+            Stage("after_hang", lambda value: value, after=("hang",), default=[]),
+            Stage("boom", _boom, default=0),
+        ]
+    )
+    assert time.perf_counter() - start < 1.0
+    assert results["hang"].status == "timeout"
+    assert results["hang"].value == "fallback"
+    assert results["after_hang"].status == "skipped"
+    assert results["after_hang"].value == []
+    assert results["boom"].timing() == {"status": "error", "elapsed_ms": pytest.approx(0, abs=50), "error": "broken"}
+
+
+def test_on_result_reports_in_completion_order():
+    seen = []
+    run_stages(
+        [Stage("slow", lambda: time.sleep(0.1)), Stage("fast", lambda: None)],
+        on_result=lambda result: seen.append(result.name),
+    )
+    assert seen == ["fast", "slow"]
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError):
+        run_stages([Stage("a", lambda b: b, after=("b",)), Stage("b", lambda a: a, after=("a",))])
@@ -0,0 +1,56 @@
+"""Tests for profiling spans, timing trees and Chrome trace export."""
+
+import asyncio
+import json
+import sys
+
+from cli_tool import cli, profiling
+from cli_tool.pipeline import Stage, run_stages
+
+
+def test_span_is_a_noop_without_a_recorder():
+    assert profiling.span("idle") is profiling.span("other")
+    with profiling.span("idle") as span:
+        assert span is None
+
+
+def test_spans_nest_across_tasks_and_stage_threads():
+    recorder = profiling.start()
+    try:
+        with profiling.span("root"):
+
+            async def _probe(name):
+                with profiling.span(name):
+                    await asyncio.sleep(0)
+
+            async def _main():
+                await asyncio.gather(_probe("a"), _probe("b"))
+
+            asyncio.run(_main())
+            run_stages([Stage("one", lambda: 1)])
+    finally:
+        profiling.stop()
+
+    (root,) = recorder.tree()
+    assert [child["name"] for child in root["children"]] == ["a", "b", "stage one"]
+    trace = recorder.chrome_trace()["traceEvents"]
+    assert {event["name"] for event in trace} == {"root", "a", "b", "stage one"}
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in trace)
+    lanes = {event["name"]: event["tid"] for event in trace}
+    assert lanes["a"] != lanes["b"]
+
+
+def test_profile_flag_adds_timings_to_json(monkeypatch, capsys, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+    trace = tmp_path / "trace.json"
+    monkeypatch.setattr(
+        sys, "argv", ["prog", "env", "--profile", "--trace-file", str(trace), "--output", "json"]
+    )
+
+    cli.run()
+    data = json.loads(capsys.readouterr().out)
+    (root,) = data["timings"]
+    assert root["name"] == "run env"
+    assert [child["name"] for child in root["children"]] == ["config.load", "command env"]
+    assert {event["name"] for event in json.loads(trace.read_text())["traceEvents"]} >= {"run env", "config.load"}
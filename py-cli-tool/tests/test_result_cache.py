@@ -0,0 +1,113 @@
+"""Tests for the on-disk probe result cache."""
+
+import json
+import sys
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+from cli_tool import check_engine, cli, result_cache, vm_health
+from cli_tool.commands.vms import _vm_cache_key
+from cli_tool.config import StateProviderConfig, load_config
+from cli_tool.result_cache import ResultCache, make_key
+
+
+def test_ttl_expiry(tmp_path):
+    with ResultCache(tmp_path / "cache.sqlite") as cache:
+        key = make_key("dns", "dns-01.lab.local")
+        cache.put(key, {"error": None})
+        assert cache.get(key, max_age=60) == {"error": None}
+        time.sleep(0.05)
+        assert cache.get(key, max_age=0.01) is None
+
+
+def test_key_includes_check_parameters():
+    assert make_key("vm", "dns-01", {"ssh_port": 22}) != make_key("vm", "dns-01", {"ssh_port": 2222})
+    assert make_key("vm", "a", {"x": 1, "y": 2}) == make_key("vm", "a", {"y": 2, "x": 1})
+
+
+def test_vm_key_covers_overrides_and_state_provider(config_path):
+    vm = load_config(config_path).vms[0]
+    provider = StateProviderConfig(type="proxmox", url="https://10.10.0.2:8006")
+    keys = {
+        _vm_cache_key(vm, 5.0),
+        _vm_cache_key(vm, 5.0, provider),
+        _vm_cache_key(replace(vm, checks=replace(vm.checks, ping=False)), 5.0),
+        _vm_cache_key(replace(vm, checks=replace(vm.checks, samples=5, max_loss_pct=10.0)), 5.0),
+    }
+    assert len(keys) == 4
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    with ResultCache(tmp_path / "cache.sqlite", max_entries=2) as cache:
+        cache.put("a", 1)
+        time.sleep(0.01)
+        cache.put("b", 2)
+        time.sleep(0.01)
+        assert cache.get("a", max_age=60) == 1
+        time.sleep(0.01)
+        cache.put("c", 3)
+        assert cache.get_many(["a", "b", "c"], max_age=60) == {"a": 1, "c": 3}
+
+
+def test_concurrent_writers(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    ResultCache(path).close()
+    errors = []
+
+    def writer(worker):
+        try:
+            with ResultCache(path) as cache:
+                for i in range(50):
+                    cache.put(f"{worker}-{i}", i)
+        except Exception as exc:  # pragma: no cover - surfaced by the assert below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with ResultCache(path) as cache:
+        assert len(cache.get_many([f"{w}-{i}" for w in range(4) for i in range(50)], 60)) == 200
+
+
+def test_vms_reuses_cached_results(monkeypatch, capsys, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+    calls = []
+
+    async def fake_check(self, vm):
+        calls.append(vm.name)
+        return vm_health.HealthStatus(name=vm.name, hostname=vm.hostname, status="healthy", reasons=["ok"])
+
+    monkeypatch.setattr(check_engine.CheckEngine, "check_vm", fake_check)
+    monkeypatch.setattr(sys, "argv", ["prog", "vms", "--output", "json", "--max-age", "60"])
+
+    cli.run()
+    first = json.loads(capsys.readouterr().out)
+    cli.run()
+    second = json.loads(capsys.readouterr().out)
+    assert calls == ["host1"]
+    assert (tmp_path / result_cache.CACHE_FILE_NAME).exists()
+    assert second == first
+
+
+def test_vms_closes_cache_when_checks_fail(monkeypatch, tmp_path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_CONFIG_PATH", config_path)
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+    closed = []
+    real_close = ResultCache.close
+    monkeypatch.setattr(ResultCache, "close", lambda self: closed.append(self) or real_close(self))
+
+    def failing_run_checks(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(check_engine, "run_checks", failing_run_checks)
+    monkeypatch.setattr(sys, "argv", ["prog", "vms", "--max-age", "60"])
+    with pytest.raises(RuntimeError):
+        cli.run()
+    assert len(closed) == 1
@@ -0,0 +1,114 @@
+"""Tests for subnet sweeps and the net scan report."""
+
+import base64
+import ipaddress
+import json
+import socket
+import sys
+
+import pytest
+
+from cli_tool import cli, scan
+
+
+def test_bitmap_tracks_hosts_compactly():
+    bitmap = scan.HostBitmap(ipaddress.ip_network("10.0.0.0/16"))
+    for ip in ("10.0.0.1", "10.0.255.254", "10.0.1.0"):
+        bitmap.add(ip)
+    assert "10.0.1.0" in bitmap and "10.0.0.2" not in bitmap and "10.1.0.1" not in bitmap
+    assert len(bitmap) == 3
+    assert list(bitmap) == ["10.0.0.1", "10.0.1.0", "10.0.255.254"]
+    assert len(base64.b64decode(bitmap.encode())) == 8192
+
+
+def test_sweeps_larger_than_a_slash_16_are_refused():
+    assert len(scan.sweep_targets(ipaddress.ip_network("10.0.0.0/24"))) == 254
+    with pytest.raises(ValueError):
+        scan.sweep_targets(ipaddress.ip_network("10.0.0.0/15"))
+
+
+def test_tcp_sweep_counts_refused_connections_as_live():
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        sweeper = scan.Sweeper(rate=1000, timeout=0.5, ports=(port,), ping=False)
+        (result,) = sweeper.sweep_all({"lo": ipaddress.ip_network("127.0.0.0/30")})
+    assert sorted(result.live) == ["127.0.0.1", "127.0.0.2"]
+    assert not result.icmp and result.name == "lo"
+
+
+def test_tcp_pass_after_icmp_probes_only_silent_expected_hosts(monkeypatch):
+    class _Pinger:
+        def check_available(self, ip):
+            pass
+
+        async def sweep(self, targets, timeout, pace):
+            return ["10.0.0.1"]
+
+        def close(self):
+            pass
+
+    probed = []
+
+    async def fake_tcp_alive(ip, port, timeout):
+        probed.append((ip, port))
+        return False
+
+    monkeypatch.setattr(scan, "_tcp_alive", fake_tcp_alive)
+    monkeypatch.setattr(scan, "Pinger", _Pinger)
+    network = ipaddress.ip_network("10.0.0.0/24")
+    scan.Sweeper(ports=(22,)).sweep_all({"lan": network}, expected={"lan": {"10.0.0.1", "10.0.0.7"}})
+    assert probed == [("10.0.0.7", 22)]
+
+    probed.clear()
+    scan.Sweeper(ports=(22,), tcp_all=True).sweep_all({"lan": network})
+    assert len(probed) == 253
+
+
+def test_compare_reports_unexpected_and_missing():
+    network = ipaddress.ip_network("10.0.0.0/29")
+    live = scan.HostBitmap(network)
+    live.add("10.0.0.1")
+    live.add("10.0.0.5")
+    result = scan.SweepResult(network, live, probed=6, elapsed=0.1, icmp=True)
+    report = scan.compare(result, {"gateway": "10.0.0.1", "db": "10.0.0.2", "elsewhere": "10.9.0.1"})
+    assert report["unexpected"] == ["10.0.0.5"]
+    assert report["missing"] == ["db (10.0.0.2)"]
+    assert report["live"] == 2
+
+
+def test_net_scan_subcommand(monkeypatch, capsys, tmp_path):
+    config = {
+        "environment": {"name": "t", "domain": "t.local", "description": "d"},
+        "defaults": {"vm": {"os_family": "debian", "os_version": "12"}},
+        "networks": {
+            "loop": {"cidr": "127.0.0.0/30", "gateway": "127.0.0.1"},
+            # Same CIDR under another name: reported separately, without vm1
+            "loop_alias": {"cidr": "127.0.0.0/30", "gateway": "127.0.0.1"},
+            "v6": {"cidr": "fd00:1::/64", "gateway": "fd00:1::1"},
+        },
+        "vms": [
+            {
+                "name": "vm1",
+                "hostname": "vm1.t.local",
+                "role": "x",
+                "machine_type": "vm",
+                "os": {"family": "debian", "version": "12"},
+                "networks": [{"name": "loop", "ip": "127.0.0.2"}],
+            }
+        ],
+    }
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+    monkeypatch.setattr(
+        sys, "argv", ["prog", "net", "scan", "-c", str(cfg), "--skip-ping", "--tcp-port", "9", "-o", "json"]
+    )
+
+    cli.run()
+    reports = {entry["network"]: entry for entry in json.loads(capsys.readouterr().out)["scan"]}
+    assert reports["v6"]["error"]
+    assert reports["loop"]["live"] == 2
+    assert reports["loop"]["unexpected"] == [] and reports["loop"]["missing"] == []
+    assert reports["loop_alias"]["unexpected"] == ["127.0.0.2"]
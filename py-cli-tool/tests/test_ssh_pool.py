@@ -0,0 +1,100 @@
+"""Tests for multiplexed SSH fact collection, against a stand-in ssh binary."""
+
+import asyncio
+import os
+import sys
+import textwrap
+
+from cli_tool import check_engine, ssh_pool
+from cli_tool.config import VMChecks, VMDefinition, VMNetwork
+
+FACTS_OUTPUT = """\
+90061.52 180000.10
+0.25 0.50 0.75 1/234 5678
+MemTotal:        4000000 kB
+MemAvailable:    1000000 kB
+/dev/sda1 20000000 5000000 15000000 25% /
+"""
+
+
+def _fake_ssh(tmp_path, monkeypatch, fail: str = ""):
+    """Install an ``ssh`` that logs its argv and, like a ControlMaster, only
+    "handshakes" when the control socket does not exist yet."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "ssh"
+    script.write_text(
+        textwrap.dedent(
+            f"""\
+            #!{sys.executable}
+            import pathlib, sys
+            args = sys.argv[1:]
+            log = pathlib.Path({str(tmp_path / "ssh.log")!r})
+            control = pathlib.Path(next(a.split("=", 1)[1] for a in args if a.startswith("ControlPath=")))
+            event = "reuse" if control.exists() else "handshake"
+            control.touch()
+            with log.open("a") as fh:
+                fh.write(event + " " + " ".join(args) + "\\n")
+            if {fail!r}:
+                sys.stderr.write({fail!r} + "\\n")
+                sys.exit(255)
+            sys.stdout.write({FACTS_OUTPUT!r})
+            """
+        )
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path / "ssh.log"
+
+
+def _vm(name: str) -> VMDefinition:
+    return VMDefinition(
+        name=name,
+        hostname=f"{name}.test.local",
+        role="lab",
+        os_family="debian",
+        os_version="12",
+        machine_type="vm",
+        networks=[VMNetwork(name="lan", ip="10.0.0.5")],
+        checks=VMChecks(ping=False, ssh_port=0, uptime_check=True, ssh_user="ops"),
+    )
+
+
+def test_parse_facts():
+    facts = ssh_pool.parse_facts(FACTS_OUTPUT)
+    assert facts.uptime_s == 90061.52
+    assert facts.load == (0.25, 0.5, 0.75)
+    assert facts.mem_used_pct == 75.0
+    assert facts.disk_used_pct == 25.0
+
+
+def test_checks_share_one_master_connection(tmp_path, monkeypatch):
+    log = _fake_ssh(tmp_path, monkeypatch)
+
+    async def _main():
+        engine = check_engine.CheckEngine(timeout=1, ssh_pool=ssh_pool.SshPool(control_dir=tmp_path / "ctl"))
+        first = await asyncio.gather(*(engine.check_vm(_vm(f"vm{i}")) for i in range(3)))
+        # A later cycle of the same engine, as in watch mode
+        return first + [await engine.check_vm(_vm("vm0"))]
+
+    statuses = asyncio.run(_main())
+    assert [s.status for s in statuses] == ["healthy"] * 4
+    assert statuses[0].facts["load"] == [0.25, 0.5, 0.75]
+    assert statuses[0].facts["mem_used_pct"] == 75.0
+
+    calls = log.read_text().splitlines()
+    assert [call.split()[0] for call in calls] == ["handshake", "reuse", "reuse", "reuse"]
+    assert "ControlMaster=auto" in calls[0] and "BatchMode=yes" in calls[0]
+    assert " -p 22 ops@10.0.0.5 " in calls[0]
+
+
+def test_ssh_failure_degrades_vm(tmp_path, monkeypatch):
+    _fake_ssh(tmp_path, monkeypatch, fail="ops@10.0.0.5: Permission denied (publickey).")
+    engine_pool = ssh_pool.SshPool(control_dir=tmp_path / "ctl")
+
+    async def _main():
+        return await check_engine.CheckEngine(timeout=1, ssh_pool=engine_pool).check_vm(_vm("vm0"))
+
+    status = asyncio.run(_main())
+    assert status.status == "degraded"
+    assert status.reasons == ["uptime check failed: ops@10.0.0.5: Permission denied (publickey)."]
@@ -0,0 +1,106 @@
+"""Tests for bulk guest state providers."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from cli_tool import check_engine, vm_health
+from cli_tool.config import VMChecks, VMDefinition, VMNetwork
+from cli_tool.state_provider import ProxmoxStateProvider, StateProvider, StateProviderError
+
+RECORDED_RESOURCES = {
+    "data": [
+        {"id": "qemu/101", "vmid": 101, "name": "dns-01", "node": "r610", "status": "running", "type": "qemu"},
+        {"id": "qemu/102", "vmid": 102, "name": "fedora-vm", "node": "r610", "status": "stopped", "type": "qemu"},
+        {"id": "lxc/103", "vmid": 103, "name": "k3s-master01", "node": "r610", "status": "stopped", "type": "lxc"},
+    ]
+}
+
+
+@pytest.fixture
+def proxmox_stub():
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append((self.path, self.headers.get("Authorization")))
+            body = json.dumps(RECORDED_RESOURCES).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def _vm(name: str, hostname: str, machine_type: str = "vm") -> VMDefinition:
+    return VMDefinition(
+        name=name,
+        hostname=hostname,
+        role="lab",
+        os_family="debian",
+        os_version="12",
+        machine_type=machine_type,
+        networks=[VMNetwork(name="lan", ip="10.10.0.20")],
+        checks=VMChecks(ping=True, ssh_port=22, samples=1),
+    )
+
+
+def test_fetch_uses_one_bulk_request(proxmox_stub):
+    url, requests = proxmox_stub
+    states = ProxmoxStateProvider(url, token="root@pam!cli=secret").fetch()
+    assert requests == [("/api2/json/cluster/resources?type=vm", "PVEAPIToken=root@pam!cli=secret")]
+    assert states["fedora-vm"].status == "stopped"
+    assert states["dns-01"].vmid == 101
+
+
+def test_unreachable_provider_raises():
+    with pytest.raises(StateProviderError):
+        ProxmoxStateProvider("http://127.0.0.1:9", timeout=0.5).fetch()
+
+
+def test_incomplete_provider_fails_at_construction():
+    class NoFetch(StateProvider):
+        @classmethod
+        def from_config(cls, cfg):
+            return cls()
+
+    with pytest.raises(TypeError, match="fetch"):
+        NoFetch.from_config(None)
+
+
+def test_stopped_guests_are_not_probed(proxmox_stub, monkeypatch):
+    url, _ = proxmox_stub
+    probed = []
+
+    async def fake_ping(ip, timeout, pinger=None):
+        probed.append(ip)
+        return True, None
+
+    async def fake_tcp(ip, port, timeout):
+        return True, None
+
+    monkeypatch.setattr(vm_health, "_ping", fake_ping)
+    monkeypatch.setattr(vm_health, "_probe_tcp", fake_tcp)
+    vms = [
+        _vm("dns-01", "dns-01.lab.local"),
+        _vm("fedora-vm", "fedora-vm.lab.local"),
+        _vm("k3s_master01", "k3s-master01.lab.local"),
+        _vm("r610", "r610.lab.local", machine_type="bare-metal"),
+    ]
+    states = ProxmoxStateProvider(url).fetch()
+    statuses = check_engine.run_checks(vms, guest_states=states)
+
+    assert [s.status for s in statuses] == ["healthy", "stopped", "stopped", "healthy"]
+    assert len(probed) == 2
@@ -0,0 +1,80 @@
+"""Tests for the longest-prefix-match subnet index."""
+
+import pytest
+
+from cli_tool import net_diag
+from cli_tool.config import Environment, Defaults, Network, RootConfig, VMChecks, VMDefinition, VMNetwork
+from cli_tool.net_diag import InterfaceInfo
+from cli_tool.subnet_index import SubnetIndex, parse_ip
+
+NETWORKS = {
+    "lab_lan": Network(
+        name="lab_lan",
+        cidr="10.10.0.0/24",
+        gateway="10.10.0.1",
+        expected_hosts={"dns-01": "10.10.0.20", "stray": "10.20.0.5"},
+    ),
+    "lab_servers": Network(name="lab_servers", cidr="10.10.0.128/25", gateway="10.10.0.129"),
+    "home_wan": Network(name="home_wan", cidr="192.168.45.0/24", gateway="192.168.45.1"),
+    "lab_v6": Network(name="lab_v6", cidr="fd00:10::/64", gateway="fd00:10::1"),
+}
+
+
+def test_parse_ip_is_strict():
+    assert parse_ip("10.0.0.1") == (4, 0x0A000001)
+    assert parse_ip("fe80::1%eth0")[0] == 6
+    with pytest.raises(ValueError):
+        parse_ip("10.1")
+
+
+def test_longest_prefix_wins():
+    index = SubnetIndex(NETWORKS)
+    assert index.lookup("10.10.0.20") == "lab_lan"
+    assert index.lookup("10.10.0.200") == "lab_servers"
+    assert index.lookup("fd00:10::abcd") == "lab_v6"
+    assert index.lookup("172.17.0.1") is None
+    assert index.map_addresses(["192.168.45.7", "8.8.8.8"]) == {"192.168.45.7": "home_wan", "8.8.8.8": None}
+
+
+def test_validate_subnets_and_map_addresses():
+    interfaces = [
+        InterfaceInfo(name="lo", addresses=["127.0.0.1", "::1"]),
+        InterfaceInfo(name="vmbr1", addresses=["10.10.0.2", "fe80::1"]),
+        InterfaceInfo(name="docker0", addresses=["172.17.0.1"]),
+    ]
+    warnings = net_diag.validate_subnets(interfaces, NETWORKS)
+    assert len(warnings) == 3
+    assert not any("lab_lan" in w for w in warnings)
+
+    vm = VMDefinition(
+        name="web",
+        hostname="web.lab.local",
+        role="app",
+        os_family="debian",
+        os_version="12",
+        machine_type="vm",
+        networks=[VMNetwork(name="lab_lan", ip="10.10.0.140"), VMNetwork(name="lab_servers", ip="192.168.45.9")],
+        checks=VMChecks(),
+    )
+    config = RootConfig(
+        environment=Environment(name="lab", domain="lab.local", description="d"),
+        networks=NETWORKS,
+        vms=[vm],
+        defaults=Defaults(vm_checks=VMChecks()),
+    )
+    unmatched, misplaced = net_diag.map_addresses(interfaces, config)
+    assert unmatched == ["local docker0 172.17.0.1", "expected host lab_lan.stray 10.20.0.5"]
+    # 10.10.0.140 sits in the nested /25 but is still inside lab_lan
+    assert misplaced == ["vm web 192.168.45.9 is outside its network lab_servers (falls in home_wan)"]
+
+
+def test_validate_subnets_counts_enclosing_and_duplicate_networks():
+    networks = {
+        "site": Network(name="site", cidr="10.0.0.0/8", gateway="10.0.0.1"),
+        "lab_lan": Network(name="lab_lan", cidr="10.10.0.0/24", gateway="10.10.0.1"),
+        "lab_alias": Network(name="lab_alias", cidr="10.10.0.0/24", gateway="10.10.0.1"),
+        "home_wan": Network(name="home_wan", cidr="192.168.45.0/24", gateway="192.168.45.1"),
+    }
+    interfaces = [InterfaceInfo(name="vmbr1", addresses=["10.10.0.5"])]
+    warnings = net_diag.validate_subnets(interfaces, networks)
+    assert warnings == ["No local interface in expected subnet home_wan (192.168.45.0/24)"]
@@ -0,0 +1,123 @@
+"""Tests for the aggregated config validator behind ``validate``."""
+
+import ipaddress
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from cli_tool import cli, validator
+
+BAD_CONFIG = """\
+environment:
+  name: x
+  domain: 5
+networks:
+  lan:
+    cidr: 10.0.0.0/24
+    gateway: 10.0.1.1
+  lan2:
+    cidr: 10.0.0.128/25
+    gateway: 10.0.0.129
+vms:
+  - name: one
+    hostname: one.lab
+    role: r
+    os: {family: debian}
+    networks:
+      - name: lan
+        ip: 10.0.2.3
+  - name: one
+    hostname: two.lab
+    role: r
+    os: {family: debian}
+    checks: {samples: 0}
+    networks:
+      - name: lan
+        ip: 10.0.2.3
+      - name: nope
+        ip: 999.1.1.1
+"""
+
+
+def _issues(report):
+    return {(issue.line, issue.severity, issue.path, issue.message) for issue in report.issues}
+
+
+def test_every_problem_is_reported_with_its_line(tmp_path: Path):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(BAD_CONFIG, encoding="utf-8")
+    report = validator.validate_file(cfg)
+
+    assert _issues(report) == {
+        (1, "error", "environment.description", "is required"),
+        (3, "error", "environment.domain", "must be a string"),
+        (7, "error", "networks.lan.gateway", "10.0.1.1 is outside 10.0.0.0/24"),
+        (9, "warning", "networks.lan2.cidr", "overlaps networks.lan"),
+        (18, "error", "vms[0](one).networks[0].ip", "10.0.2.3 is outside lan"),
+        (19, "error", "vms[1](one).name", "duplicate VM name; first used by vms[0](one).name"),
+        (23, "error", "vms[1](one).checks.samples", "must be an integer between 1 and 100"),
+        (26, "error", "vms[1](one).networks[0].ip", "10.0.2.3 is outside lan"),
+        (26, "error", "vms[1](one).networks[0].ip", "duplicate address; first used by vms[0](one).networks[0].ip"),
+        (27, "error", "vms[1](one).networks[1].name", "references unknown network 'nope'"),
+        (28, "error", "vms[1](one).networks[1].ip", "must be a valid IP address, got '999.1.1.1'"),
+    }
+    assert [issue.line for issue in report.issues] == sorted(issue.line for issue in report.issues)
+
+
+@pytest.mark.parametrize("text", ["10.0.0.0/24", "10.0.0.77/24", "10.0.0.1", "fd00::/64", "10.0.0.0/33", "010.0.0.0/8", "x/8"])
+def test_integer_cidr_parsing_matches_ipaddress(text):
+    try:
+        net = ipaddress.ip_network(text, strict=False)
+        expected = (net.version, int(net.network_address), int(net.broadcast_address))
+    except ValueError:
+        expected = None
+    assert validator.parse_cidr(text) == expected
+
+
+def test_validate_command_covers_fragments_and_sets_exit_status(monkeypatch, capsys, tmp_path: Path, config_path):
+    monkeypatch.setattr(cli, "DEFAULT_LOG_FILE", tmp_path / "log.txt")
+    monkeypatch.setattr(sys, "argv", ["prog", "validate", "-c", str(config_path), "--output", "json"])
+    cli.run()
+    assert json.loads(capsys.readouterr().out)["validate"]["valid"] is True
+
+    conf_d = tmp_path / "conf.d"
+    conf_d.mkdir()
+    (conf_d / "team.yaml").write_text(
+        "vms:\n  - name: host1\n    hostname: other.test.local\n    role: r\n"
+        "    networks:\n      - name: lan\n        ip: 10.10.0.10\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(sys, "argv", ["prog", "validate", "-c", str(config_path)])
+    with pytest.raises(SystemExit) as exc:
+        cli.run()
+    assert exc.value.code == 1
+    out = capsys.readouterr().out
+    assert f"{conf_d / 'team.yaml'}:2: error: vms[0](host1).name: duplicate VM name" in out
+    assert "invalid - 1 networks, 2 VMs in 2 files; 2 errors, 0 warnings" in out
+
+
+def test_merge_keys_supply_inherited_fields(tmp_path: Path):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(
+        """\
+environment: {name: lab, domain: lab.local, description: d}
+networks:
+  lan: {cidr: 10.0.0.0/24, gateway: 10.0.0.1}
+vms:
+  - &base
+    name: one
+    hostname: one.lab
+    role: r
+    os: {family: debian}
+    networks: [{name: lan, ip: 10.0.0.2}]
+  - <<: *base
+    name: two
+    hostname: two.lab
+    networks: [{name: lan, ip: 10.0.0.3}]
+""",
+        encoding="utf-8",
+    )
+    report = validator.validate_file(cfg)
+    assert report.issues == []
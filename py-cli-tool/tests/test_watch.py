@@ -0,0 +1,93 @@
+"""Tests for vms --watch scheduling and transition reporting."""
+
+import asyncio
+import random
+
+import pytest
+
+from cli_tool import vm_health
+from cli_tool.check_engine import CheckEngine
+from cli_tool.config import VMChecks, VMDefinition, VMNetwork
+from cli_tool.watch import Watcher
+
+
+def _vm(name: str, interval=None) -> VMDefinition:
+    return VMDefinition(
+        name=name,
+        hostname=f"{name}.test.local",
+        role="lab",
+        os_family="debian",
+        os_version="12",
+        machine_type="vm",
+        networks=[VMNetwork(name="lan", ip="10.0.0.1")],
+        checks=VMChecks(ping=True, ssh_port=0, interval=interval, samples=1),
+    )
+
+
+def _watch(monkeypatch, vms, fake_ping, duration, interval=0.05):
+    transitions = []
+    monkeypatch.setattr(vm_health, "_ping", fake_ping)
+
+    async def _main():
+        engine = CheckEngine(timeout=0.1)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(duration, stop.set)
+        watcher = Watcher(engine, vms, interval=interval, jitter=0.1, rng=random.Random(1))
+        await watcher.run(transitions.append, stop)
+        engine.close()
+
+    asyncio.run(_main())
+    return transitions
+
+
+def test_only_transitions_are_reported(monkeypatch):
+    calls = {"n": 0}
+
+    async def flapping_ping(ip, timeout, pinger=None):
+        calls["n"] += 1
+        # healthy for the first checks, then down, then back up
+        return (not 3 <= calls["n"] <= 5), "ping timed out"
+
+    transitions = _watch(monkeypatch, [_vm("dns-01")], flapping_ping, duration=0.5)
+    assert calls["n"] > 6
+    assert [(t.previous, t.current) for t in transitions] == [
+        (None, "healthy"),
+        ("healthy", "degraded"),
+        ("degraded", "healthy"),
+    ]
+
+
+def test_per_vm_interval_overrides_default(monkeypatch):
+    seen = []
+
+    async def recording_ping(ip, timeout, pinger=None):
+        seen.append(ip)
+        return True, None
+
+    fast = _vm("fast")
+    slow = _vm("slow", interval=10)
+    slow.networks = [VMNetwork(name="lan", ip="10.0.0.2")]
+    _watch(monkeypatch, [fast, slow], recording_ping, duration=0.4)
+    assert seen.count("10.0.0.2") == 1
+    assert seen.count("10.0.0.1") > 3
+
+
+def test_failing_transition_callback_stops_the_watcher():
+    async def healthy(self, vm):
+        return vm_health.HealthStatus(name=vm.name, hostname=vm.hostname, status="healthy", reasons=["ok"])
+
+    def broken_stdout(transition):
+        raise BrokenPipeError("stdout closed")
+
+    async def _main():
+        engine = CheckEngine(timeout=0.1)
+        engine.check_vm = healthy.__get__(engine)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(5, stop.set)
+        try:
+            await Watcher(engine, [_vm("dns-01")], interval=0.01).run(broken_stdout, stop)
+        finally:
+            engine.close()
+
+    with pytest.raises(BrokenPipeError):
+        asyncio.run(_main())